@@ -3,25 +3,59 @@ Módulo de inicialización de la aplicación Flask.
 Este archivo configura e inicializa todas las extensiones de Flask y registra los blueprints.
 """
 
+from importlib import import_module
+
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import Config
+from app.replicas import SesionEnrutada
 
 # Inicializar extensiones de Flask
-db = SQLAlchemy()
-migrate = Migrate()
+# La sesión enruta las lecturas marcadas con @lectura_replica a la réplica, si existe
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
 jwt = JWTManager()
 
-def crear_app(config_class=Config):
+# Blueprints agrupados por área: (módulo, nombre del blueprint, prefijo de URL).
+# El modo serverless construye cada grupo solo cuando recibe su primera solicitud.
+GRUPOS_BLUEPRINTS = {
+    'clientes': [
+        ('app.blueprint.clients.auth.rutas', 'auth_bp', '/auth'),
+        ('app.blueprint.clients.tareas.rutas', 'tareas_bp', '/tareas'),
+        ('app.blueprint.clients.vistas', 'vistas_bp', None),
+    ],
+    'admin': [
+        ('app.blueprint.admin.auth.rutas', 'admin_auth_bp', '/admin/auth'),
+        ('app.blueprint.admin.usuarios.rutas', 'usuarios_bp', '/admin'),
+        ('app.blueprint.admin.vistas', 'vistas_admin_bp', '/admin'),
+        ('app.blueprint.admin.sistema.rutas', 'sistema_bp', '/admin'),
+        ('app.blueprint.admin.trabajos.rutas', 'trabajos_bp', '/admin'),
+        ('app.blueprint.admin.auditoria.rutas', 'auditoria_bp', '/admin'),
+    ],
+}
+
+def registrar_blueprints(app, grupos=None):
+    """
+    Importa y registra los blueprints de los grupos indicados.
+
+    Args:
+        app: Aplicación Flask
+        grupos (iterable, optional): Nombres de los grupos a registrar (por defecto todos)
+    """
+    for grupo in grupos or GRUPOS_BLUEPRINTS:
+        for modulo, nombre, prefijo in GRUPOS_BLUEPRINTS[grupo]:
+            blueprint = getattr(import_module(modulo), nombre)
+            app.register_blueprint(blueprint, url_prefix=prefijo)
+
+def crear_app(config_class=Config, grupos=None):
     """
     Fábrica de aplicaciones Flask.
-    
+
     Args:
         config_class: Clase de configuración a utilizar (por defecto Config)
-        
+        grupos (iterable, optional): Grupos de blueprints a registrar (por defecto todos)
+
     Returns:
         app: Instancia de la aplicación Flask configurada
     """
@@ -29,29 +63,75 @@ def crear_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Bitácora estructurada no bloqueante (antes que el resto para registrar su arranque)
+    from app import bitacora
+    bitacora.init_app(app)
+
     # Inicializar extensiones con la aplicación
     db.init_app(app)
-    migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app)
 
-    # Registrar Blueprints de diferentes módulos 
+    # Serialización de respuestas: fechas ISO en JSON y negociación de MessagePack
+    from app import formatos
+    formatos.init_app(app)
+
+    # Estadísticas en vivo del pool de conexiones
+    from app import pool
+    pool.init_app(app, db)
+
+    # Enrutamiento de lecturas a la réplica (solo si está configurada)
+    from app import replicas
+    replicas.init_app(app, db)
 
-    # Blueprints clientes
-    from app.blueprint.clients.auth.rutas import auth_bp
-    from app.blueprint.clients.tareas.rutas import tareas_bp
+    # PRAGMA y transacciones de escritura del modo embebido con SQLite (si está configurado)
+    from app import sqlite
+    sqlite.init_app(app, db)
 
-    # Blueprints administrativos
-    from app.blueprint.admin.auth.rutas import admin_auth_bp
-    from app.blueprint.admin.usuarios.rutas import usuarios_bp
-    
-    # Registro de blueprints de clientes
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(tareas_bp, url_prefix='/tareas')
+    # Perfilador bajo demanda de solicitudes individuales (antes que los demás manejadores)
+    from app import perfilador
+    perfilador.init_app(app, db)
 
-    # Registro de blueprints administrativos
-    app.register_blueprint(admin_auth_bp, url_prefix='/admin/auth')
-    app.register_blueprint(usuarios_bp, url_prefix='/admin')
+    # Flask-Migrate (y Alembic) solo se necesitan para los comandos `flask db`;
+    # en serverless se omiten para no pagar su importación en cada arranque en frío
+    if not app.config.get('SERVERLESS'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Assets estáticos empaquetados con hash y precomprimidos
+    from app import assets
+    assets.init_app(app)
+
+    # Compresión gzip/brotli de las respuestas dinámicas
+    from app import compresion
+    compresion.init_app(app)
+
+    # Contadores de tareas desnormalizados en usuarios (eventos y comando de reparación)
+    from app import contadores
+    contadores.init_app(app)
+
+    # Archivo frío de tareas antiguas (comando de archivado por lotes)
+    from app import archivo
+    archivo.init_app(app)
+
+    # Purga de usuarios inactivos (comando de borrado por lotes)
+    from app import retencion
+    retencion.init_app(app)
+
+    # Trabajos en segundo plano del panel (ejecutor por proceso y comando `flask trabajos`)
+    from app import trabajos
+    trabajos.init_app(app)
+
+    # Recordatorios de fecha límite (encolado de tareas tardías y comando `flask recordatorios`)
+    from app import recordatorios
+    recordatorios.init_app(app)
+
+    # Registro de auditoría del panel (escritura diferida por lotes)
+    from app import auditoria
+    auditoria.init_app(app, db)
+
+    # Registrar Blueprints de clientes y administrativos
+    registrar_blueprints(app, grupos)
 
     # Manejadores de errores JWT para respuestas consistentes
     @jwt.expired_token_loader
@@ -84,14 +164,4 @@ def crear_app(config_class=Config):
             'error': 'authorization_required'
         }), 401
 
-    # Ruta raíz para servir el frontend
-
-    # Blueprints de usuarios
-    from app.blueprint.clients.vistas import vistas_bp
-    app.register_blueprint(vistas_bp)
-
-    # Blueprints administradores
-    from app.blueprint.admin.vistas import vistas_admin_bp
-    app.register_blueprint(vistas_admin_bp, url_prefix='/admin')
-
-    return app
\ No newline at end of file
+    return app
@@ -0,0 +1,116 @@
+"""
+Módulo de archivo frío de tareas.
+Mueve a `tareas_archivadas` las tareas cuya fecha límite venció hace más de
+ARCHIVO_ANTIGUEDAD_DIAS, en lotes pequeños con una transacción corta por lote
+(INSERT ... SELECT + DELETE por id) y una pausa entre lotes, de modo que el
+archivado no mantiene bloqueos largos sobre `tareas` mientras la aplicación
+sigue atendiendo solicitudes.
+
+Los contadores de usuarios (app/contadores.py) se recalculan solos al borrar
+cada lote, por lo que reflejan únicamente las tareas activas.
+"""
+
+import time
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from app.modelos import Tarea, TareaArchivada
+
+# Columnas que se copian de una tarea a su versión archivada
+COLUMNAS_ARCHIVO = ('id', 'usuario_id', 'titulo', 'descripcion', 'fecha_limite', 'creado_en', 'actualizado_en')
+
+
+def archivar_lote(sesion, fecha_corte, tamano_lote):
+    """
+    Archiva un lote de tareas vencidas antes de la fecha de corte en una sola transacción.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        fecha_corte (date): Se archivan las tareas con fecha_limite anterior a esta fecha
+        tamano_lote (int): Número máximo de tareas del lote
+
+    Returns:
+        int: Número de tareas archivadas (0 si no quedan)
+    """
+    ids = sesion.execute(
+        select(Tarea.id)
+        .where(Tarea.fecha_limite < fecha_corte)
+        .order_by(Tarea.id)
+        .limit(tamano_lote)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    try:
+        sesion.execute(
+            insert(TareaArchivada).from_select(
+                COLUMNAS_ARCHIVO,
+                select(*(getattr(Tarea, columna) for columna in COLUMNAS_ARCHIVO)).where(Tarea.id.in_(ids))
+            )
+        )
+        sesion.execute(delete(Tarea).where(Tarea.id.in_(ids)))
+        sesion.commit()
+    except Exception:
+        sesion.rollback()
+        raise
+    return len(ids)
+
+
+def archivar_tareas(sesion, antiguedad_dias, tamano_lote, pausa=0.0, maximo=None, hoy=None):
+    """
+    Archiva por lotes todas las tareas vencidas hace más de `antiguedad_dias`.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        antiguedad_dias (int): Días desde la fecha límite para considerar una tarea archivable
+        tamano_lote (int): Tareas por lote (una transacción por lote)
+        pausa (float, optional): Segundos de espera entre lotes para ceder la base de datos
+        maximo (int, optional): Número máximo de tareas a archivar en esta ejecución
+        hoy (date, optional): Fecha de referencia (por defecto hoy)
+
+    Returns:
+        int: Número total de tareas archivadas
+    """
+    fecha_corte = (hoy or date.today()) - timedelta(days=antiguedad_dias)
+    total = 0
+    while maximo is None or total < maximo:
+        lote = tamano_lote if maximo is None else min(tamano_lote, maximo - total)
+        archivadas = archivar_lote(sesion, fecha_corte, lote)
+        total += archivadas
+        if archivadas < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+
+@click.command('archivar-tareas')
+@click.option('--dias', type=int, default=None, help='Antigüedad mínima de la fecha límite (por defecto ARCHIVO_ANTIGUEDAD_DIAS).')
+@click.option('--lote', type=int, default=None, help='Tareas por lote (por defecto ARCHIVO_TAMANO_LOTE).')
+@click.option('--pausa', type=float, default=None, help='Segundos entre lotes (por defecto ARCHIVO_PAUSA_SEGUNDOS).')
+@click.option('--maximo', type=int, default=None, help='Máximo de tareas a archivar en esta ejecución.')
+def archivar_tareas_comando(dias, lote, pausa, maximo):
+    """Mueve al archivo frío las tareas vencidas hace tiempo."""
+    from app import db
+    configuracion = current_app.config
+    total = archivar_tareas(
+        db.session,
+        dias if dias is not None else configuracion['ARCHIVO_ANTIGUEDAD_DIAS'],
+        lote or configuracion['ARCHIVO_TAMANO_LOTE'],
+        pausa if pausa is not None else configuracion['ARCHIVO_PAUSA_SEGUNDOS'],
+        maximo
+    )
+    click.echo(f'Tareas archivadas: {total}.')
+
+
+def init_app(app):
+    """
+    Registra el comando de archivado de tareas.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.cli.add_command(archivar_tareas_comando)
@@ -0,0 +1,354 @@
+"""
+Módulo de la API asíncrona (ASGI).
+Sirve los endpoints de `/tareas` con sesiones asíncronas de SQLAlchemy
+(asyncpg / aiosqlite), de modo que un proceso atiende muchas conexiones
+concurrentes mientras espera a la base de datos. Mantiene la misma semántica
+JWT y las mismas respuestas JSON que `tareas_bp`; el resto de rutas se delega
+en la aplicación Flask a través de un adaptador WSGI.
+"""
+
+import json
+import re
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from jwt import ExpiredSignatureError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from app.blueprint.clients.tareas.consultas import construir_consulta_tareas, solicita_archivadas
+from app.blueprint.esquemas import EsquemaActualizarTarea, EsquemaCrearTarea
+from app.blueprint.utils import validar_fecha_futura, validar_campos_solicitados, fila_a_dict
+from app.formatos import MIME_MSGPACK, TIPOS_MSGPACK, ProveedorJSON, desempaquetar, empaquetar, prefiere_msgpack
+from app.modelos import Tarea
+from app.retencion import sentencia_actividad
+from app.sqlite import configurar_motor, metodo_solicitud
+
+# Drivers asíncronos equivalentes a los síncronos configurados
+DRIVERS_ASINCRONOS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+_RUTA_LISTA = re.compile(r'^/tareas/$')
+_RUTA_TAREA = re.compile(r'^/tareas/(\d+)$')
+
+_SIN_DATOS = 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'
+
+
+def url_asincrona(url):
+    """
+    Convierte la URL de la base de datos al driver asíncrono correspondiente.
+    asyncpg no admite `sslmode` ni `channel_binding`; `sslmode` se traduce a `ssl`.
+
+    Args:
+        url (str): URL de conexión síncrona
+
+    Returns:
+        URL: URL de conexión asíncrona
+    """
+    url = make_url(url)
+    url = url.set(drivername=DRIVERS_ASINCRONOS.get(url.drivername, url.drivername))
+    if url.drivername == 'postgresql+asyncpg':
+        consulta = dict(url.query)
+        sslmode = consulta.pop('sslmode', None)
+        consulta.pop('channel_binding', None)
+        if sslmode:
+            consulta['ssl'] = sslmode
+        url = url.set(query=consulta)
+    return url
+
+
+class ErrorRespuesta(Exception):
+    """
+    Error que se traduce directamente en una respuesta JSON.
+    """
+
+    def __init__(self, cuerpo, estado):
+        super().__init__(cuerpo)
+        self.cuerpo = cuerpo
+        self.estado = estado
+
+
+class AplicacionAsgi:
+    """
+    Aplicación ASGI que atiende `/tareas` de forma asíncrona y delega el resto en Flask.
+    """
+
+    def __init__(self, flask_app):
+        """
+        Args:
+            flask_app: Aplicación Flask ya configurada (JWT, modelos, resto de rutas)
+        """
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+        opciones = dict(flask_app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        self.motor = create_async_engine(url_asincrona(flask_app.config['SQLALCHEMY_DATABASE_URI']), **opciones)
+        self.sesiones = async_sessionmaker(self.motor, expire_on_commit=False)
+        if flask_app.config.get('SQLITE_PRAGMAS'):
+            configurar_motor(self.motor.sync_engine, flask_app.config['SQLITE_PRAGMAS'],
+                             flask_app.config.get('SQLITE_ESCRITURA'))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+            return
+
+        if scope['type'] == 'http':
+            ruta = scope['path']
+            metodo = scope['method']
+            coincidencia = _RUTA_TAREA.match(ruta)
+            manejador = None
+            argumentos = ()
+            if _RUTA_LISTA.match(ruta):
+                manejador = {'GET': self.obtener_tareas, 'POST': self.crear_tarea}.get(metodo)
+            elif coincidencia:
+                manejador = {'PUT': self.actualizar_tarea, 'DELETE': self.eliminar_tarea}.get(metodo)
+                argumentos = (int(coincidencia.group(1)),)
+
+            if manejador is not None:
+                # Con SQLite, decide si la transacción toma el bloqueo de escritura al empezar
+                metodo_solicitud.set(metodo)
+                await self._despachar(manejador, argumentos, scope, receive, send)
+                return
+
+        await self.wsgi(scope, receive, send)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                await self.motor.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _despachar(self, manejador, argumentos, scope, receive, send):
+        cabeceras = {nombre.decode('latin-1').lower(): valor.decode('latin-1') for nombre, valor in scope['headers']}
+        try:
+            usuario_id = self._identidad(cabeceras)
+            # Los eventos del mapper de Tarea (recordatorios de tareas tardías) leen la
+            # configuración de la aplicación, igual que en las rutas de Flask
+            with self.flask_app.app_context():
+                cuerpo, estado = await manejador(usuario_id, cabeceras, scope, receive, *argumentos)
+        except ErrorRespuesta as error:
+            cuerpo, estado = error.cuerpo, error.estado
+
+        # Misma negociación que ProveedorJSON: MessagePack si el cliente lo prefiere
+        if prefiere_msgpack(parse_accept_header(cabeceras.get('accept'), MIMEAccept)):
+            tipo, datos = MIME_MSGPACK, empaquetar(cuerpo)
+        else:
+            # Mismo formato que jsonify en producción: claves ordenadas y compacto
+            tipo = 'application/json'
+            datos = (json.dumps(
+                cuerpo, default=ProveedorJSON.default, ensure_ascii=True, sort_keys=True, separators=(',', ':')
+            ) + '\n').encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': estado,
+            'headers': [
+                (b'content-type', tipo.encode('ascii')),
+                (b'content-length', str(len(datos)).encode('ascii')),
+                (b'vary', b'Accept'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': datos})
+
+    def _identidad(self, cabeceras):
+        """
+        Valida el token JWT de la cabecera Authorization con la misma configuración
+        y los mismos mensajes de error que la aplicación Flask.
+
+        Returns:
+            int: ID del usuario autenticado
+        """
+        autorizacion = cabeceras.get('authorization', '')
+        if not autorizacion.startswith('Bearer '):
+            raise ErrorRespuesta({'mensaje': 'Se requiere un token de acceso', 'error': 'authorization_required'}, 401)
+
+        with self.flask_app.app_context():
+            try:
+                datos = decode_token(autorizacion.split(' ')[1])
+            except ExpiredSignatureError:
+                raise ErrorRespuesta({'mensaje': 'El token ha expirado', 'error': 'token_expired'}, 401)
+            except Exception:
+                raise ErrorRespuesta({'mensaje': 'Token inválido', 'error': 'invalid_token'}, 422)
+
+        # Solo tokens de acceso de usuario (igual que @rol_requerido('usuario'))
+        if datos.get('type') != 'access' or datos.get('rol') != 'usuario':
+            raise ErrorRespuesta({'mensaje': 'Token inválido', 'error': 'invalid_token'}, 422)
+        return int(datos['sub'])
+
+    @staticmethod
+    async def _leer_datos(cabeceras, receive):
+        """
+        Lee el cuerpo de la solicitud como JSON o MessagePack según su Content-Type.
+        """
+        partes = []
+        while True:
+            mensaje = await receive()
+            partes.append(mensaje.get('body', b''))
+            if not mensaje.get('more_body'):
+                break
+        cuerpo = b''.join(partes)
+        tipo = cabeceras.get('content-type', '').split(';')[0].strip().lower()
+        try:
+            if tipo in TIPOS_MSGPACK:
+                return desempaquetar(cuerpo) if cuerpo else None
+            return json.loads(cuerpo or b'null')
+        except ValueError:
+            return None
+
+    @staticmethod
+    async def _tarea_duplicada(sesion, usuario_id, titulo, tarea_id=None):
+        consulta = select(Tarea.id).where(Tarea.usuario_id == usuario_id, Tarea.titulo == titulo)
+        if tarea_id:
+            consulta = consulta.where(Tarea.id != tarea_id)
+        return (await sesion.execute(consulta.limit(1))).first() is not None
+
+    async def obtener_tareas(self, usuario_id, cabeceras, scope, receive):
+        """
+        Equivalente asíncrono de `tareas_bp.obtener_tareas`.
+        """
+        parametros = {clave: valores[0] for clave, valores in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        es_valido, campos = validar_campos_solicitados(parametros.get('fields'), Tarea)
+        if not es_valido:
+            return {
+                'mensaje': f"Campos no válidos en 'fields': {', '.join(campos)}",
+                'campos_permitidos': list(Tarea.CAMPOS_PUBLICOS)
+            }, 400
+        try:
+            async with self.sesiones() as sesion:
+                incluir_archivadas = solicita_archivadas(parametros)
+                resultado = await sesion.execute(
+                    construir_consulta_tareas(usuario_id, parametros, campos, incluir_archivadas)
+                )
+                if campos or incluir_archivadas:
+                    return [fila_a_dict(fila) for fila in resultado], 200
+                tareas = resultado.scalars().all()
+            return [t.to_dict() for t in tareas], 200
+        except Exception as e:
+            return {'mensaje': 'Error al obtener tareas', 'error': str(e)}, 500
+
+    async def crear_tarea(self, usuario_id, cabeceras, scope, receive):
+        """
+        Equivalente asíncrono de `tareas_bp.crear_tarea`.
+        """
+        datos = await self._leer_datos(cabeceras, receive)
+        if not datos:
+            return {'mensaje': _SIN_DATOS}, 400
+
+        tarea_datos, errores = EsquemaCrearTarea.cargar(datos)
+        if errores:
+            return {'mensaje': 'Error en la validación de datos', 'errores': errores}, 400
+
+        fecha_limite = None
+        if tarea_datos.fecha_limite:
+            es_valida, fecha = validar_fecha_futura(tarea_datos.fecha_limite)
+            if not es_valida:
+                return {'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD o la fecha debe ser futura'}, 400
+            fecha_limite = fecha
+
+        async with self.sesiones() as sesion:
+            if await self._tarea_duplicada(sesion, usuario_id, tarea_datos.titulo):
+                return {'mensaje': 'Ya tienes una tarea con este título'}, 400
+
+            nueva_tarea = Tarea(
+                usuario_id=usuario_id,
+                titulo=tarea_datos.titulo,
+                descripcion=tarea_datos.descripcion,
+                fecha_limite=fecha_limite
+            )
+            try:
+                sesion.add(nueva_tarea)
+                await sesion.execute(sentencia_actividad(usuario_id))
+                await sesion.commit()
+                return nueva_tarea.to_dict(), 201
+            except Exception:
+                await sesion.rollback()
+                return {'mensaje': 'Error al crear la tarea'}, 500
+
+    async def actualizar_tarea(self, usuario_id, cabeceras, scope, receive, id):
+        """
+        Equivalente asíncrono de `tareas_bp.actualizar_tarea`.
+        """
+        async with self.sesiones() as sesion:
+            tarea = (await sesion.execute(
+                select(Tarea).where(Tarea.id == id, Tarea.usuario_id == usuario_id)
+            )).scalars().first()
+            if not tarea:
+                return {'mensaje': 'Tarea no encontrada'}, 404
+
+            datos = await self._leer_datos(cabeceras, receive)
+            if not datos:
+                return {'mensaje': _SIN_DATOS}, 400
+
+            cambios, errores = EsquemaActualizarTarea.cargar(datos)
+            if 'titulo' in datos and 'titulo' not in errores and datos['titulo'] != tarea.titulo:
+                if await self._tarea_duplicada(sesion, usuario_id, datos['titulo'], id):
+                    errores['titulo'] = 'Ya tienes una tarea con este título'
+            if errores:
+                return {'mensaje': 'Error en la validación de datos', 'errores': errores}, 400
+
+            if 'titulo' in cambios.presentes:
+                tarea.titulo = cambios.titulo
+            if 'descripcion' in cambios.presentes:
+                tarea.descripcion = cambios.descripcion
+            if 'fecha_limite' in cambios.presentes:
+                if cambios.fecha_limite:
+                    es_valida, fecha = validar_fecha_futura(cambios.fecha_limite)
+                    if not es_valida:
+                        return {'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD o la fecha debe ser futura'}, 400
+                    tarea.fecha_limite = fecha
+                else:
+                    tarea.fecha_limite = None
+
+            try:
+                await sesion.execute(sentencia_actividad(usuario_id))
+                await sesion.commit()
+                await sesion.refresh(tarea)
+                return tarea.to_dict(), 200
+            except Exception:
+                await sesion.rollback()
+                return {'mensaje': 'Error al actualizar tarea'}, 500
+
+    async def eliminar_tarea(self, usuario_id, cabeceras, scope, receive, id):
+        """
+        Equivalente asíncrono de `tareas_bp.eliminar_tarea`.
+        """
+        async with self.sesiones() as sesion:
+            tarea = (await sesion.execute(
+                select(Tarea).where(Tarea.id == id, Tarea.usuario_id == usuario_id)
+            )).scalars().first()
+            if not tarea:
+                return {'mensaje': 'Tarea no encontrada'}, 404
+            try:
+                await sesion.delete(tarea)
+                await sesion.execute(sentencia_actividad(usuario_id))
+                await sesion.commit()
+                return {'mensaje': 'Tarea eliminada exitosamente'}, 200
+            except Exception:
+                await sesion.rollback()
+                return {'mensaje': 'Error al eliminar tarea'}, 500
+
+
+def crear_app_asgi(config_class):
+    """
+    Fábrica de la aplicación ASGI.
+
+    Args:
+        config_class: Clase de configuración a utilizar
+
+    Returns:
+        AplicacionAsgi: Aplicación ASGI lista para uvicorn
+    """
+    from app import crear_app
+    return AplicacionAsgi(crear_app(config_class))
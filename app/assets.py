@@ -0,0 +1,502 @@
+"""
+Módulo de assets estáticos.
+Construye los paquetes de JavaScript y CSS de cada punto de entrada (empaquetados,
+minificados, con hash de contenido y precomprimidos en gzip/brotli) y los sirve
+con cabeceras de caché inmutables.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+# Puntos de entrada que se empaquetan (rutas relativas a la carpeta static)
+ENTRADAS = [
+    'js/clients/main.js',
+    'js/admin/main.js',
+    'css/clients/styles.css',
+    'css/admin/styles.css',
+    'css/admin/login/styles.css',
+]
+
+# Documentos grandes servidos en una URL fija que solo se precomprimen
+DOCUMENTOS = ['documentation.html']
+
+# Carpeta de salida (relativa a la carpeta static) y nombre del manifiesto
+CARPETA_DIST = 'dist'
+MANIFIESTO = 'manifest.json'
+
+assets_bp = Blueprint('assets', __name__)
+
+# Expresiones precompiladas del empaquetador
+_RE_IMPORT = re.compile(
+    r'^import\s+(?:(?P<default>\w+)|\{(?P<nombres>[^}]*)\})\s+from\s+[\'"](?P<ruta>[^\'"]+)[\'"];?[ \t]*$',
+    re.MULTILINE
+)
+_RE_EXPORT_DEFAULT = re.compile(r'^export\s+default\s+(\w+)\s*;?[ \t]*$', re.MULTILINE)
+_RE_EXPORT_DECLARACION = re.compile(
+    r'^export\s+((?:async\s+)?function\s*\*?\s*(\w+)|class\s+(\w+)|(?:const|let|var)\s+(\w+))',
+    re.MULTILINE
+)
+_RE_CSS_IMPORT = re.compile(r'@import\s+url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)\s*;')
+
+# Caracteres tras los cuales una barra inicia una expresión regular y no una división
+_PREVIOS_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+_PALABRAS_REGEX = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'throw')
+# Signos de puntuación junto a los que los espacios son innecesarios
+_PUNTUACION_JS = set('{}()[];,:=')
+_PUNTUACION_CSS = set('{};,>')
+
+
+def _minificar_js(codigo):
+    """
+    Elimina comentarios y espacios redundantes de un código JavaScript.
+    Respeta cadenas, plantillas (incluidas sus interpolaciones) y expresiones regulares.
+
+    Args:
+        codigo (str): Código fuente
+
+    Returns:
+        str: Código minificado
+    """
+    salida = []
+    i = 0
+    n = len(codigo)
+    # Pila de modos: 'codigo' (con profundidad de llaves) o 'plantilla'
+    pila = [['codigo', 0]]
+    espacio_pendiente = None
+
+    def ultimo_significativo():
+        return ''.join(salida[-16:]).rstrip()
+
+    def emitir(texto):
+        nonlocal espacio_pendiente
+        if espacio_pendiente is not None and salida:
+            anterior = salida[-1][-1:] if salida[-1] else ''
+            if espacio_pendiente == '\n':
+                salida.append('\n')
+            elif anterior not in _PUNTUACION_JS and texto[:1] not in _PUNTUACION_JS:
+                salida.append(' ')
+        espacio_pendiente = None
+        salida.append(texto)
+
+    while i < n:
+        modo = pila[-1]
+        c = codigo[i]
+
+        if modo[0] == 'plantilla':
+            if c == '\\':
+                salida.append(codigo[i:i + 2])
+                i += 2
+            elif c == '`':
+                salida.append(c)
+                pila.pop()
+                i += 1
+            elif codigo.startswith('${', i):
+                salida.append('${')
+                pila.append(['codigo', 0])
+                i += 2
+            else:
+                salida.append(c)
+                i += 1
+            continue
+
+        if c in ' \t\r\n':
+            inicio = i
+            while i < n and codigo[i] in ' \t\r\n':
+                i += 1
+            if '\n' in codigo[inicio:i] or espacio_pendiente == '\n':
+                espacio_pendiente = '\n'
+            else:
+                espacio_pendiente = ' '
+            continue
+
+        if codigo.startswith('//', i):
+            fin = codigo.find('\n', i)
+            i = n if fin == -1 else fin
+            continue
+
+        if codigo.startswith('/*', i):
+            fin = codigo.find('*/', i + 2)
+            fin = n if fin == -1 else fin + 2
+            if '\n' in codigo[i:fin]:
+                espacio_pendiente = '\n'
+            elif espacio_pendiente is None:
+                espacio_pendiente = ' '
+            i = fin
+            continue
+
+        if c in '\'"':
+            fin = i + 1
+            while fin < n and codigo[fin] != c:
+                fin += 2 if codigo[fin] == '\\' else 1
+            emitir(codigo[i:fin + 1])
+            i = fin + 1
+            continue
+
+        if c == '`':
+            emitir('`')
+            pila.append(['plantilla', 0])
+            i += 1
+            continue
+
+        if c == '/':
+            previo = ultimo_significativo()
+            es_regex = (
+                not previo
+                or previo[-1] in _PREVIOS_REGEX
+                or any(previo.endswith(p) and not (previo[:-len(p)][-1:].isalnum() or previo[:-len(p)][-1:] in '_$')
+                       for p in _PALABRAS_REGEX)
+            )
+            if es_regex:
+                fin = i + 1
+                en_clase = False
+                while fin < n:
+                    actual = codigo[fin]
+                    if actual == '\\':
+                        fin += 2
+                        continue
+                    if actual == '[':
+                        en_clase = True
+                    elif actual == ']':
+                        en_clase = False
+                    elif actual == '/' and not en_clase:
+                        break
+                    fin += 1
+                fin += 1
+                while fin < n and codigo[fin].isalpha():
+                    fin += 1
+                emitir(codigo[i:fin])
+                i = fin
+                continue
+
+        if c == '{':
+            modo[1] += 1
+        elif c == '}':
+            if len(pila) > 1 and modo[1] == 0:
+                # Fin de una interpolación ${...}: volver a la plantilla
+                espacio_pendiente = None
+                salida.append('}')
+                pila.pop()
+                i += 1
+                continue
+            modo[1] -= 1
+
+        emitir(c)
+        i += 1
+
+    return ''.join(salida).strip() + '\n'
+
+
+def _minificar_css(codigo):
+    """
+    Elimina comentarios y espacios redundantes de una hoja de estilos.
+
+    Args:
+        codigo (str): Hoja de estilos
+
+    Returns:
+        str: Hoja de estilos minificada
+    """
+    salida = []
+    i = 0
+    n = len(codigo)
+    espacio_pendiente = False
+
+    while i < n:
+        c = codigo[i]
+        if codigo.startswith('/*', i):
+            fin = codigo.find('*/', i + 2)
+            i = n if fin == -1 else fin + 2
+            espacio_pendiente = True
+            continue
+        if c in ' \t\r\n':
+            espacio_pendiente = True
+            i += 1
+            continue
+        if c in '\'"':
+            fin = i + 1
+            while fin < n and codigo[fin] != c:
+                fin += 2 if codigo[fin] == '\\' else 1
+            fragmento = codigo[i:fin + 1]
+            i = fin + 1
+        else:
+            fragmento = c
+            i += 1
+
+        anterior = salida[-1][-1:] if salida else ''
+        if espacio_pendiente and salida and anterior not in _PUNTUACION_CSS and fragmento[0] not in _PUNTUACION_CSS:
+            salida.append(' ')
+        espacio_pendiente = False
+        if fragmento == '}' and anterior == ';':
+            salida[-1] = salida[-1][:-1]
+        salida.append(fragmento)
+
+    return ''.join(salida).strip() + '\n'
+
+
+def _empaquetar_css(ruta, visitados=None):
+    """
+    Sustituye recursivamente las reglas @import locales por el contenido importado.
+
+    Args:
+        ruta (str): Ruta absoluta de la hoja de estilos
+        visitados (set, optional): Rutas ya incluidas, para evitar ciclos
+
+    Returns:
+        str: Hoja de estilos con todas sus dependencias incluidas
+    """
+    visitados = visitados if visitados is not None else set()
+    ruta = os.path.normpath(ruta)
+    if ruta in visitados:
+        return ''
+    visitados.add(ruta)
+
+    with open(ruta, encoding='utf-8') as archivo:
+        contenido = archivo.read()
+
+    def incluir(coincidencia):
+        destino = coincidencia.group(1)
+        if '://' in destino or destino.startswith('//'):
+            return coincidencia.group(0)
+        return _empaquetar_css(os.path.join(os.path.dirname(ruta), destino), visitados)
+
+    return _RE_CSS_IMPORT.sub(incluir, contenido)
+
+
+def _empaquetar_js(ruta_entrada):
+    """
+    Empaqueta un módulo ES y sus importaciones relativas en un único script.
+    Cada módulo conserva su propio ámbito y se evalúa en orden de dependencias.
+
+    Args:
+        ruta_entrada (str): Ruta absoluta del módulo de entrada
+
+    Returns:
+        str: Script empaquetado
+    """
+    orden = []
+    fuentes = {}
+
+    def visitar(ruta):
+        ruta = os.path.normpath(ruta)
+        if ruta in fuentes:
+            return
+        with open(ruta, encoding='utf-8') as archivo:
+            fuentes[ruta] = archivo.read()
+        for coincidencia in _RE_IMPORT.finditer(fuentes[ruta]):
+            visitar(os.path.join(os.path.dirname(ruta), coincidencia.group('ruta')))
+        orden.append(ruta)
+
+    visitar(ruta_entrada)
+    claves = {ruta: indice for indice, ruta in enumerate(orden)}
+
+    partes = ['(function () {', "'use strict';", 'var __m = [];']
+    for ruta in orden:
+        codigo = fuentes[ruta]
+        exportados = []
+
+        def reemplazar_import(coincidencia):
+            dependencia = claves[os.path.normpath(os.path.join(os.path.dirname(ruta), coincidencia.group('ruta')))]
+            if coincidencia.group('default'):
+                return f"const {coincidencia.group('default')} = __m[{dependencia}].default;"
+            nombres = ' '.join(coincidencia.group('nombres').split())
+            return f'const {{ {nombres} }} = __m[{dependencia}];'
+
+        def reemplazar_export(coincidencia):
+            exportados.append(next(nombre for nombre in coincidencia.groups()[1:] if nombre))
+            return coincidencia.group(1)
+
+        codigo = _RE_IMPORT.sub(reemplazar_import, codigo)
+        codigo = _RE_EXPORT_DEFAULT.sub(r'__e.default = \1;', codigo)
+        codigo = _RE_EXPORT_DECLARACION.sub(reemplazar_export, codigo)
+        asignaciones = ''.join(f'\n__e.{nombre} = {nombre};' for nombre in exportados)
+
+        partes.append(f'__m[{claves[ruta]}] = (function (__e) {{\n{codigo}{asignaciones}\nreturn __e;\n}})({{}});')
+
+    partes.append('})();')
+    return '\n'.join(partes)
+
+
+def _comprimir(ruta):
+    """
+    Genera las variantes .gz y .br (si brotli está disponible) de un archivo.
+
+    Args:
+        ruta (str): Ruta absoluta del archivo a comprimir
+    """
+    with open(ruta, 'rb') as archivo:
+        datos = archivo.read()
+    with open(ruta + '.gz', 'wb') as archivo:
+        archivo.write(gzip.compress(datos, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(ruta + '.br', 'wb') as archivo:
+            archivo.write(brotli.compress(datos, quality=11))
+
+
+def construir_assets(carpeta_static, carpeta_documentos=None, minificar=True):
+    """
+    Construye los assets de todos los puntos de entrada y escribe el manifiesto.
+
+    Args:
+        carpeta_static (str): Carpeta static de la aplicación
+        carpeta_documentos (str, optional): Carpeta con los documentos a precomprimir
+        minificar (bool): Si se deben minificar los paquetes
+
+    Returns:
+        dict: Manifiesto que relaciona cada entrada con su archivo con hash
+    """
+    destino = os.path.join(carpeta_static, CARPETA_DIST)
+    manifiesto = {}
+
+    for entrada in ENTRADAS:
+        ruta = os.path.join(carpeta_static, entrada)
+        base, extension = os.path.splitext(entrada)
+        if extension == '.js':
+            contenido = _empaquetar_js(ruta)
+            contenido = _minificar_js(contenido) if minificar else contenido
+        else:
+            contenido = _empaquetar_css(ruta)
+            contenido = _minificar_css(contenido) if minificar else contenido
+
+        datos = contenido.encode('utf-8')
+        huella = hashlib.sha256(datos).hexdigest()[:12]
+        nombre = f'{base}.{huella}{extension}'
+        ruta_salida = os.path.join(destino, nombre)
+        os.makedirs(os.path.dirname(ruta_salida), exist_ok=True)
+        with open(ruta_salida, 'wb') as archivo:
+            archivo.write(datos)
+        _comprimir(ruta_salida)
+        manifiesto[entrada] = nombre
+
+    if carpeta_documentos:
+        for documento in DOCUMENTOS:
+            ruta_salida = os.path.join(destino, 'documentacion', documento)
+            os.makedirs(os.path.dirname(ruta_salida), exist_ok=True)
+            with open(os.path.join(carpeta_documentos, documento), 'rb') as origen:
+                datos = origen.read()
+            with open(ruta_salida, 'wb') as archivo:
+                archivo.write(datos)
+            _comprimir(ruta_salida)
+
+    with open(os.path.join(destino, MANIFIESTO), 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, sort_keys=True)
+
+    return manifiesto
+
+
+def cargar_manifiesto(app):
+    """
+    Carga el manifiesto de assets construidos, si existe.
+
+    Args:
+        app: Aplicación Flask
+
+    Returns:
+        dict: Manifiesto (vacío si los assets no se han construido)
+    """
+    ruta = os.path.join(app.static_folder, CARPETA_DIST, MANIFIESTO)
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def url_asset(nombre):
+    """
+    Devuelve la URL de un asset: la versión construida con hash si existe en el
+    manifiesto o el archivo original de la carpeta static en caso contrario.
+
+    Args:
+        nombre (str): Ruta del asset relativa a la carpeta static
+
+    Returns:
+        str: URL del asset
+    """
+    manifiesto = current_app.extensions.get('assets', {})
+    if nombre in manifiesto:
+        return url_for('assets.servir_asset', filename=manifiesto[nombre])
+    return url_for('static', filename=nombre)
+
+
+def enviar_precomprimido(directorio, nombre, max_age, inmutable=False):
+    """
+    Envía un archivo eligiendo la variante precomprimida que acepte el cliente.
+
+    Args:
+        directorio (str): Carpeta que contiene el archivo y sus variantes
+        nombre (str): Nombre del archivo sin comprimir
+        max_age (int): Segundos de caché para el cliente
+        inmutable (bool): Si se añade la directiva 'immutable'
+
+    Returns:
+        Response: Archivo solicitado con las cabeceras de caché y codificación
+    """
+    tipo = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    codificacion = None
+    archivo = nombre
+    for candidata, extension in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[candidata] and os.path.isfile(os.path.join(directorio, nombre + extension)):
+            codificacion = candidata
+            archivo = nombre + extension
+            break
+
+    respuesta = send_from_directory(directorio, archivo, mimetype=tipo, max_age=max_age)
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    respuesta.headers['Vary'] = 'Accept-Encoding'
+    if inmutable:
+        respuesta.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    return respuesta
+
+
+@assets_bp.route('/<path:filename>')
+def servir_asset(filename):
+    """
+    Sirve un asset construido con caché inmutable de larga duración.
+
+    Args:
+        filename (str): Ruta del archivo con hash dentro de la carpeta dist
+
+    Returns:
+        Response: Archivo solicitado
+    """
+    directorio = os.path.join(current_app.static_folder, CARPETA_DIST)
+    return enviar_precomprimido(directorio, filename, current_app.config['ASSETS_MAX_AGE'], inmutable=True)
+
+
+@click.command('construir-assets')
+@click.option('--sin-minificar', is_flag=True, help='Empaqueta sin minificar (útil para depurar).')
+def construir_assets_comando(sin_minificar):
+    """Empaqueta, minifica, versiona y precomprime los assets estáticos."""
+    carpeta_documentos = os.path.join(current_app.root_path, '..', 'documentacion')
+    manifiesto = construir_assets(current_app.static_folder, carpeta_documentos, minificar=not sin_minificar)
+    current_app.extensions['assets'] = manifiesto
+    for entrada, nombre in sorted(manifiesto.items()):
+        click.echo(f'{entrada} -> {CARPETA_DIST}/{nombre}')
+    if brotli is None:
+        click.echo('Aviso: brotli no está instalado; solo se generaron variantes gzip.')
+
+
+def init_app(app):
+    """
+    Registra el blueprint de assets, el ayudante de plantillas y el comando CLI.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.extensions['assets'] = cargar_manifiesto(app)
+    app.register_blueprint(assets_bp, url_prefix='/assets')
+    app.add_template_global(url_asset)
+    app.cli.add_command(construir_assets_comando)
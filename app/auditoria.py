@@ -0,0 +1,275 @@
+"""
+Módulo del registro de auditoría de las operaciones administrativas.
+
+Las operaciones sobre usuarios del panel y la actualización del perfil de un
+administrador anotan un evento con `anotar()`. El evento no añade un INSERT
+síncrono a la solicitud:
+
+- La anotación queda en la sesión (`session.info`), asociada a la transacción
+  o al punto de guardado (begin_nested) en curso, y pasa al búfer en memoria
+  del proceso solo cuando termina confirmada la transacción exterior. Un punto
+  de guardado que se libera pasa sus eventos a la transacción que lo contiene;
+  uno que se deshace descarta solo los suyos.
+- Un hilo escritor vacía el búfer con INSERT de varias filas cuando acumula
+  AUDITORIA_TAMANO_LOTE eventos o cada AUDITORIA_INTERVALO segundos, en su
+  propia transacción corta. Al terminar el proceso (atexit o `worker_exit` de
+  Gunicorn) se vacía lo pendiente.
+- Si la escritura falla, los eventos vuelven al búfer para el siguiente intento;
+  por encima de AUDITORIA_MAXIMO_EN_MEMORIA se descartan los más antiguos (y se
+  cuentan), para que una base caída no agote la memoria del proceso.
+
+En serverless (AUDITORIA_ASINCRONA = False) no hay hilo: cada confirmación
+escribe sus eventos en el momento.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.modelos import EventoAuditoria
+
+logger = logging.getLogger(__name__)
+
+_eventos = EventoAuditoria.__table__
+
+# Clave de `session.info` con los eventos pendientes de cada transacción o punto de guardado
+CLAVE_SESION = 'auditoria_pendiente'
+# Clave de `session.info` con los eventos ya confirmados de la transacción exterior
+CLAVE_CONFIRMADOS = 'auditoria_confirmada'
+
+# Escritores creados en este proceso (uno por aplicación)
+_escritores = []
+
+
+def anotar(accion, entidad_id, datos=None, entidad='usuario', administrador_id=None):
+    """
+    Anota un evento de auditoría en la transacción en curso de la sesión.
+    Se registra solo si se confirman esa transacción (o punto de guardado) y
+    todas las que la contienen.
+
+    Args:
+        accion (str): Operación realizada (crear_usuario, actualizar_usuario...)
+        entidad_id (int): Identificador del registro afectado
+        datos (dict, optional): Detalle de la operación (sin contraseñas)
+        entidad (str, optional): Tipo de registro afectado
+        administrador_id (int, optional): Administrador que opera (por defecto el
+            autenticado en la solicitud por verificar_token_admin)
+    """
+    from app import db
+    if not current_app.config.get('AUDITORIA_HABILITADA'):
+        return
+    if administrador_id is None:
+        administrador_id = g.get('administrador_id')
+    sesion = db.session()
+    transaccion = _transaccion_en_curso(sesion) or sesion.begin()
+    sesion.info.setdefault(CLAVE_SESION, {}).setdefault(transaccion, []).append({
+        'accion': accion,
+        'entidad': entidad,
+        'entidad_id': entidad_id,
+        'administrador_id': administrador_id,
+        'datos': datos,
+        'ip': request.remote_addr if has_request_context() else None,
+        'creado_en': datetime.utcnow(),
+    })
+
+
+def _transaccion_en_curso(sesion):
+    """Punto de guardado más interno de la sesión, o su transacción exterior si no hay ninguno."""
+    return sesion.get_nested_transaction() or sesion.get_transaction()
+
+
+@event.listens_for(Session, 'after_commit')
+def _tras_confirmar(sesion):
+    # Se dispara también al liberar un punto de guardado: sus eventos pasan a
+    # la transacción que lo contiene, que aún puede deshacerse
+    transaccion = _transaccion_en_curso(sesion)
+    eventos = sesion.info.get(CLAVE_SESION, {}).pop(transaccion, None)
+    if not eventos:
+        return
+    if transaccion.parent is not None:
+        sesion.info[CLAVE_SESION].setdefault(transaccion.parent, []).extend(eventos)
+    else:
+        sesion.info.setdefault(CLAVE_CONFIRMADOS, []).extend(eventos)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _tras_terminar(sesion, transaccion):
+    # Lo que queda pendiente de una transacción terminada no se confirmó (se deshizo)
+    pendientes = sesion.info.get(CLAVE_SESION)
+    if pendientes:
+        pendientes.pop(transaccion, None)
+    if transaccion.parent is not None:
+        return
+
+    confirmados = sesion.info.pop(CLAVE_CONFIRMADOS, None)
+    sesion.info.pop(CLAVE_SESION, None)
+    if confirmados and has_app_context():
+        escritor = current_app.extensions.get('auditoria')
+        if escritor is not None:
+            escritor.registrar(confirmados)
+
+
+class EscritorAuditoria:
+    """
+    Búfer en memoria de los eventos confirmados y hilo que los escribe por lotes.
+
+    El hilo arranca con el primer evento de cada proceso (también en los hijos tras
+    un fork, que no heredan los hilos del padre; el búfer heredado lo escribe el padre).
+    """
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self.tamano_lote = app.config['AUDITORIA_TAMANO_LOTE']
+        self.intervalo = app.config['AUDITORIA_INTERVALO']
+        self.maximo_en_memoria = app.config['AUDITORIA_MAXIMO_EN_MEMORIA']
+        self.asincrona = app.config.get('AUDITORIA_ASINCRONA', True)
+        self._bloqueo_inicio = threading.Lock()
+        self._pid = None
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        self._bloqueo = threading.Lock()
+        self._aviso = threading.Event()
+        self._detenido = False
+        self._hilo = None
+        self._bufer = []
+        self.escritos = 0
+        self.lotes = 0
+        self.errores = 0
+        self.descartados = 0
+
+    def _iniciar(self):
+        """Arranca el hilo escritor en este proceso si aún no está en marcha."""
+        if self._pid == os.getpid():
+            return
+        with self._bloqueo_inicio:
+            if self._pid == os.getpid():
+                return
+            # Tras un fork: búfer y bloqueos propios (los del padre pudieron copiarse tomados)
+            self._reiniciar_estado()
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._escribir_periodicamente, name='auditoria-escritor', daemon=True)
+            self._hilo.start()
+
+    def registrar(self, eventos):
+        """
+        Añade eventos confirmados al búfer (o los escribe ya si no hay hilo).
+
+        Args:
+            eventos (list): Eventos con las columnas de `eventos_auditoria`
+        """
+        if not self.asincrona:
+            self._escribir(eventos)
+            return
+
+        self._iniciar()
+        with self._bloqueo:
+            self._bufer.extend(eventos)
+            exceso = len(self._bufer) - self.maximo_en_memoria
+            if exceso > 0:
+                del self._bufer[:exceso]
+                self.descartados += exceso
+            lleno = len(self._bufer) >= self.tamano_lote
+        if lleno:
+            self._aviso.set()
+
+    def _escribir_periodicamente(self):
+        while not self._detenido:
+            self._aviso.wait(self.intervalo)
+            self._aviso.clear()
+            self.vaciar()
+
+    def vaciar(self):
+        """
+        Escribe todos los eventos del búfer. Si la escritura falla, vuelven al búfer.
+        """
+        with self._bloqueo:
+            eventos, self._bufer = self._bufer, []
+        if eventos and not self._escribir(eventos):
+            with self._bloqueo:
+                self._bufer[:0] = eventos
+                exceso = len(self._bufer) - self.maximo_en_memoria
+                if exceso > 0:
+                    del self._bufer[:exceso]
+                    self.descartados += exceso
+
+    def _escribir(self, eventos):
+        """
+        Inserta los eventos con sentencias de varias filas en una transacción.
+
+        Returns:
+            bool: True si se escribieron
+        """
+        try:
+            with self.app.app_context():
+                with self.db.engine.begin() as conexion:
+                    lotes = range(0, len(eventos), self.tamano_lote)
+                    for inicio in lotes:
+                        conexion.execute(insert(_eventos).values(eventos[inicio:inicio + self.tamano_lote]))
+            self.lotes += len(lotes)
+            self.escritos += len(eventos)
+            return True
+        except Exception as e:
+            self.errores += 1
+            logger.warning('No se pudo escribir el registro de auditoría: %s', e,
+                           extra={'eventos': len(eventos)})
+            return False
+
+    def detener(self):
+        """Detiene el hilo escritor y escribe lo pendiente (se registra con atexit)."""
+        if self._pid != os.getpid():
+            return
+        self._detenido = True
+        self._aviso.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+        self.vaciar()
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Eventos en el búfer, escritos, lotes, errores y descartados de este proceso
+        """
+        with self._bloqueo:
+            en_memoria = len(self._bufer)
+        return {
+            'asincrona': self.asincrona,
+            'en_memoria': en_memoria,
+            'escritos': self.escritos,
+            'lotes': self.lotes,
+            'errores': self.errores,
+            'descartados': self.descartados,
+        }
+
+
+def detener():
+    """
+    Escribe los eventos pendientes de todas las aplicaciones del proceso
+    (para `worker_exit` de Gunicorn).
+    """
+    for escritor in list(_escritores):
+        escritor.detener()
+
+
+def init_app(app, db):
+    """
+    Crea el escritor de auditoría de la aplicación.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy ya inicializada con la aplicación
+    """
+    if not app.config.get('AUDITORIA_HABILITADA'):
+        return
+
+    escritor = EscritorAuditoria(app, db)
+    app.extensions['auditoria'] = escritor
+    _escritores.append(escritor)
+    atexit.register(escritor.detener)
@@ -0,0 +1,306 @@
+"""
+Módulo de bitácora (logging) de la aplicación.
+Las solicitudes solo encolan los registros: un hilo en segundo plano los
+formatea como JSON estructurado, redacta tokens y contraseñas y los escribe,
+de modo que el formateo y la E/S no forman parte de la latencia de la
+solicitud. Los mensajes informativos de las rutas calientes se muestrean y
+se limitan por segundo antes de encolarse.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import has_request_context, request
+
+# Claves cuyo valor nunca debe llegar a la bitácora
+CLAVES_SENSIBLES = {
+    'contrasena', 'contrasena_actual', 'nueva_contrasena', 'password',
+    'token', 'admin_token', 'refresh_token', 'authorization', 'cookie', 'set-cookie',
+}
+
+REDACTADO = '[REDACTADO]'
+
+# Tokens JWT, cabeceras Bearer y pares clave/valor sensibles dentro de mensajes de texto
+_PATRON_JWT = re.compile(r'eyJ[\w-]+\.[\w-]+\.[\w-]*')
+_PATRON_BEARER = re.compile(r'(Bearer\s+)\S+', re.IGNORECASE)
+_PATRON_CLAVE_VALOR = re.compile(
+    r"""(['"]?(?:%s)['"]?\s*[:=]\s*)(['"])(.*?)\2""" % '|'.join(re.escape(c) for c in CLAVES_SENSIBLES),
+    re.IGNORECASE
+)
+
+# Atributos estándar de LogRecord; el resto son campos estructurados pasados con `extra`
+_ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redactar_texto(texto):
+    """
+    Sustituye tokens y valores de campos sensibles dentro de un texto.
+
+    Args:
+        texto (str): Texto a redactar
+
+    Returns:
+        str: Texto sin tokens ni contraseñas
+    """
+    texto = _PATRON_JWT.sub(REDACTADO, texto)
+    texto = _PATRON_BEARER.sub(r'\1' + REDACTADO, texto)
+    return _PATRON_CLAVE_VALOR.sub(lambda m: f'{m.group(1)}{m.group(2)}{REDACTADO}{m.group(2)}', texto)
+
+
+def redactar_valor(valor):
+    """
+    Redacta recursivamente diccionarios, listas y textos.
+    """
+    if isinstance(valor, dict):
+        return {
+            clave: REDACTADO if str(clave).lower() in CLAVES_SENSIBLES else redactar_valor(v)
+            for clave, v in valor.items()
+        }
+    if isinstance(valor, (list, tuple)):
+        return [redactar_valor(v) for v in valor]
+    if isinstance(valor, str):
+        return redactar_texto(valor)
+    return valor
+
+
+class FormateadorJSON(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON con los campos estructurados
+    (los pasados con `extra`) ya redactados.
+    """
+
+    def format(self, registro):
+        datos = {
+            'ts': datetime.fromtimestamp(registro.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': registro.levelname,
+            'logger': registro.name,
+            'mensaje': redactar_texto(registro.getMessage()),
+        }
+        for clave, valor in vars(registro).items():
+            if clave not in _ATRIBUTOS_ESTANDAR and not clave.startswith('_'):
+                datos[clave] = REDACTADO if clave.lower() in CLAVES_SENSIBLES else redactar_valor(valor)
+        if registro.exc_info:
+            datos['excepcion'] = redactar_texto(self.formatException(registro.exc_info))
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FormateadorTexto(logging.Formatter):
+    """
+    Formato legible para desarrollo, con la misma redacción que el JSON.
+    """
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, registro):
+        return redactar_texto(super().format(registro))
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Muestrea y limita por segundo los registros por debajo de WARNING de cada logger.
+
+    La configuración de un logger se hereda de su ancestro más cercano
+    configurado (por ejemplo, 'app.blueprint' afecta a todos los blueprints).
+    Las advertencias y errores siempre pasan.
+    """
+
+    def __init__(self, tasas=None, limite_por_segundo=None):
+        """
+        Args:
+            tasas (dict, optional): Logger -> fracción de registros que se conservan (0.0 a 1.0)
+            limite_por_segundo (int, optional): Máximo de registros por segundo y logger
+        """
+        super().__init__()
+        self.tasas = dict(tasas or {})
+        self.limite_por_segundo = limite_por_segundo
+        self._tasas_resueltas = {}
+        # Logger -> [segundo actual, registros en ese segundo]
+        self._ventanas = {}
+        self._bloqueo = threading.Lock()
+        self.descartados = 0
+
+    def _tasa(self, nombre):
+        tasa = self._tasas_resueltas.get(nombre)
+        if tasa is None:
+            tasa = 1.0
+            partes = nombre.split('.')
+            for i in range(len(partes), 0, -1):
+                prefijo = '.'.join(partes[:i])
+                if prefijo in self.tasas:
+                    tasa = self.tasas[prefijo]
+                    break
+            self._tasas_resueltas[nombre] = tasa
+        return tasa
+
+    def filter(self, registro):
+        if registro.levelno >= logging.WARNING:
+            return True
+
+        tasa = self._tasa(registro.name)
+        if tasa < 1.0:
+            if random.random() >= tasa:
+                self.descartados += 1
+                return False
+            registro.muestreo = tasa
+
+        if self.limite_por_segundo:
+            segundo = int(time.monotonic())
+            with self._bloqueo:
+                ventana = self._ventanas.get(registro.name)
+                if ventana is None or ventana[0] != segundo:
+                    ventana = self._ventanas[registro.name] = [segundo, 0]
+                ventana[1] += 1
+                if ventana[1] > self.limite_por_segundo:
+                    self.descartados += 1
+                    return False
+        return True
+
+
+class ManejadorCola(QueueHandler):
+    """
+    Encola los registros sin formatearlos. Solo resuelve el mensaje (los
+    argumentos podrían mutar después) y añade el contexto de la solicitud;
+    el formateo JSON, la redacción y la escritura ocurren en el hilo escritor.
+    Si la cola está llena el registro se descarta en lugar de bloquear la solicitud.
+    """
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, registro):
+        registro = logging.makeLogRecord(vars(registro))
+        registro.msg = registro.getMessage()
+        registro.args = None
+        if has_request_context() and not hasattr(registro, 'ruta'):
+            registro.metodo = request.method
+            registro.ruta = request.path
+        return registro
+
+    def enqueue(self, registro):
+        try:
+            self.queue.put_nowait(registro)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _ManejadorContexto(logging.StreamHandler):
+    """
+    Manejador síncrono (sin cola) que añade el contexto de la solicitud, para
+    entornos donde un hilo en segundo plano no es fiable (serverless).
+    """
+
+    def emit(self, registro):
+        if has_request_context() and not hasattr(registro, 'ruta'):
+            registro.metodo = request.method
+            registro.ruta = request.path
+        super().emit(registro)
+
+
+# Estado del proceso: la bitácora se configura una sola vez aunque se creen varias aplicaciones
+_oyente = None
+_manejador = None
+_bloqueo_configuracion = threading.Lock()
+
+
+def detener():
+    """
+    Vacía la cola y detiene el hilo escritor (se registra con atexit).
+    """
+    global _oyente
+    if _oyente is not None:
+        _oyente.stop()
+        _oyente = None
+
+
+def reiniciar_tras_fork():
+    """
+    Arranca un hilo escritor nuevo en un proceso hijo creado con fork.
+
+    El hijo hereda la cola y el oyente del padre, pero no su hilo: sin esto los
+    registros se acumularían en la cola hasta descartarse. Se usa una cola nueva
+    porque la heredada pudo copiarse con su bloqueo tomado por el hilo del padre.
+    """
+    global _oyente
+    if _oyente is None or not isinstance(_manejador, ManejadorCola):
+        return
+    cola = queue.Queue(maxsize=_manejador.queue.maxsize)
+    _manejador.queue = cola
+    _manejador.descartados = 0
+    _oyente = QueueListener(cola, *_oyente.handlers, respect_handler_level=_oyente.respect_handler_level)
+    _oyente.start()
+
+
+def estadisticas():
+    """
+    Devuelve los contadores de registros descartados por muestreo o por cola llena.
+
+    Returns:
+        dict: Estado de la bitácora
+    """
+    if _manejador is None:
+        return {'configurada': False}
+    muestreo = next((f for f in _manejador.filters if isinstance(f, FiltroMuestreo)), None)
+    return {
+        'configurada': True,
+        'asincrona': _oyente is not None,
+        'en_cola': _manejador.queue.qsize() if isinstance(_manejador, ManejadorCola) else 0,
+        'descartados_cola': getattr(_manejador, 'descartados', 0),
+        'descartados_muestreo': muestreo.descartados if muestreo else 0,
+    }
+
+
+def init_app(app):
+    """
+    Configura la bitácora del proceso según la configuración de la aplicación.
+
+    Sustituye los manejadores del logger raíz por el manejador con cola (o por
+    uno síncrono si BITACORA_ASINCRONA es False) con muestreo y redacción.
+
+    Args:
+        app: Aplicación Flask
+    """
+    global _oyente, _manejador
+
+    if not app.config.get('BITACORA_HABILITADA', True):
+        return
+
+    with _bloqueo_configuracion:
+        if _manejador is not None:
+            return
+
+        formateador = FormateadorJSON() if app.config.get('BITACORA_FORMATO', 'json') == 'json' else FormateadorTexto()
+        salida = logging.StreamHandler(sys.stderr)
+        salida.setFormatter(formateador)
+
+        if app.config.get('BITACORA_ASINCRONA', True):
+            cola = queue.Queue(maxsize=app.config.get('BITACORA_TAMANO_COLA', 10000))
+            manejador = ManejadorCola(cola)
+            _oyente = QueueListener(cola, salida, respect_handler_level=True)
+            _oyente.start()
+            atexit.register(detener)
+        else:
+            manejador = _ManejadorContexto(sys.stderr)
+            manejador.setFormatter(formateador)
+
+        manejador.addFilter(FiltroMuestreo(
+            app.config.get('BITACORA_MUESTREO'),
+            app.config.get('BITACORA_LIMITE_POR_SEGUNDO')
+        ))
+
+        raiz = logging.getLogger()
+        for anterior in list(raiz.handlers):
+            raiz.removeHandler(anterior)
+        raiz.addHandler(manejador)
+        raiz.setLevel(app.config.get('BITACORA_NIVEL', 'INFO'))
+        _manejador = manejador
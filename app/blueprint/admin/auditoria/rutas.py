@@ -0,0 +1,87 @@
+"""
+Módulo de rutas del registro de auditoría para el panel de administración.
+Contiene la ruta para consultar, paginados, los eventos de auditoría.
+"""
+
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request
+from app.blueprint.utils import verificar_token_admin
+from app.modelos import EventoAuditoria
+from app.replicas import lectura_replica
+from app import db
+
+auditoria_bp = Blueprint('auditoria', __name__)
+
+# Eventos por página: por defecto y máximo
+LIMITE_AUDITORIA_DEFECTO = 50
+LIMITE_AUDITORIA_MAXIMO = 200
+
+@auditoria_bp.route('/api/auditoria', methods=['GET'])
+@lectura_replica
+def obtener_eventos_auditoria():
+    """
+    Ruta para listar los eventos de auditoría, del más reciente al más antiguo.
+
+    Paginación por clave: cada página devuelve `siguiente_cursor` (el id del último
+    evento), que se pasa como `cursor` para pedir la siguiente, sin OFFSET.
+
+    Args (query):
+        cursor (int): Devuelve los eventos con id menor que este
+        limite (int): Eventos por página (1-200, por defecto 50)
+        accion (str): Filtra por operación (crear_usuario, actualizar_usuario...)
+        administrador_id (int): Filtra por el administrador que operó
+        entidad (str), entidad_id (int): Filtra por el registro afectado
+        desde, hasta (str): Rango de fechas YYYY-MM-DD (ambas incluidas)
+
+    Returns:
+        JSON: Eventos de la página y cursor de la siguiente (null si no hay más)
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+
+    # Validar parámetros de consulta
+    limite = request.args.get('limite', LIMITE_AUDITORIA_DEFECTO, type=int)
+    if limite is None or not 1 <= limite <= LIMITE_AUDITORIA_MAXIMO:
+        return jsonify({'mensaje': f'El límite debe ser un número entre 1 y {LIMITE_AUDITORIA_MAXIMO}'}), 400
+
+    enteros = {}
+    for parametro in ('cursor', 'administrador_id', 'entidad_id'):
+        if request.args.get(parametro):
+            enteros[parametro] = request.args.get(parametro, type=int)
+            if enteros[parametro] is None:
+                return jsonify({'mensaje': f'El parámetro {parametro} debe ser un número entero'}), 400
+
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d') if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d') if request.args.get('hasta') else None
+    except ValueError:
+        return jsonify({'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD'}), 400
+
+    consulta = db.select(EventoAuditoria)
+    if 'cursor' in enteros:
+        consulta = consulta.where(EventoAuditoria.id < enteros['cursor'])
+    if request.args.get('accion'):
+        consulta = consulta.where(EventoAuditoria.accion == request.args['accion'])
+    if 'administrador_id' in enteros:
+        consulta = consulta.where(EventoAuditoria.administrador_id == enteros['administrador_id'])
+    if request.args.get('entidad'):
+        consulta = consulta.where(EventoAuditoria.entidad == request.args['entidad'])
+    if 'entidad_id' in enteros:
+        consulta = consulta.where(EventoAuditoria.entidad_id == enteros['entidad_id'])
+    if desde:
+        consulta = consulta.where(EventoAuditoria.creado_en >= desde)
+    if hasta:
+        consulta = consulta.where(EventoAuditoria.creado_en < hasta + timedelta(days=1))
+
+    # Se pide un evento de más para saber si hay otra página
+    eventos = db.session.scalars(consulta.order_by(EventoAuditoria.id.desc()).limit(limite + 1)).all()
+    hay_mas = len(eventos) > limite
+    eventos = eventos[:limite]
+
+    return jsonify({
+        'eventos': [evento.to_dict() for evento in eventos],
+        'siguiente_cursor': eventos[-1].id if hay_mas else None
+    }), 200
@@ -4,15 +4,16 @@ Contiene las rutas para el inicio de sesión de administradores.
 """
 
 from flask import Blueprint, request, jsonify, render_template
-from app import db
+from app import auditoria, db
 from app.modelos import Administrador
 from werkzeug.security import check_password_hash, generate_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app.blueprint.utils import manejar_error_db, verificar_token_admin, validar_identificacion, validar_nombre, validar_contrasena
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.blueprint.utils import manejar_error_db, verificar_token_admin, emitir_tokens, refrescar_tokens, rol_requerido
+from app.blueprint.esquemas import EsquemaPerfilAdministrador
+from app.replicas import lectura_replica
 import logging
 
-# Configurar el logger
-logging.basicConfig(level=logging.INFO)
+# La bitácora se configura en crear_app (app/bitacora.py)
 logger = logging.getLogger(__name__)
 
 # Crear el blueprint para las rutas de autenticación administrativa
@@ -24,16 +25,11 @@ def login():
     Ruta para iniciar sesión de un administrador existente.
     
     Returns:
-        JSON: Token JWT y datos del administrador si las credenciales son correctas
+        JSON: Token de acceso, token de refresco y datos del administrador si las credenciales son correctas
     """
     try:
-        # Registrar la solicitud entrante
-        logger.info(f"Solicitud de inicio de sesión entrante desde {request.remote_addr}")
-        logger.info(f"Encabezados de la solicitud: {dict(request.headers)}")
-        
         # Obtener datos JSON de la solicitud
         datos = request.get_json()
-        logger.info(f"Datos de la solicitud: {datos}")
         
         if not datos:
             logger.warning("No se recibieron datos JSON en la solicitud de inicio de sesión")
@@ -52,31 +48,53 @@ def login():
         
         # Verificar si el administrador existe
         if not administrador:
-            logger.warning(f"Administrador no encontrado para la identificación: {datos.get('identificacion')}")
+            logger.warning('Administrador no encontrado en el inicio de sesión', extra={'ip': request.remote_addr})
             return jsonify({'mensaje': 'Credenciales incorrectas'}), 401
         
         # Verificar credenciales
         if not check_password_hash(administrador.contrasena, datos.get('contrasena')):
-            logger.warning(f"Contraseña incorrecta para el administrador ID: {administrador.id}")
+            logger.warning('Contraseña incorrecta', extra={'admin_id': administrador.id, 'ip': request.remote_addr})
             return jsonify({'mensaje': 'Credenciales incorrectas'}), 401
         
-        # Crear token de acceso JWT
-        token = create_access_token(identity=str(administrador.id))
-        logger.info(f"Inicio de sesión exitoso para el administrador ID: {administrador.id}")
+        # Crear token de acceso y token de refresco JWT
+        tokens = emitir_tokens(administrador, 'admin')
+        logger.info('Inicio de sesión de administrador', extra={'admin_id': administrador.id, 'ip': request.remote_addr})
         
-        # Devolver token y datos del administrador
+        # Devolver tokens y datos del administrador
         return jsonify({
             'mensaje': 'Inicio de sesión exitoso. Bienvenido al panel de administración.',
-            'token': token,
+            **tokens,
             'administrador': administrador.to_dict()
         }), 200
         
     except Exception as e:
-        logger.error(f"Error durante el proceso de inicio de sesión: {str(e)}", exc_info=True)
+        logger.error('Error durante el proceso de inicio de sesión: %s', e, exc_info=True)
         return jsonify({'mensaje': 'Error interno del servidor. Por favor intente nuevamente más tarde.'}), 500
+
+@admin_auth_bp.route('/api/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refrescar():
+    """
+    Ruta para renovar la sesión de un administrador con su token de refresco.
+    Emite un token de acceso y un token de refresco nuevos sin comprobar la contraseña.
+    
+    Returns:
+        JSON: Tokens nuevos, o 401 si la sesión ya no puede renovarse
+    """
+    try:
+        administrador, tokens = refrescar_tokens(Administrador, 'admin')
+        if not administrador:
+            logger.warning('Renovación de sesión rechazada', extra={'ip': request.remote_addr})
+            return jsonify({'mensaje': 'La sesión ha expirado. Inicie sesión nuevamente.'}), 401
+        return jsonify({'mensaje': 'Sesión renovada', **tokens}), 200
+        
+    except Exception as e:
+        logger.error('Error al renovar la sesión del administrador: %s', e, exc_info=True)
+        return manejar_error_db('Error interno del servidor. Por favor intente nuevamente más tarde.')
         
 @admin_auth_bp.route('/api/perfil', methods=['GET'])
-@jwt_required()
+@rol_requerido('admin')
+@lectura_replica
 def perfil_admin():
     """
     Ruta para obtener el perfil de un administrador autenticado.
@@ -97,11 +115,11 @@ def perfil_admin():
         return jsonify({'administrador': administrador.to_dict()}), 200
         
     except Exception as e:
-        logger.error(f"Error al obtener el perfil del administrador: {str(e)}", exc_info=True)
+        logger.error('Error al obtener el perfil del administrador: %s', e, exc_info=True)
         return manejar_error_db('Error al procesar la solicitud de perfil.')
 
 @admin_auth_bp.route('/api/perfil', methods=['PUT'])
-@jwt_required()
+@rol_requerido('admin')
 def actualizar_perfil():
     """
     Ruta para actualizar el perfil de un administrador autenticado.
@@ -126,41 +144,14 @@ def actualizar_perfil():
             return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
         
         # Validar campos
-        nombre = datos.get('nombre')
-        apellido = datos.get('apellido')
-        identificacion = datos.get('identificacion')
-        contrasena = datos.get('contrasena')
-        
-        errores = {}
+        perfil, errores = EsquemaPerfilAdministrador.cargar(datos)
         
-        # Validar identificación
-        if not identificacion:
-            errores['identificacion'] = 'La identificación es obligatoria'
-        elif not validar_identificacion(identificacion):
-            errores['identificacion'] = 'La identificación debe tener al menos 8 dígitos numéricos'
-        elif identificacion != administrador.identificacion:
-            # Verificar que la identificación sea única (excepto para el mismo administrador)
-            admin_existente = Administrador.query.filter_by(identificacion=identificacion).first()
+        # Verificar que la identificación sea única (excepto para el mismo administrador)
+        if perfil and perfil.identificacion != administrador.identificacion:
+            admin_existente = Administrador.query.filter_by(identificacion=perfil.identificacion).first()
             if admin_existente:
                 errores['identificacion'] = 'La identificación ya está en uso por otro administrador.'
         
-        # Validar nombre
-        if not nombre:
-            errores['nombre'] = 'El nombre es obligatorio'
-        elif not validar_nombre(nombre):
-            errores['nombre'] = 'El nombre debe tener al menos 2 caracteres'
-        
-        # Validar apellido
-        if not apellido:
-            errores['apellido'] = 'El apellido es obligatorio'
-        elif not validar_nombre(apellido):
-            errores['apellido'] = 'El apellido debe tener al menos 2 caracteres'
-        
-        # Validar contraseña si se proporciona
-        if contrasena is not None and contrasena != '':
-            if not validar_contrasena(contrasena):
-                errores['contrasena'] = 'La contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'
-        
         # Si hay errores, devolverlos
         if errores:
             return jsonify({
@@ -168,22 +159,27 @@ def actualizar_perfil():
                 'errores': errores
             }), 400
         
-        # Actualizar datos del administrador
-        if identificacion:
-            administrador.identificacion = identificacion
-        if nombre:
-            administrador.nombre = nombre
-        if apellido:
-            administrador.apellido = apellido
+        # Actualizar datos del administrador (anotando en la auditoría lo que cambia)
+        modificados = {}
+        for campo in ('identificacion', 'nombre', 'apellido'):
+            valor = getattr(perfil, campo)
+            if valor != getattr(administrador, campo):
+                modificados[campo] = {'antes': getattr(administrador, campo), 'despues': valor}
+                setattr(administrador, campo, valor)
         
         # Actualizar contraseña si se proporciona
-        if contrasena:
-            administrador.contrasena = generate_password_hash(contrasena)
+        if perfil.contrasena:
+            administrador.contrasena = generate_password_hash(perfil.contrasena)
+            modificados['contrasena'] = True
+        
+        if modificados:
+            auditoria.anotar('actualizar_perfil', admin_id, modificados,
+                             entidad='administrador', administrador_id=admin_id)
         
         # Guardar cambios en la base de datos
         db.session.commit()
         
-        logger.info(f"Perfil actualizado para el administrador ID: {admin_id}")
+        logger.info('Perfil de administrador actualizado', extra={'admin_id': admin_id})
         
         return jsonify({
             'mensaje': 'Perfil actualizado exitosamente.',
@@ -192,7 +188,7 @@ def actualizar_perfil():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error al actualizar el perfil del administrador: {str(e)}", exc_info=True)
+        logger.error('Error al actualizar el perfil del administrador: %s', e, exc_info=True)
         return manejar_error_db('Error al actualizar el perfil.')
 
 @admin_auth_bp.route('/api/verificar', methods=['GET'])
@@ -216,5 +212,5 @@ def verificar_autenticacion():
         return jsonify({'autenticado': False}), 401
         
     except Exception as e:
-        logger.error(f"Error durante la verificación de autenticación: {str(e)}", exc_info=True)
+        logger.error('Error durante la verificación de autenticación: %s', e, exc_info=True)
         return jsonify({'mensaje': 'Error interno del servidor. Por favor intente nuevamente más tarde.'}), 500
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Módulo de rutas de sistema para el panel de administración.
+Contiene las rutas de diagnóstico del funcionamiento interno de la aplicación.
+"""
+
+from flask import Blueprint, Response, jsonify, current_app
+from app.blueprint.utils import verificar_token_admin
+from app.pool import obtener_estadisticas
+from app import bitacora, db, perfilador, recordatorios
+
+sistema_bp = Blueprint('sistema', __name__)
+
+@sistema_bp.route('/api/sistema/pool', methods=['GET'])
+def estadisticas_pool():
+    """
+    Ruta para obtener las estadísticas en vivo del pool de conexiones de este proceso.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    return jsonify({
+        'perfil': current_app.config.get('POOL_PERFIL'),
+        'motores': obtener_estadisticas(current_app)
+    }), 200
+
+@sistema_bp.route('/api/sistema/pool/reiniciar', methods=['POST'])
+def reiniciar_estadisticas_pool():
+    """
+    Ruta para poner a cero las estadísticas del pool de conexiones de este proceso.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    for estadisticas in current_app.extensions['estadisticas_pool'].values():
+        estadisticas.reiniciar()
+    
+    return jsonify({'mensaje': 'Estadísticas del pool reiniciadas'}), 200
+
+@sistema_bp.route('/api/sistema/bitacora', methods=['GET'])
+def estadisticas_bitacora():
+    """
+    Ruta para obtener el estado de la bitácora de este proceso (registros en cola y descartados).
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    return jsonify(bitacora.estadisticas()), 200
+
+@sistema_bp.route('/api/sistema/recordatorios', methods=['GET'])
+def estadisticas_recordatorios():
+    """
+    Ruta para obtener el estado de la bandeja de recordatorios (por estado, pendiente
+    más antiguo y última fecha límite escaneada por el programador).
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    return jsonify(recordatorios.estadisticas(db.session)), 200
+
+@sistema_bp.route('/api/sistema/auditoria', methods=['GET'])
+def estadisticas_auditoria():
+    """
+    Ruta para obtener el estado del escritor de auditoría de este proceso (eventos en
+    memoria, escritos, lotes, errores y descartados).
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    escritor = current_app.extensions.get('auditoria')
+    if escritor is None:
+        return jsonify({'mensaje': 'El registro de auditoría está deshabilitado'}), 404
+    
+    return jsonify(escritor.estadisticas()), 200
+
+@sistema_bp.route('/api/sistema/perfiles/firma', methods=['POST'])
+def firmar_perfilado():
+    """
+    Ruta para obtener la firma que activa el perfilador en una solicitud.
+    Se envía en la cabecera `X-Perfilar` (o en el parámetro `_perfilar`) de las
+    solicitudes a perfilar mientras no caduque.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    if 'perfiles' not in current_app.extensions:
+        return jsonify({'mensaje': 'El perfilador está deshabilitado'}), 404
+    
+    return jsonify({
+        'firma': perfilador.firmar(current_app, administrador.id),
+        'cabecera': perfilador.CABECERA,
+        'valida_segundos': current_app.config['PERFILADOR_VALIDEZ_SEGUNDOS']
+    }), 200
+
+@sistema_bp.route('/api/sistema/perfiles', methods=['GET'])
+def obtener_perfiles():
+    """
+    Ruta para listar los perfiles guardados en este proceso, del más reciente al más antiguo.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    perfiles = current_app.extensions.get('perfiles')
+    if perfiles is None:
+        return jsonify({'mensaje': 'El perfilador está deshabilitado'}), 404
+    
+    return jsonify({'perfiles': perfiles.resumen()}), 200
+
+@sistema_bp.route('/api/sistema/perfiles/<perfil_id>', methods=['GET'])
+def obtener_perfil(perfil_id):
+    """
+    Ruta para obtener un perfil: funciones con más tiempo acumulado, línea temporal
+    de las sentencias SQL y líneas que más memoria asignaron.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    perfiles = current_app.extensions.get('perfiles')
+    perfil = perfiles.obtener(perfil_id) if perfiles is not None else None
+    if perfil is None:
+        return jsonify({'mensaje': 'Perfil no encontrado'}), 404
+    
+    return jsonify({clave: valor for clave, valor in perfil.items() if clave != 'pstats'}), 200
+
+@sistema_bp.route('/api/sistema/perfiles/<perfil_id>/pstats', methods=['GET'])
+def descargar_perfil(perfil_id):
+    """
+    Ruta para descargar las estadísticas de cProfile de un perfil en formato pstats
+    (`python -m pstats perfil.prof`, snakeviz).
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    perfiles = current_app.extensions.get('perfiles')
+    perfil = perfiles.obtener(perfil_id) if perfiles is not None else None
+    if perfil is None:
+        return jsonify({'mensaje': 'Perfil no encontrado'}), 404
+    
+    return Response(
+        perfil['pstats'],
+        mimetype='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename=perfil-{perfil_id}.prof'}
+    )
@@ -0,0 +1,129 @@
+"""
+Módulo de rutas de trabajos en segundo plano para el panel de administración.
+Contiene las rutas para solicitar, consultar y cancelar trabajos largos.
+"""
+
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from sqlalchemy import update
+from app.blueprint.utils import verificar_token_admin
+from app.formatos import obtener_datos_solicitud
+from app.modelos import Trabajo
+from app.trabajos import ESTADOS_ACTIVOS, TIPOS_TRABAJO, encolar_trabajo, validar_parametros
+from app import db
+
+trabajos_bp = Blueprint('trabajos', __name__)
+
+# Número máximo de trabajos devueltos por el listado
+LIMITE_LISTADO_TRABAJOS = 50
+
+@trabajos_bp.route('/api/trabajos', methods=['POST'])
+def crear_trabajo():
+    """
+    Ruta para solicitar un trabajo en segundo plano.
+    Cuerpo: {"tipo": "archivar-tareas", "parametros": {"dias": 365}}.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+
+    datos = obtener_datos_solicitud()
+    if not isinstance(datos, dict):
+        return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
+
+    tipo = datos.get('tipo')
+    if tipo not in TIPOS_TRABAJO:
+        return jsonify({
+            'mensaje': f"Tipo de trabajo no válido. Use uno de: {', '.join(TIPOS_TRABAJO)}"
+        }), 400
+
+    parametros = datos.get('parametros') or {}
+    errores = validar_parametros(tipo, parametros) if isinstance(parametros, dict) else {'parametros': 'Debe ser un objeto'}
+    if errores:
+        return jsonify({'mensaje': 'Error en la validación de datos', 'errores': errores}), 400
+
+    trabajo = encolar_trabajo(db.session, tipo, parametros, administrador.id)
+    if trabajo is None:
+        return jsonify({'mensaje': 'Hay demasiados trabajos en cola. Intente de nuevo más tarde.'}), 429
+
+    return jsonify({'mensaje': 'Trabajo en cola', 'trabajo': trabajo.to_dict()}), 202
+
+@trabajos_bp.route('/api/trabajos', methods=['GET'])
+def obtener_trabajos():
+    """
+    Ruta para listar los trabajos más recientes, opcionalmente filtrados por `estado` y `tipo`.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+
+    consulta = Trabajo.query
+    if request.args.get('estado'):
+        consulta = consulta.filter(Trabajo.estado == request.args['estado'])
+    if request.args.get('tipo'):
+        consulta = consulta.filter(Trabajo.tipo == request.args['tipo'])
+
+    trabajos = consulta.order_by(Trabajo.id.desc()).limit(LIMITE_LISTADO_TRABAJOS).all()
+    return jsonify({'trabajos': [trabajo.to_dict() for trabajo in trabajos]}), 200
+
+@trabajos_bp.route('/api/trabajos/<int:trabajo_id>', methods=['GET'])
+def obtener_trabajo(trabajo_id):
+    """
+    Ruta para consultar el estado y el avance de un trabajo.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+
+    trabajo = db.session.get(Trabajo, trabajo_id)
+    if not trabajo:
+        return jsonify({'mensaje': 'Trabajo no encontrado'}), 404
+
+    return jsonify({'trabajo': trabajo.to_dict()}), 200
+
+@trabajos_bp.route('/api/trabajos/<int:trabajo_id>/cancelar', methods=['POST'])
+def cancelar_trabajo(trabajo_id):
+    """
+    Ruta para cancelar un trabajo. Un trabajo pendiente se cancela de inmediato;
+    uno en curso se detiene en su siguiente punto de control.
+    """
+    # Verificar si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+
+    trabajo = db.session.get(Trabajo, trabajo_id)
+    if not trabajo:
+        return jsonify({'mensaje': 'Trabajo no encontrado'}), 404
+
+    if trabajo.estado not in ESTADOS_ACTIVOS:
+        return jsonify({'mensaje': 'El trabajo ya había finalizado', 'trabajo': trabajo.to_dict()}), 409
+
+    # Sentencias condicionales: el trabajo puede cambiar de estado en otro proceso
+    db.session.execute(
+        update(Trabajo)
+        .where(Trabajo.id == trabajo_id, Trabajo.estado == 'pendiente')
+        .values(estado='cancelado', cancelacion_solicitada=True, finalizado_en=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Trabajo)
+        .where(Trabajo.id == trabajo_id, Trabajo.estado == 'en_curso')
+        .values(cancelacion_solicitada=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    db.session.refresh(trabajo)
+
+    if not trabajo.cancelacion_solicitada:
+        # Terminó en otro proceso antes de que se pidiera la cancelación
+        return jsonify({'mensaje': 'El trabajo ya había finalizado', 'trabajo': trabajo.to_dict()}), 409
+
+    return jsonify({'mensaje': 'Cancelación solicitada', 'trabajo': trabajo.to_dict()}), 200
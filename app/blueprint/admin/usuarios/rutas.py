@@ -4,22 +4,36 @@ Contiene las rutas para gestionar los usuarios del sistema.
 """
 
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify, make_response
-from app.blueprint.utils import verificar_token_admin, validar_identificacion, validar_nombre, validar_contrasena
+from app.blueprint.utils import (
+    verificar_token_admin,
+    validar_campos_solicitados, respuesta_campos_invalidos, fila_a_dict
+)
+from app.replicas import lectura_replica
+from app.formatos import obtener_datos_solicitud
+from app.blueprint.esquemas import EsquemaCrearUsuario, EsquemaActualizarUsuario
 from app.modelos import Usuario, Administrador
-from app import db
+from app import auditoria, db
 from datetime import datetime, timedelta
 import csv
 import io
+import logging
 from sqlalchemy import and_, or_, func, extract
 from werkzeug.security import generate_password_hash
 
+logger = logging.getLogger(__name__)
+
 usuarios_bp = Blueprint('usuarios', __name__)
 
+# Número máximo de operaciones aceptadas en una solicitud de lote
+LIMITE_OPERACIONES_LOTE = 100
+
 # Rutas API para el CRUD de usuarios
 @usuarios_bp.route('/api/usuarios', methods=['GET'])
+@lectura_replica
 def obtener_usuarios():
     """
     Ruta para obtener todos los usuarios del sistema con filtros y ordenamiento.
+    El parámetro `fields` (separado por comas) limita las columnas consultadas y devueltas.
     """
     # Verificar si el administrador tiene un token válido
     administrador, token = verificar_token_admin()
@@ -27,6 +41,11 @@ def obtener_usuarios():
     if not administrador:
         return jsonify({'mensaje': 'No autorizado'}), 401
     
+    # Validar la proyección de campos solicitada
+    es_valido, campos = validar_campos_solicitados(request.args.get('fields'), Usuario)
+    if not es_valido:
+        return respuesta_campos_invalidos(campos, Usuario)
+    
     try:
         # Obtener parámetros de filtrado
         page = request.args.get('page', 1, type=int)
@@ -67,7 +86,7 @@ def obtener_usuarios():
                     
             except ValueError as e:
                 # Registrar el error para fines de depuración
-                print(f"Error al analizar los filtros de fecha: {e}")
+                logger.debug('Error al analizar los filtros de fecha: %s', e)
                 # Continuar sin filtros de fecha si el análisis falla
                 pass
         
@@ -78,12 +97,23 @@ def obtener_usuarios():
                 query = query.order_by(sort_field.desc())
             else:
                 query = query.order_by(sort_field.asc())
+            # Desempate estable para que la paginación no repita ni omita usuarios
+            # al ordenar por columnas con valores repetidos (p. ej. total_tareas)
+            if sort != 'id':
+                query = query.order_by(Usuario.id.asc())
+        
+        # Seleccionar solo las columnas solicitadas
+        if campos:
+            query = query.with_entities(*(getattr(Usuario, campo) for campo in campos))
         
         # Paginar resultados
         usuarios = query.paginate(page=page, per_page=per_page, error_out=False)
         
         # Convertir a diccionarios
-        usuarios_data = [usuario.to_dict() for usuario in usuarios.items]
+        if campos:
+            usuarios_data = [fila_a_dict(fila) for fila in usuarios.items]
+        else:
+            usuarios_data = [usuario.to_dict() for usuario in usuarios.items]
         
         return jsonify({
             'usuarios': usuarios_data,
@@ -96,7 +126,138 @@ def obtener_usuarios():
         return jsonify({'mensaje': 'Error al obtener los usuarios'}), 500
 
 
+# Operaciones sobre un usuario compartidas por las rutas individuales y por el lote.
+# Devuelven (cuerpo, código) sin confirmar la transacción: quien las llama decide
+# si confirma, deshace o agrupa varias en la misma transacción.
+
+SIN_DATOS = 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'
+
+def _obtener_usuario(usuario_id):
+    usuario = db.session.get(Usuario, usuario_id)
+    
+    if not usuario:
+        return {'mensaje': 'Usuario no encontrado'}, 404
+    
+    return {'usuario': usuario.to_dict()}, 200
+
+def _crear_usuario(datos):
+    # Validar datos requeridos
+    if not datos:
+        return {'mensaje': SIN_DATOS}, 400
+    
+    # Validar campos requeridos
+    usuario_datos, errores = EsquemaCrearUsuario.cargar(datos)
+    
+    # Verificar que la identificación no esté registrada
+    if usuario_datos and Usuario.query.filter_by(identificacion=usuario_datos.identificacion).first():
+        errores['identificacion'] = 'Ya existe un usuario con esa identificación.'
+    
+    # Si hay errores, devolverlos
+    if errores:
+        logger.debug('Errores de validación al crear usuario', extra={'errores': errores})
+        return {
+            'mensaje': 'Por favor corrija los errores en el formulario',
+            'errores': errores
+        }, 400
+    
+    # Crear nuevo usuario
+    nuevo_usuario = Usuario(
+        identificacion=usuario_datos.identificacion,
+        nombre=usuario_datos.nombre,
+        apellido=usuario_datos.apellido,
+        contrasena=generate_password_hash(usuario_datos.contrasena)
+    )
+    
+    db.session.add(nuevo_usuario)
+    # Asignar el id (y detectar conflictos) antes de serializar
+    db.session.flush()
+    auditoria.anotar('crear_usuario', nuevo_usuario.id, {
+        'identificacion': nuevo_usuario.identificacion,
+        'nombre': nuevo_usuario.nombre,
+        'apellido': nuevo_usuario.apellido,
+    })
+    
+    return {
+        'mensaje': 'Usuario creado exitosamente',
+        'usuario': nuevo_usuario.to_dict()
+    }, 201
+
+def _actualizar_usuario(usuario_id, datos):
+    usuario = db.session.get(Usuario, usuario_id)
+    
+    if not usuario:
+        return {'mensaje': 'Usuario no encontrado'}, 404
+    
+    if not datos:
+        return {'mensaje': SIN_DATOS}, 400
+    
+    # Validar campos si se proporcionan
+    cambios, errores = EsquemaActualizarUsuario.cargar(datos)
+    
+    # Verificar si ya existe otro usuario con la misma identificación
+    if cambios and cambios.identificacion is not None:
+        otro_usuario = Usuario.query.filter_by(identificacion=cambios.identificacion).first()
+        if otro_usuario and otro_usuario.id != usuario_id:
+            errores['identificacion'] = 'Ya existe otro usuario con esa identificación'
+    
+    # Si hay errores, devolverlos
+    if errores:
+        return {
+            'mensaje': 'Error en la validación de datos',
+            'errores': errores
+        }, 400
+    
+    # Actualizar campos si se proporcionan (el registro de auditoría guarda el valor
+    # anterior y el nuevo de cada uno, y de la contraseña solo que cambió)
+    modificados = {}
+    for campo in ('identificacion', 'nombre', 'apellido'):
+        valor = getattr(cambios, campo)
+        if valor is not None and valor != getattr(usuario, campo):
+            modificados[campo] = {'antes': getattr(usuario, campo), 'despues': valor}
+            setattr(usuario, campo, valor)
+    
+    if cambios.contrasena is not None:
+        usuario.contrasena = generate_password_hash(cambios.contrasena)
+        modificados['contrasena'] = True
+    
+    db.session.flush()
+    if modificados:
+        auditoria.anotar('actualizar_usuario', usuario.id, modificados)
+    
+    return {
+        'mensaje': 'Usuario actualizado exitosamente',
+        'usuario': usuario.to_dict()
+    }, 200
+
+def _eliminar_usuario(usuario_id):
+    usuario = db.session.get(Usuario, usuario_id)
+    
+    if not usuario:
+        return {'mensaje': 'Usuario no encontrado'}, 404
+    
+    datos_auditoria = {
+        'identificacion': usuario.identificacion,
+        'nombre': usuario.nombre,
+        'apellido': usuario.apellido,
+    }
+    db.session.delete(usuario)
+    db.session.flush()
+    auditoria.anotar('eliminar_usuario', usuario_id, datos_auditoria)
+    
+    return {'mensaje': 'Usuario eliminado exitosamente'}, 200
+
+def _confirmar(cuerpo, codigo):
+    """
+    Confirma la transacción si la operación tuvo éxito (o la deshace si no) y genera la respuesta.
+    """
+    if codigo < 400:
+        db.session.commit()
+    else:
+        db.session.rollback()
+    return jsonify(cuerpo), codigo
+
 @usuarios_bp.route('/api/usuarios/<int:usuario_id>', methods=['GET'])
+@lectura_replica
 def obtener_usuario(usuario_id):
     """
     Ruta para obtener un usuario específico.
@@ -108,12 +269,8 @@ def obtener_usuario(usuario_id):
         return jsonify({'mensaje': 'No autorizado'}), 401
     
     try:
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return jsonify({'mensaje': 'Usuario no encontrado'}), 404
-        
-        return jsonify({'usuario': usuario.to_dict()}), 200
+        cuerpo, codigo = _obtener_usuario(usuario_id)
+        return jsonify(cuerpo), codigo
         
     except Exception as e:
         return jsonify({'mensaje': 'Error al obtener el usuario'}), 500
@@ -130,74 +287,11 @@ def crear_usuario():
         return jsonify({'mensaje': 'No autorizado'}), 401
     
     try:
-        datos = request.get_json()
-        print(f"Received data for user creation: {datos}")  # Debugging line
-        
-        # Validar datos requeridos
-        if not datos:
-            return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
-        
-        # Validar campos requeridos
-        identificacion = datos.get('identificacion')
-        nombre = datos.get('nombre')
-        apellido = datos.get('apellido')
-        contrasena = datos.get('contrasena')
-        
-        errores = {}
-        
-        # Validar identificación
-        if not identificacion:
-            errores['identificacion'] = 'La identificación es obligatoria'
-        elif not validar_identificacion(identificacion):
-            errores['identificacion'] = 'La identificación debe tener al menos 8 dígitos numéricos'
-        elif Usuario.query.filter_by(identificacion=identificacion).first():
-            errores['identificacion'] = 'Ya existe un usuario con esa identificación.'
-        
-        # Validar nombre
-        if not nombre:
-            errores['nombre'] = 'El nombre es obligatorio'
-        elif not validar_nombre(nombre):
-            errores['nombre'] = 'El nombre debe tener al menos 2 caracteres'
-        
-        # Validar apellido
-        if not apellido:
-            errores['apellido'] = 'El apellido es obligatorio'
-        elif not validar_nombre(apellido):
-            errores['apellido'] = 'El apellido debe tener al menos 2 caracteres'
-        
-        # Validar contraseña
-        if not contrasena:
-            errores['contrasena'] = 'La contraseña es obligatoria'
-        elif not validar_contrasena(contrasena):
-            errores['contrasena'] = 'La contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'
-        
-        # Si hay errores, devolverlos
-        if errores:
-            print(f"Validation errors: {errores}")  # Debugging line
-            return jsonify({
-                'mensaje': 'Por favor corrija los errores en el formulario',
-                'errores': errores
-            }), 400
-        
-        # Crear nuevo usuario
-        nuevo_usuario = Usuario(
-            identificacion=identificacion,
-            nombre=nombre,
-            apellido=apellido,
-            contrasena=generate_password_hash(contrasena)
-        )
-        
-        db.session.add(nuevo_usuario)
-        db.session.commit()
-        
-        return jsonify({
-            'mensaje': 'Usuario creado exitosamente',
-            'usuario': nuevo_usuario.to_dict()
-        }), 201
+        return _confirmar(*_crear_usuario(obtener_datos_solicitud()))
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating user: {str(e)}")  # Debugging line
+        logger.error('Error al crear el usuario: %s', e, exc_info=True)
         return jsonify({'mensaje': 'Error al crear el usuario'}), 500
 
 @usuarios_bp.route('/api/usuarios/<int:usuario_id>', methods=['PUT'])
@@ -212,83 +306,7 @@ def actualizar_usuario(usuario_id):
         return jsonify({'mensaje': 'No autorizado'}), 401
     
     try:
-        usuario = Usuario.query.get(usuario_id)
-        
-        if not usuario:
-            return jsonify({'mensaje': 'Usuario no encontrado'}), 404
-        
-        datos = request.get_json()
-        
-        if not datos:
-            return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
-        
-        # Validar campos si se proporcionan
-        identificacion = datos.get('identificacion')
-        nombre = datos.get('nombre')
-        apellido = datos.get('apellido')
-        contrasena = datos.get('contrasena')
-        
-        errores = {}
-        
-        # Validar identificación si se proporciona
-        if identificacion is not None:
-            if not identificacion:
-                errores['identificacion'] = 'La identificación no puede estar vacía'
-            elif not validar_identificacion(identificacion):
-                errores['identificacion'] = 'La identificación debe tener al menos 8 dígitos numéricos'
-            else:
-                # Verificar si ya existe otro usuario con la misma identificación
-                otro_usuario = Usuario.query.filter_by(identificacion=identificacion).first()
-                if otro_usuario and otro_usuario.id != usuario_id:
-                    errores['identificacion'] = 'Ya existe otro usuario con esa identificación'
-        
-        # Validar nombre si se proporciona
-        if nombre is not None:
-            if not nombre:
-                errores['nombre'] = 'El nombre no puede estar vacío'
-            elif not validar_nombre(nombre):
-                errores['nombre'] = 'El nombre debe tener al menos 2 caracteres'
-        
-        # Validar apellido si se proporciona
-        if apellido is not None:
-            if not apellido:
-                errores['apellido'] = 'El apellido no puede estar vacío'
-            elif not validar_nombre(apellido):
-                errores['apellido'] = 'El apellido debe tener al menos 2 caracteres'
-        
-        # Validar contraseña si se proporciona
-        if contrasena is not None:
-            if not contrasena:
-                errores['contrasena'] = 'La contraseña no puede estar vacía'
-            elif not validar_contrasena(contrasena):
-                errores['contrasena'] = 'La contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'
-        
-        # Si hay errores, devolverlos
-        if errores:
-            return jsonify({
-                'mensaje': 'Error en la validación de datos',
-                'errores': errores
-            }), 400
-        
-        # Actualizar campos si se proporcionan
-        if identificacion is not None:
-            usuario.identificacion = identificacion
-        
-        if nombre is not None:
-            usuario.nombre = nombre
-        
-        if apellido is not None:
-            usuario.apellido = apellido
-        
-        if contrasena is not None:
-            usuario.contrasena = generate_password_hash(contrasena)
-        
-        db.session.commit()
-        
-        return jsonify({
-            'mensaje': 'Usuario actualizado exitosamente',
-            'usuario': usuario.to_dict()
-        }), 200
+        return _confirmar(*_actualizar_usuario(usuario_id, obtener_datos_solicitud()))
         
     except Exception as e:
         db.session.rollback()
@@ -306,16 +324,124 @@ def eliminar_usuario(usuario_id):
         return jsonify({'mensaje': 'No autorizado'}), 401
     
     try:
-        usuario = Usuario.query.get(usuario_id)
+        return _confirmar(*_eliminar_usuario(usuario_id))
         
-        if not usuario:
-            return jsonify({'mensaje': 'Usuario no encontrado'}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'mensaje': 'Error al eliminar el usuario'}), 500
+
+# Operaciones del lote: (función, requiere id, requiere datos)
+OPERACIONES_LOTE = {
+    'obtener': (lambda operacion: _obtener_usuario(operacion['id']), True, False),
+    'crear': (lambda operacion: _crear_usuario(operacion['datos']), False, True),
+    'actualizar': (lambda operacion: _actualizar_usuario(operacion['id'], operacion['datos']), True, True),
+    'eliminar': (lambda operacion: _eliminar_usuario(operacion['id']), True, False),
+}
+
+def _validar_operacion_lote(operacion):
+    """
+    Valida la estructura de una operación del lote (no sus datos, que valida cada esquema).
+    
+    Returns:
+        str: Mensaje de error o None si la operación es válida
+    """
+    if not isinstance(operacion, dict):
+        return 'Cada operación debe ser un objeto'
+    
+    definicion = OPERACIONES_LOTE.get(operacion.get('op'))
+    if not definicion:
+        return f"Operación no soportada. Use una de: {', '.join(OPERACIONES_LOTE)}"
+    
+    _, requiere_id, requiere_datos = definicion
+    id_usuario = operacion.get('id')
+    if requiere_id and (not isinstance(id_usuario, int) or isinstance(id_usuario, bool)):
+        return 'La operación requiere un "id" de usuario entero'
+    if requiere_datos and not isinstance(operacion.get('datos'), dict):
+        return 'La operación requiere un objeto "datos"'
+    
+    return None
+
+@usuarios_bp.route('/api/usuarios/lote', methods=['POST'])
+def lote_usuarios():
+    """
+    Ruta para ejecutar una lista ordenada de operaciones sobre usuarios en una sola solicitud.
+    
+    Cuerpo: {"operaciones": [{"op": "obtener|crear|actualizar|eliminar", "id": 1, "datos": {...}}],
+    "atomico": true}. Con `atomico` (por defecto) todas las operaciones comparten una transacción
+    y el primer fallo deshace el lote completo; sin él, cada operación se ejecuta en su propio
+    punto de guardado y un fallo solo deshace esa operación.
+    """
+    # Verificar una sola vez si el administrador tiene un token válido
+    administrador, token = verificar_token_admin()
+    
+    if not administrador:
+        return jsonify({'mensaje': 'No autorizado'}), 401
+    
+    datos = obtener_datos_solicitud()
+    operaciones = datos.get('operaciones') if isinstance(datos, dict) else None
+    
+    if not isinstance(operaciones, list) or not operaciones:
+        return jsonify({'mensaje': 'Debe enviar una lista "operaciones" con al menos una operación'}), 400
+    
+    if len(operaciones) > LIMITE_OPERACIONES_LOTE:
+        return jsonify({
+            'mensaje': f'El lote admite como máximo {LIMITE_OPERACIONES_LOTE} operaciones'
+        }), 400
+    
+    # Validar la estructura de todas las operaciones antes de ejecutar ninguna
+    errores = {}
+    for indice, operacion in enumerate(operaciones):
+        error = _validar_operacion_lote(operacion)
+        if error:
+            errores[indice] = error
+    
+    if errores:
+        return jsonify({
+            'mensaje': 'Por favor corrija las operaciones del lote',
+            'errores': errores
+        }), 400
+    
+    atomico = datos.get('atomico', True) is not False
+    resultados = []
+    
+    try:
+        for indice, operacion in enumerate(operaciones):
+            ejecutar = OPERACIONES_LOTE[operacion['op']][0]
+            
+            if atomico:
+                cuerpo, codigo = ejecutar(operacion)
+            else:
+                punto_guardado = db.session.begin_nested()
+                try:
+                    cuerpo, codigo = ejecutar(operacion)
+                except Exception as e:
+                    logger.error('Error en la operación %s del lote: %s', indice, e, exc_info=True)
+                    cuerpo, codigo = {'mensaje': 'Error al ejecutar la operación'}, 500
+                
+                if codigo < 400:
+                    punto_guardado.commit()
+                else:
+                    punto_guardado.rollback()
+            
+            resultados.append({'indice': indice, 'op': operacion['op'], 'codigo': codigo, 'cuerpo': cuerpo})
+            
+            if atomico and codigo >= 400:
+                db.session.rollback()
+                return jsonify({
+                    'mensaje': f'La operación {indice} falló; no se aplicó ningún cambio',
+                    'aplicado': False,
+                    'resultados': resultados
+                }), codigo if codigo < 500 else 500
         
-        db.session.delete(usuario)
         db.session.commit()
         
-        return jsonify({'mensaje': 'Usuario eliminado exitosamente'}), 200
+        return jsonify({
+            'mensaje': 'Lote ejecutado',
+            'aplicado': True,
+            'resultados': resultados
+        }), 200
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'mensaje': 'Error al eliminar el usuario'}), 500
\ No newline at end of file
+        logger.error('Error al ejecutar el lote de usuarios: %s', e, exc_info=True)
+        return jsonify({'mensaje': 'Error al ejecutar el lote de usuarios', 'aplicado': False}), 500
@@ -16,17 +16,16 @@ def dashboard():
     """
     Ruta que sirve el dashboard del panel de administración.
     """
-    logger.info("Accessing admin dashboard route")
     # Verificar si el administrador tiene un token válido usando la función utilitaria
     administrador, token = verificar_token_admin()
     
     if administrador:
-        logger.info(f"Administrator authenticated: {administrador.nombre}")
+        logger.debug('Acceso al dashboard administrativo', extra={'admin_id': administrador.id})
         # Pasar la información del administrador a la plantilla
         return render_template('admin/components/dashboard.html', administrador=administrador)
     
     # Si no hay token válido, redirigir al login
-    logger.warning("No valid admin token found, redirecting to login")
+    logger.info('Acceso al dashboard sin token válido, redirigiendo al login')
     return redirect(url_for('vistas_admin.login'))
 
 @vistas_admin_bp.route('/login')
@@ -7,50 +7,33 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.modelos import Usuario
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app.blueprint.utils import validar_identificacion, validar_nombre, validar_contrasena, manejar_error_db
-import re
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.blueprint.utils import manejar_error_db, emitir_tokens, refrescar_tokens, rol_requerido
+from app.blueprint.esquemas import EsquemaRegistro, EsquemaPerfil
+from app.replicas import lectura_replica
+from app.retencion import sentencia_actividad
 from datetime import datetime
+import logging
+
+# La bitácora se configura en crear_app (app/bitacora.py)
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__)
 
-def validar_registro(datos):
+def _registrar_actividad(usuario_id):
     """
-    Valida los datos de registro de un nuevo usuario.
+    Registra la actividad del usuario (purga de cuentas inactivas, app/retencion.py).
+    Si falla solo se registra en la bitácora: no debe impedir el inicio de sesión.
     
     Args:
-        datos (dict): Diccionario con los datos de registro
-        
-    Returns:
-        list: Lista de errores de validación (vacía si no hay errores)
+        usuario_id (int): ID del usuario que inicia o renueva la sesión
     """
-    errores = {}
-    
-    # Validar identificación (8 dígitos mínimo, solo números)
-    if not datos.get('identificacion'):
-        errores['identificacion'] = "La identificación es obligatoria"
-    elif not validar_identificacion(datos['identificacion']):
-        errores['identificacion'] = "La identificación debe tener al menos 8 dígitos y contener solo números"
-    
-    # Validar nombre
-    if not datos.get('nombre'):
-        errores['nombre'] = "El nombre es obligatorio"
-    elif not validar_nombre(datos['nombre']):
-        errores['nombre'] = "El nombre debe tener al menos 2 caracteres"
-        
-    # Validar apellido
-    if not datos.get('apellido'):
-        errores['apellido'] = "El apellido es obligatorio"
-    elif not validar_nombre(datos['apellido']):
-        errores['apellido'] = "El apellido debe tener al menos 2 caracteres"
-        
-    # Validar contraseña
-    if not datos.get('contrasena'):
-        errores['contrasena'] = "La contraseña es obligatoria"
-    elif not validar_contrasena(datos.get('contrasena')):
-        errores['contrasena'] = "La contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números"
-        
-    return errores
+    try:
+        db.session.execute(sentencia_actividad(usuario_id))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning('No se pudo registrar la actividad del usuario: %s', e, extra={'usuario_id': usuario_id})
 
 @auth_bp.route('/registro', methods=['POST'])
 def registro():
@@ -66,7 +49,7 @@ def registro():
         return jsonify({'mensaje': 'No se recibieron datos'}), 400
 
     # Validar datos de registro
-    errores = validar_registro(datos)
+    registro_datos, errores = EsquemaRegistro.cargar(datos)
     if errores:
         return jsonify({
             'mensaje': 'Error en la validación de datos',
@@ -74,17 +57,17 @@ def registro():
         }), 400
     
     # Verificar si el usuario ya existe
-    if Usuario.query.filter_by(identificacion=datos['identificacion']).first():
+    if Usuario.query.filter_by(identificacion=registro_datos.identificacion).first():
         return jsonify({'mensaje': 'El usuario ya existe'}), 400
     
     # Hashear la contraseña antes de guardarla
-    hashed_pw = generate_password_hash(datos['contrasena'])
+    hashed_pw = generate_password_hash(registro_datos.contrasena)
     
     # Crear nuevo usuario
     nuevo_usuario = Usuario(
-        identificacion=datos['identificacion'],
-        nombre=datos['nombre'],
-        apellido=datos['apellido'],
+        identificacion=registro_datos.identificacion,
+        nombre=registro_datos.nombre,
+        apellido=registro_datos.apellido,
         contrasena=hashed_pw
     )
     
@@ -102,7 +85,7 @@ def login():
     Ruta para iniciar sesión de un usuario existente.
     
     Returns:
-        JSON: Token JWT y datos del usuario si las credenciales son correctas
+        JSON: Token de acceso, token de refresco y datos del usuario si las credenciales son correctas
     """
     # Obtener datos JSON de la solicitud
     datos = request.get_json()
@@ -133,18 +116,41 @@ def login():
         # Mensaje unificado para mantener la seguridad y experiencia de usuario profesional
         return jsonify({'mensaje': 'Usuario o contraseña incorrectos'}), 401
     
-    # Crear token de acceso JWT
-    token = create_access_token(identity=str(usuario.id))
+    # Crear token de acceso y token de refresco JWT
+    tokens = emitir_tokens(usuario, 'usuario')
+    datos_usuario = usuario.to_dict()
+    
+    # Registrar la actividad del usuario (purga de cuentas inactivas)
+    _registrar_actividad(usuario.id)
     
-    # Devolver token y datos del usuario
+    # Devolver tokens y datos del usuario
     return jsonify({
         'mensaje': 'Inicio de sesión exitoso',
-        'token': token,
-        'usuario': usuario.to_dict()
+        **tokens,
+        'usuario': datos_usuario
     }), 200
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refrescar():
+    """
+    Ruta para renovar la sesión con el token de refresco (en la cabecera Authorization).
+    Emite un token de acceso y un token de refresco nuevos sin comprobar la contraseña.
+    
+    Returns:
+        JSON: Tokens nuevos, o 401 si la sesión ya no puede renovarse
+    """
+    usuario, tokens = refrescar_tokens(Usuario, 'usuario')
+    if not usuario:
+        return jsonify({'mensaje': 'La sesión ha expirado. Inicie sesión nuevamente.'}), 401
+    
+    # Renovar la sesión también cuenta como actividad
+    _registrar_actividad(usuario.id)
+    return jsonify({'mensaje': 'Sesión renovada', **tokens}), 200
+
 @auth_bp.route('/perfil', methods=['GET', 'PUT'])
-@jwt_required()
+@rol_requerido('usuario')
+@lectura_replica
 def actualizar_perfil():
     """
     Ruta para obtener o actualizar el perfil de un usuario autenticado.
@@ -167,49 +173,53 @@ def actualizar_perfil():
             return jsonify({'usuario': usuario.to_dict()}), 200
             
         # Si es una solicitud PUT, actualizar el perfil
-        # Obtener datos JSON de la solicitud
+        # Obtener datos JSON de la solicitud y validarlos con el esquema del perfil
         datos = request.get_json()
+        cambio_contrasena = isinstance(datos, dict) and 'contrasena_actual' in datos and 'nueva_contrasena' in datos
+        if isinstance(datos, dict) and not cambio_contrasena:
+            # Los campos de contraseña solo se validan (y aplican) cuando llegan los dos
+            datos = {clave: valor for clave, valor in datos.items() if clave not in ('contrasena_actual', 'nueva_contrasena')}
+        perfil, errores = EsquemaPerfil.cargar(datos)
+        
+        # Se informa el primer error en el orden de los campos del perfil
+        for campo in ('nombre', 'apellido', 'identificacion'):
+            if campo in errores:
+                return jsonify({'mensaje': errores[campo]}), 400
+        if 'datos' in errores:
+            return jsonify({'mensaje': errores['datos']}), 400
+        
+        # Verificar la contraseña actual y validar la nueva antes de aplicar cambios (con la
+        # nueva inválida no hay objeto cargado: la actual, ya validada, se toma de los datos)
+        if cambio_contrasena:
+            if 'contrasena_actual' in errores or not check_password_hash(usuario.contrasena, datos['contrasena_actual'] or ''):
+                return jsonify({'mensaje': 'La contraseña actual es incorrecta'}), 400
+            if 'nueva_contrasena' in errores:
+                return jsonify({'mensaje': errores['nueva_contrasena']}), 400
         
         # Actualizar nombre si se proporciona
-        if 'nombre' in datos:
-            if not validar_nombre(datos['nombre']):
-                return jsonify({'mensaje': 'El nombre debe tener al menos 2 caracteres'}), 400
-            usuario.nombre = datos['nombre']
+        if 'nombre' in perfil.presentes:
+            usuario.nombre = perfil.nombre
             
         # Actualizar apellido si se proporciona
-        if 'apellido' in datos:
-            if not validar_nombre(datos['apellido']):
-                return jsonify({'mensaje': 'El apellido debe tener al menos 2 caracteres'}), 400
-            usuario.apellido = datos['apellido']
+        if 'apellido' in perfil.presentes:
+            usuario.apellido = perfil.apellido
             
         # Actualizar identificación si se proporciona
-        if 'identificacion' in datos:
-            if not validar_identificacion(datos['identificacion']):
-                return jsonify({'mensaje': 'La identificación debe tener al menos 8 dígitos y contener solo números'}), 400
-                
+        if 'identificacion' in perfil.presentes:
             # Verificar que no esté en uso por otro usuario
             usuario_existente = Usuario.query.filter(
-                Usuario.identificacion == datos['identificacion'],
+                Usuario.identificacion == perfil.identificacion,
                 Usuario.id != usuario_id
             ).first()
             
             if usuario_existente:
                 return jsonify({'mensaje': 'La identificación ya está en uso'}), 400
                 
-            usuario.identificacion = datos['identificacion']
+            usuario.identificacion = perfil.identificacion
             
         # Actualizar contraseña si se proporciona
-        if 'contrasena_actual' in datos and 'nueva_contrasena' in datos:
-            # Verificar que la contraseña actual sea correcta
-            if not check_password_hash(usuario.contrasena, datos['contrasena_actual']):
-                return jsonify({'mensaje': 'La contraseña actual es incorrecta'}), 400
-                
-            # Validar nueva contraseña
-            if not validar_contrasena(datos['nueva_contrasena']):
-                return jsonify({'mensaje': 'La nueva contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'}), 400
-                
-            # Actualizar contraseña
-            usuario.contrasena = generate_password_hash(datos['nueva_contrasena'])
+        if cambio_contrasena:
+            usuario.contrasena = generate_password_hash(perfil.nueva_contrasena)
             
         # Actualizar la fecha de modificación
         usuario.actualizado_en = datetime.utcnow()
@@ -0,0 +1,187 @@
+"""
+Módulo de consultas de tareas.
+Construye las sentencias SELECT del listado de tareas a partir de los parámetros
+de consulta, de modo que la API síncrona (Flask) y la asíncrona (ASGI) apliquen
+exactamente los mismos filtros y ordenamientos.
+"""
+
+from datetime import datetime
+from sqlalchemy import select, or_, func, case, literal, union_all
+from sqlalchemy.orm import aliased
+from app.modelos import Tarea, TareaArchivada
+
+# Campos y direcciones de ordenamiento permitidos
+CAMPOS_ORDENAMIENTO = ['titulo', 'fecha_limite', 'creado_en']
+DIRECCIONES_ORDENAMIENTO = ['asc', 'desc']
+
+# Grupos de la agenda por fecha límite, en orden de urgencia
+GRUPOS_AGENDA = ['vencidas', 'hoy', 'esta_semana', 'despues']
+
+def solicita_archivadas(parametros):
+    """
+    Indica si los parámetros de consulta piden incluir las tareas archivadas.
+
+    Args:
+        parametros (Mapping): Parámetros de consulta
+
+    Returns:
+        bool: True si `incluir_archivadas` es 1, true, si o sí
+    """
+    return (parametros.get('incluir_archivadas') or '').strip().lower() in ('1', 'true', 'si', 'sí')
+
+def _condiciones(modelo, usuario_id, parametros):
+    """
+    Construye las condiciones WHERE del listado para un nivel de almacenamiento
+    (Tarea o TareaArchivada), que comparten columnas.
+    """
+    # Obtener parámetros de consulta
+    search_query = (parametros.get('search') or '').strip()
+    date_from = (parametros.get('date_from') or '').strip()
+    date_to = (parametros.get('date_to') or '').strip()
+
+    condiciones = [modelo.usuario_id == usuario_id]
+
+    # Aplicar filtro de búsqueda si se proporciona
+    if search_query:
+        search_filter = f"%{search_query}%"
+        condiciones.append(
+            or_(
+                modelo.titulo.ilike(search_filter),
+                modelo.descripcion.ilike(search_filter)
+            )
+        )
+
+    # Aplicar filtro de rango de fechas si se proporcionan
+    if date_from:
+        try:
+            from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
+            condiciones.append(modelo.fecha_limite >= from_date)
+        except ValueError:
+            pass  # Ignorar fechas inválidas
+
+    if date_to:
+        try:
+            to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
+            condiciones.append(modelo.fecha_limite <= to_date)
+        except ValueError:
+            pass  # Ignorar fechas inválidas
+
+    return condiciones
+
+def _expresion_orden(columnas, parametros):
+    """
+    Construye la expresión ORDER BY del listado sobre un conjunto de columnas
+    (las del modelo Tarea o las de la subconsulta que une ambos niveles).
+    """
+    sort_by = parametros.get('sort_by') or 'creado_en'  # Por defecto ordenar por fecha de creación
+    order = parametros.get('order') or 'desc'  # Por defecto orden descendente
+
+    # Validar y aplicar ordenamiento
+    if sort_by not in CAMPOS_ORDENAMIENTO:
+        sort_by = 'creado_en'  # Valor por defecto si el campo no es válido
+
+    if order not in DIRECCIONES_ORDENAMIENTO:
+        order = 'desc'  # Valor por defecto si la dirección no es válida
+
+    if sort_by == 'titulo':
+        # Para títulos, ordenar por el primer carácter para una organización más profesional
+        sort_expression = func.upper(func.substr(columnas.titulo, 1, 1))
+    else:
+        # Para otros campos, usar el campo completo
+        sort_expression = getattr(columnas, sort_by)
+
+    if order == 'asc':
+        return sort_expression.asc()
+    return sort_expression.desc()
+
+def construir_consulta_tareas(usuario_id, parametros, campos=None, incluir_archivadas=False):
+    """
+    Construye la consulta del listado de tareas de un usuario.
+
+    Args:
+        usuario_id (int): ID del usuario autenticado
+        parametros (Mapping): Parámetros de consulta (search, date_from, date_to, sort_by, order)
+        campos (list, optional): Columnas a seleccionar; si se indican, la consulta
+            devuelve filas con solo esas columnas en lugar de objetos Tarea
+        incluir_archivadas (bool, optional): Si es True se combinan (UNION ALL) las
+            tareas activas y las archivadas; la consulta devuelve filas con las
+            columnas pedidas (o todas las públicas) y la columna `archivada`
+
+    Returns:
+        Select: Sentencia SELECT de tareas filtradas y ordenadas
+    """
+    if incluir_archivadas:
+        nombres = campos or list(Tarea.CAMPOS_PUBLICOS)
+        activas = select(
+            *(getattr(Tarea, campo) for campo in nombres), literal(False).label('archivada')
+        ).where(*_condiciones(Tarea, usuario_id, parametros))
+        archivadas = select(
+            *(getattr(TareaArchivada, campo) for campo in nombres), literal(True).label('archivada')
+        ).where(*_condiciones(TareaArchivada, usuario_id, parametros))
+        ambas = union_all(activas, archivadas).subquery()
+        return select(ambas).order_by(_expresion_orden(ambas.c, parametros))
+
+    # Construir la consulta base con los filtros y el ordenamiento solicitados
+    consulta = (
+        select(Tarea)
+        .where(*_condiciones(Tarea, usuario_id, parametros))
+        .order_by(_expresion_orden(Tarea, parametros))
+    )
+
+    # Proyección: solo se leen y transfieren las columnas solicitadas
+    if campos:
+        consulta = consulta.with_only_columns(*(getattr(Tarea, campo) for campo in campos))
+
+    return consulta
+
+def consulta_conteo_por_fecha(usuario_id):
+    """
+    Construye la consulta agrupada que cuenta las tareas de un usuario por fecha límite.
+    Se resuelve con el índice (usuario_id, fecha_limite) sin leer las filas de la tabla.
+
+    Args:
+        usuario_id (int): ID del usuario autenticado
+
+    Returns:
+        Select: Filas (fecha_limite, total); fecha_limite es None para las tareas sin fecha
+    """
+    return (
+        select(Tarea.fecha_limite, func.count().label('total'))
+        .where(Tarea.usuario_id == usuario_id)
+        .group_by(Tarea.fecha_limite)
+    )
+
+def consulta_primeras_por_grupo(usuario_id, hoy, fin_semana, limite):
+    """
+    Construye la consulta de las primeras tareas de cada grupo de la agenda.
+
+    Args:
+        usuario_id (int): ID del usuario autenticado
+        hoy (date): Fecha de referencia del usuario
+        fin_semana (date): Último día (domingo) de la semana actual
+        limite (int): Número máximo de tareas por grupo
+
+    Returns:
+        Select: Filas (Tarea, grupo) ordenadas por grupo y fecha límite
+    """
+    grupo = case(
+        (Tarea.fecha_limite < hoy, 'vencidas'),
+        (Tarea.fecha_limite == hoy, 'hoy'),
+        (Tarea.fecha_limite <= fin_semana, 'esta_semana'),
+        else_='despues'
+    )
+    numeradas = (
+        select(
+            Tarea,
+            grupo.label('grupo'),
+            func.row_number().over(partition_by=grupo, order_by=(Tarea.fecha_limite, Tarea.id)).label('posicion')
+        )
+        .where(Tarea.usuario_id == usuario_id, Tarea.fecha_limite.isnot(None))
+        .subquery()
+    )
+    tarea = aliased(Tarea, numeradas)
+    return (
+        select(tarea, numeradas.c.grupo)
+        .where(numeradas.c.posicion <= limite)
+        .order_by(numeradas.c.fecha_limite, numeradas.c.id)
+    )
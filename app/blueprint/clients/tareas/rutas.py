@@ -3,17 +3,46 @@ Módulo de rutas de tareas.
 Contiene las rutas para crear, leer, actualizar y eliminar tareas de los usuarios.
 """
 
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import time
+from datetime import date, datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app import db
 from app.modelos import Tarea
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-from app.blueprint.utils import validar_fecha_futura, verificar_tarea_duplicada, manejar_error_db
+from flask_jwt_extended import get_jwt_identity
+from app.blueprint.utils import (
+    validar_fecha_futura, verificar_tarea_duplicada, manejar_error_db,
+    validar_campos_solicitados, respuesta_campos_invalidos, fila_a_dict, rol_requerido
+)
+from app.replicas import lectura_replica
+from app.retencion import sentencia_actividad
+from app.formatos import obtener_datos_solicitud
+from app.blueprint.esquemas import EsquemaCrearTarea, EsquemaActualizarTarea
+from app.blueprint.clients.tareas.consultas import (
+    construir_consulta_tareas, consulta_conteo_por_fecha, consulta_primeras_por_grupo, GRUPOS_AGENDA,
+    solicita_archivadas
+)
+from app.blueprint.clients.tareas.sugerencias import (
+    obtener_sugerencias, normalizar_titulos_comando, LIMITE_SUGERENCIAS_DEFECTO, LIMITE_SUGERENCIAS_MAXIMO
+)
+
+# Columnas de la exportación CSV y filas leídas por lote al generarla
+COLUMNAS_EXPORTACION = ['id', 'titulo', 'descripcion', 'fecha_limite', 'creado_en', 'actualizado_en']
+FILAS_POR_LOTE_EXPORTACION = 500
+
+# Tareas por grupo de la agenda: por defecto y máximo permitido
+LIMITE_AGENDA_DEFECTO = 5
+LIMITE_AGENDA_MAXIMO = 50
 
 tareas_bp = Blueprint('tareas', __name__)
 
+# `flask tareas normalizar-titulos`: rellena el índice de sugerencias en bases existentes
+tareas_bp.cli.add_command(normalizar_titulos_comando)
+
 @tareas_bp.route('/', methods=['GET'])
-@jwt_required()
+@rol_requerido('usuario')
+@lectura_replica
 def obtener_tareas():
     """
     Obtiene todas las tareas del usuario autenticado.
@@ -25,84 +54,194 @@ def obtener_tareas():
         date_to (str): Fecha final en formato YYYY-MM-DD
         sort_by (str): Campo por el cual ordenar (titulo, fecha_limite, creado_en)
         order (str): Dirección del ordenamiento (asc, desc)
+        fields (str): Campos a devolver separados por comas (por defecto todos; 'id' siempre se incluye)
+        incluir_archivadas (str): 1/true para incluir también el archivo frío (cada tarea
+            lleva entonces el campo `archivada`)
     
     Returns:
         JSON: Lista de tareas del usuario filtradas y ordenadas
     """
+    # Validar la proyección de campos solicitada
+    es_valido, campos = validar_campos_solicitados(request.args.get('fields'), Tarea)
+    if not es_valido:
+        return respuesta_campos_invalidos(campos, Tarea)
+
     try:
         # Obtener ID del usuario desde el token JWT
         usuario_id = int(get_jwt_identity())
         
-        # Obtener parámetros de consulta
-        search_query = request.args.get('search', '').strip()
-        date_from = request.args.get('date_from', '').strip()
-        date_to = request.args.get('date_to', '').strip()
-        sort_by = request.args.get('sort_by', 'creado_en')  # Por defecto ordenar por fecha de creación
-        order = request.args.get('order', 'desc')  # Por defecto orden descendente
-        
-        # Construir la consulta base
-        query = Tarea.query.filter_by(usuario_id=usuario_id)
-        
-        # Aplicar filtro de búsqueda si se proporciona
-        if search_query:
-            search_filter = f"%{search_query}%"
-            query = query.filter(
-                db.or_(
-                    Tarea.titulo.ilike(search_filter),
-                    Tarea.descripcion.ilike(search_filter)
-                )
-            )
-        
-        # Aplicar filtro de rango de fechas si se proporcionan
-        if date_from:
-            try:
-                from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-                query = query.filter(Tarea.fecha_limite >= from_date)
-            except ValueError:
-                pass  # Ignorar fechas inválidas
-        
-        if date_to:
-            try:
-                to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-                query = query.filter(Tarea.fecha_limite <= to_date)
-            except ValueError:
-                pass  # Ignorar fechas inválidas
-        
-        # Validar y aplicar ordenamiento
-        valid_sort_fields = ['titulo', 'fecha_limite', 'creado_en']
-        valid_order_directions = ['asc', 'desc']
-        
-        if sort_by not in valid_sort_fields:
-            sort_by = 'creado_en'  # Valor por defecto si el campo no es válido
-            
-        if order not in valid_order_directions:
-            order = 'desc' # Valor por defecto si la dirección no es válida
-            
-        # Aplicar ordenamiento
-        if sort_by == 'titulo':
-            # Para títulos, ordenar por el primer carácter para una organización más profesional
-            sort_expression = db.func.upper(db.func.substr(Tarea.titulo, 1, 1))
-        else:
-            # Para otros campos, usar el campo completo
-            sort_expression = getattr(Tarea, sort_by)
-            
-        if order == 'asc':
-            sort_expression = sort_expression.asc()
-        else:  # order == 'desc'
-            sort_expression = sort_expression.desc()
-            
-        query = query.order_by(sort_expression)
-        
-        # Ejecutar consulta
-        tareas = query.all()
+        # Construir y ejecutar la consulta con los filtros y el ordenamiento solicitados
+        incluir_archivadas = solicita_archivadas(request.args)
+        consulta = construir_consulta_tareas(usuario_id, request.args, campos, incluir_archivadas)
+        if campos or incluir_archivadas:
+            return jsonify([fila_a_dict(fila) for fila in db.session.execute(consulta)]), 200
+        tareas = db.session.execute(consulta).scalars().all()
         
         # Convertir tareas a formato JSON
         return jsonify([t.to_dict() for t in tareas]), 200
     except Exception as e:
         return jsonify({'mensaje': 'Error al obtener tareas', 'error': str(e)}), 500
 
+@tareas_bp.route('/sugerencias', methods=['GET'])
+@rol_requerido('usuario')
+@lectura_replica
+def sugerir_titulos():
+    """
+    Sugiere títulos de tareas del usuario autenticado que empiezan por el texto
+    escrito (sin distinguir mayúsculas ni tildes), para el autocompletado del buscador.
+    Requiere un token JWT válido.
+
+    Query Parameters:
+        q (str): Texto escrito por el usuario
+        limite (int): Número máximo de sugerencias (1-20, por defecto 8)
+
+    Returns:
+        JSON: Lista de títulos sugeridos. La cabecera Server-Timing indica el
+        tiempo de resolución y su origen (cache, db o vacio)
+    """
+    inicio = time.perf_counter()
+    usuario_id = int(get_jwt_identity())
+
+    limite = request.args.get('limite', LIMITE_SUGERENCIAS_DEFECTO, type=int)
+    if limite is None or not 1 <= limite <= LIMITE_SUGERENCIAS_MAXIMO:
+        return jsonify({'mensaje': f'El límite debe ser un número entre 1 y {LIMITE_SUGERENCIAS_MAXIMO}'}), 400
+    texto = request.args.get('q', '')[:100]
+
+    try:
+        titulos, origen = obtener_sugerencias(db.session, usuario_id, texto, limite)
+    except Exception as e:
+        return jsonify({'mensaje': 'Error al obtener sugerencias', 'error': str(e)}), 500
+
+    respuesta = jsonify({'sugerencias': titulos})
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    respuesta.headers['Server-Timing'] = f'sugerencias;dur={duracion_ms:.3f};desc="{origen}"'
+    return respuesta, 200
+
+@tareas_bp.route('/exportar', methods=['GET'])
+@rol_requerido('usuario')
+def exportar_tareas():
+    """
+    Exporta en CSV las tareas del usuario autenticado con los mismos filtros y
+    ordenamiento que el listado. El archivo se genera en streaming, leyendo las
+    filas por lotes, para no cargar todas las tareas en memoria.
+    Requiere un token JWT válido.
+
+    Se lee siempre del primario: la consulta se ejecuta mientras se envía la
+    respuesta, fuera de @lectura_replica, que además no podría repetir una
+    respuesta ya empezada si la réplica fallara.
+
+    Query Parameters:
+        search, date_from, date_to, sort_by, order: Igual que en el listado
+        incluir_archivadas (str): 1/true para incluir también el archivo frío
+            (añade la columna `archivada`)
+
+    Returns:
+        CSV: Archivo tareas.csv
+    """
+    usuario_id = int(get_jwt_identity())
+    incluir_archivadas = solicita_archivadas(request.args)
+    columnas = COLUMNAS_EXPORTACION + (['archivada'] if incluir_archivadas else [])
+    consulta = construir_consulta_tareas(
+        usuario_id, request.args, COLUMNAS_EXPORTACION, incluir_archivadas
+    ).execution_options(yield_per=FILAS_POR_LOTE_EXPORTACION)
+
+    def generar():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(columnas)
+        for particion in db.session.execute(consulta).partitions():
+            for fila in particion:
+                valores = fila._mapping
+                escritor.writerow([
+                    valores[columna].isoformat() if isinstance(valores[columna], (date, datetime))
+                    else valores[columna]
+                    for columna in columnas
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generar()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=tareas.csv'}
+    )
+
+@tareas_bp.route('/agenda', methods=['GET'])
+@rol_requerido('usuario')
+@lectura_replica
+def obtener_agenda():
+    """
+    Obtiene el resumen de la agenda del usuario autenticado por fecha límite:
+    conteos de tareas vencidas, de hoy, de esta semana y posteriores, conteos
+    por día del mes solicitado y las primeras tareas de cada grupo.
+    Requiere un token JWT válido.
+
+    Query Parameters:
+        hoy (str): Fecha local del usuario en formato YYYY-MM-DD (por defecto la del servidor)
+        mes (str): Mes de los conteos por día en formato YYYY-MM (por defecto el de `hoy`)
+        limite (int): Tareas por grupo (0-50, por defecto 5)
+
+    Returns:
+        JSON: Conteos por grupo, conteos por día del mes y primeras tareas de cada grupo
+    """
+    usuario_id = int(get_jwt_identity())
+
+    # Validar parámetros de consulta
+    try:
+        hoy = datetime.strptime(request.args['hoy'], '%Y-%m-%d').date() if request.args.get('hoy') else date.today()
+    except ValueError:
+        return jsonify({'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD'}), 400
+    try:
+        inicio_mes = datetime.strptime(request.args['mes'], '%Y-%m').date() if request.args.get('mes') else hoy.replace(day=1)
+    except ValueError:
+        return jsonify({'mensaje': 'Formato de mes inválido. Use YYYY-MM'}), 400
+    limite = request.args.get('limite', LIMITE_AGENDA_DEFECTO, type=int)
+    if limite is None or not 0 <= limite <= LIMITE_AGENDA_MAXIMO:
+        return jsonify({'mensaje': f'El límite debe ser un número entre 0 y {LIMITE_AGENDA_MAXIMO}'}), 400
+
+    fin_semana = hoy + timedelta(days=6 - hoy.weekday())
+    fin_mes = (inicio_mes + timedelta(days=31)).replace(day=1)
+
+    try:
+        # Una sola consulta agrupada por fecha límite alimenta los conteos por grupo y por día
+        conteos = dict.fromkeys(GRUPOS_AGENDA + ['sin_fecha'], 0)
+        por_dia = {}
+        for fecha_limite, total in db.session.execute(consulta_conteo_por_fecha(usuario_id)):
+            if fecha_limite is None:
+                conteos['sin_fecha'] += total
+                continue
+            if fecha_limite < hoy:
+                conteos['vencidas'] += total
+            elif fecha_limite == hoy:
+                conteos['hoy'] += total
+            elif fecha_limite <= fin_semana:
+                conteos['esta_semana'] += total
+            else:
+                conteos['despues'] += total
+            if inicio_mes <= fecha_limite < fin_mes:
+                por_dia[fecha_limite.isoformat()] = total
+
+        # Primeras tareas de cada grupo (solo si hay alguna con fecha límite)
+        tareas = {grupo: [] for grupo in GRUPOS_AGENDA}
+        if limite and any(conteos[grupo] for grupo in GRUPOS_AGENDA):
+            consulta = consulta_primeras_por_grupo(usuario_id, hoy, fin_semana, limite)
+            for tarea, grupo in db.session.execute(consulta):
+                tareas[grupo].append(tarea.to_dict())
+
+        return jsonify({
+            'hoy': hoy,
+            'mes': inicio_mes.strftime('%Y-%m'),
+            'conteos': conteos,
+            'por_dia': por_dia,
+            'tareas': tareas
+        }), 200
+    except Exception as e:
+        return jsonify({'mensaje': 'Error al obtener la agenda', 'error': str(e)}), 500
+
 @tareas_bp.route('/', methods=['POST'])
-@jwt_required()
+@rol_requerido('usuario')
 def crear_tarea():
     """
     Crea una nueva tarea para el usuario autenticado.
@@ -114,26 +253,15 @@ def crear_tarea():
     # Obtener ID del usuario desde el token JWT
     usuario_id = int(get_jwt_identity())
     
-    # Obtener datos JSON de la solicitud
-    datos = request.get_json()
+    # Obtener datos de la solicitud (JSON o MessagePack)
+    datos = obtener_datos_solicitud()
     
     # Validar que se hayan enviado los datos
     if not datos:
         return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
     
-    # Validar campos requeridos
-    errores = {}
-    if not datos.get('titulo'):
-        errores['titulo'] = 'El título es obligatorio'
-    elif len(datos['titulo']) < 5:
-        errores['titulo'] = 'El título debe tener al menos 5 caracteres'
-    elif len(datos['titulo']) > 100:
-        errores['titulo'] = 'El título no puede exceder 100 caracteres'
-    
-    # Validar descripción si se proporciona
-    if 'descripcion' in datos and datos['descripcion']:
-        if len(datos['descripcion']) < 10:
-            errores['descripcion'] = 'La descripción debe tener al menos 10 caracteres'
+    # Validar campos requeridos y descripción si se proporciona
+    tarea_datos, errores = EsquemaCrearTarea.cargar(datos)
     
     # Si hay errores de validación, retornarlos
     if errores:
@@ -144,34 +272,35 @@ def crear_tarea():
     
     # Procesar fecha límite si se proporciona
     fecha_limite = None
-    if datos.get('fecha_limite'):
-        es_valida, fecha = validar_fecha_futura(datos['fecha_limite'])
+    if tarea_datos.fecha_limite:
+        es_valida, fecha = validar_fecha_futura(tarea_datos.fecha_limite)
         if not es_valida:
             return jsonify({'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD o la fecha debe ser futura'}), 400
         fecha_limite = fecha
 
     # Verificar duplicados (mismo título para el mismo usuario)
-    if verificar_tarea_duplicada(usuario_id, datos['titulo']):
+    if verificar_tarea_duplicada(usuario_id, tarea_datos.titulo):
         return jsonify({'mensaje': 'Ya tienes una tarea con este título'}), 400
 
     # Crear nueva tarea
     nueva_tarea = Tarea(
         usuario_id=usuario_id,
-        titulo=datos['titulo'],
-        descripcion=datos.get('descripcion'),
+        titulo=tarea_datos.titulo,
+        descripcion=tarea_datos.descripcion,
         fecha_limite=fecha_limite
     )
     
     # Guardar en la base de datos
     try:
         db.session.add(nueva_tarea)
+        db.session.execute(sentencia_actividad(usuario_id))
         db.session.commit()
         return jsonify(nueva_tarea.to_dict()), 201
     except Exception as e:
         return manejar_error_db('Error al crear la tarea')
 
 @tareas_bp.route('/<int:id>', methods=['PUT'])
-@jwt_required()
+@rol_requerido('usuario')
 def actualizar_tarea(id):
     """
     Actualiza una tarea específica del usuario autenticado.
@@ -193,35 +322,20 @@ def actualizar_tarea(id):
     if not tarea:
         return jsonify({'mensaje': 'Tarea no encontrada'}), 404
     
-    # Obtener datos JSON de la solicitud
-    datos = request.get_json()
+    # Obtener datos de la solicitud (JSON o MessagePack)
+    datos = obtener_datos_solicitud()
     
     # Validar que se hayan enviado los datos
     if not datos:
         return jsonify({'mensaje': 'No se recibieron datos. Por favor asegúrese de enviar los datos en formato JSON.'}), 400
     
     # Validar campos si se proporcionan
-    errores = {}
-    
-    # Actualizar título si se proporciona
-    if 'titulo' in datos:
-        if not datos['titulo']:
-            errores['titulo'] = 'El título no puede estar vacío'
-        elif len(datos['titulo']) < 5:
-            errores['titulo'] = 'El título debe tener al menos 5 caracteres'
-        elif len(datos['titulo']) > 100:
-            errores['titulo'] = 'El título no puede exceder 100 caracteres'
-        else:
-            # Verificar duplicados si cambia el título
-            if datos['titulo'] != tarea.titulo:
-                if verificar_tarea_duplicada(usuario_id, datos['titulo'], id):
-                    errores['titulo'] = 'Ya tienes una tarea con este título'
+    cambios, errores = EsquemaActualizarTarea.cargar(datos)
     
-    # Actualizar descripción si se proporciona
-    if 'descripcion' in datos:
-        # Validar descripción si se proporciona
-        if datos['descripcion'] and len(datos['descripcion']) < 10:
-            errores['descripcion'] = 'La descripción debe tener al menos 10 caracteres'
+    # Verificar duplicados si cambia el título
+    if 'titulo' in datos and 'titulo' not in errores and datos['titulo'] != tarea.titulo:
+        if verificar_tarea_duplicada(usuario_id, datos['titulo'], id):
+            errores['titulo'] = 'Ya tienes una tarea con este título'
     
     # Si hay errores de validación, retornarlos
     if errores:
@@ -230,17 +344,17 @@ def actualizar_tarea(id):
             'errores': errores
         }), 400
     
-    # Aplicar actualizaciones si no hay errores
-    if 'titulo' in datos and not errores.get('titulo'):
-        tarea.titulo = datos['titulo']
+    # Aplicar actualizaciones de los campos enviados
+    if 'titulo' in cambios.presentes:
+        tarea.titulo = cambios.titulo
         
-    if 'descripcion' in datos and not errores.get('descripcion'):
-        tarea.descripcion = datos['descripcion']
+    if 'descripcion' in cambios.presentes:
+        tarea.descripcion = cambios.descripcion
         
     # Actualizar fecha límite si se proporciona
-    if 'fecha_limite' in datos:
-        if datos['fecha_limite']:
-            es_valida, fecha = validar_fecha_futura(datos['fecha_limite'])
+    if 'fecha_limite' in cambios.presentes:
+        if cambios.fecha_limite:
+            es_valida, fecha = validar_fecha_futura(cambios.fecha_limite)
             if not es_valida:
                 return jsonify({'mensaje': 'Formato de fecha inválido. Use YYYY-MM-DD o la fecha debe ser futura'}), 400
             tarea.fecha_limite = fecha
@@ -249,13 +363,14 @@ def actualizar_tarea(id):
             
     # Guardar cambios en la base de datos
     try:
+        db.session.execute(sentencia_actividad(usuario_id))
         db.session.commit()
         return jsonify(tarea.to_dict()), 200
     except Exception as e:
         return manejar_error_db('Error al actualizar tarea')
 
 @tareas_bp.route('/<int:id>', methods=['DELETE'])
-@jwt_required()
+@rol_requerido('usuario')
 def eliminar_tarea(id):
     """
     Elimina una tarea específica del usuario autenticado.
@@ -280,6 +395,7 @@ def eliminar_tarea(id):
     # Eliminar la tarea de la base de datos
     try:
         db.session.delete(tarea)
+        db.session.execute(sentencia_actividad(usuario_id))
         db.session.commit()
         return jsonify({'mensaje': 'Tarea eliminada exitosamente'}), 200
     except Exception as e:
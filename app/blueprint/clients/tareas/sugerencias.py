@@ -0,0 +1,210 @@
+"""
+Módulo de sugerencias de títulos de tareas.
+Resuelve el autocompletado del buscador con una consulta por prefijo sobre el
+índice (usuario_id, titulo_normalizado) y una caché pequeña por usuario en
+memoria del proceso, de modo que escribir en el buscador no ejecute el
+listado completo de tareas en cada pulsación.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import click
+from sqlalchemy import event, inspect, select, update
+
+from app.modelos import Tarea, normalizar_titulo
+
+LIMITE_SUGERENCIAS_DEFECTO = 8
+LIMITE_SUGERENCIAS_MAXIMO = 20
+
+# Segundos de validez de una entrada: acota el desfase entre procesos, ya que
+# cada proceso solo invalida su propia caché al escribir tareas
+TTL_SUGERENCIAS = 30
+MAX_USUARIOS_CACHE = 1000
+MAX_PREFIJOS_POR_USUARIO = 32
+
+
+def _condicion_prefijo(prefijo, dialecto):
+    """
+    Condición "titulo_normalizado empieza por prefijo" que puede usar el índice.
+
+    En PostgreSQL se usa LIKE (el índice tiene text_pattern_ops); en el resto, un
+    rango [prefijo, sucesor) que el índice B-tree resuelve con la intercalación binaria.
+    """
+    columna = Tarea.titulo_normalizado
+    if dialecto == 'postgresql':
+        escapado = prefijo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return columna.like(escapado + '%', escape='\\')
+    sucesor = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+    return (columna >= prefijo) & (columna < sucesor)
+
+
+def consulta_sugerencias(usuario_id, prefijo, limite, dialecto):
+    """
+    Construye la consulta de títulos que empiezan por un prefijo normalizado.
+
+    Args:
+        usuario_id (int): ID del usuario autenticado
+        prefijo (str): Prefijo ya normalizado (no vacío)
+        limite (int): Número máximo de títulos
+        dialecto (str): Nombre del dialecto de la base de datos
+
+    Returns:
+        Select: Sentencia con (titulo_normalizado, titulo) ordenada alfabéticamente
+    """
+    return (
+        select(Tarea.titulo_normalizado, Tarea.titulo)
+        .where(Tarea.usuario_id == usuario_id, _condicion_prefijo(prefijo, dialecto))
+        .order_by(Tarea.titulo_normalizado)
+        .limit(limite)
+    )
+
+
+class CacheSugerencias:
+    """
+    Caché LRU por usuario de los resultados de sugerencias.
+
+    Si un prefijo más corto ya se consultó y devolvió menos resultados que su
+    límite (resultado completo), los prefijos más largos se resuelven filtrando
+    esa lista en memoria sin consultar la base de datos.
+    """
+
+    def __init__(self, ttl=TTL_SUGERENCIAS, max_usuarios=MAX_USUARIOS_CACHE,
+                 max_prefijos=MAX_PREFIJOS_POR_USUARIO):
+        self.ttl = ttl
+        self.max_usuarios = max_usuarios
+        self.max_prefijos = max_prefijos
+        # usuario_id -> OrderedDict(prefijo -> (expira, limite, filas))
+        self._usuarios = OrderedDict()
+        self._bloqueo = threading.Lock()
+
+    def obtener(self, usuario_id, prefijo, limite):
+        """
+        Busca las sugerencias de un prefijo en la caché.
+
+        Returns:
+            list | None: Títulos sugeridos o None si hay que consultar la base de datos
+        """
+        ahora = time.monotonic()
+        with self._bloqueo:
+            prefijos = self._usuarios.get(usuario_id)
+            if prefijos is None:
+                return None
+            self._usuarios.move_to_end(usuario_id)
+
+            entrada = prefijos.get(prefijo)
+            if entrada and entrada[0] > ahora and entrada[1] >= limite:
+                return [titulo for _, titulo in entrada[2][:limite]]
+
+            # Reutilizar un prefijo más corto cuyo resultado esté completo
+            for longitud in range(len(prefijo) - 1, 0, -1):
+                entrada = prefijos.get(prefijo[:longitud])
+                if entrada and entrada[0] > ahora and len(entrada[2]) < entrada[1]:
+                    return [titulo for normalizado, titulo in entrada[2]
+                            if normalizado.startswith(prefijo)][:limite]
+        return None
+
+    def guardar(self, usuario_id, prefijo, limite, filas):
+        """
+        Guarda el resultado de una consulta de sugerencias.
+
+        Args:
+            filas (list): Tuplas (titulo_normalizado, titulo) devueltas por la consulta
+        """
+        with self._bloqueo:
+            prefijos = self._usuarios.get(usuario_id)
+            if prefijos is None:
+                prefijos = self._usuarios[usuario_id] = OrderedDict()
+                if len(self._usuarios) > self.max_usuarios:
+                    self._usuarios.popitem(last=False)
+            else:
+                self._usuarios.move_to_end(usuario_id)
+            prefijos[prefijo] = (time.monotonic() + self.ttl, limite, filas)
+            prefijos.move_to_end(prefijo)
+            if len(prefijos) > self.max_prefijos:
+                prefijos.popitem(last=False)
+
+    def invalidar(self, usuario_id):
+        """Descarta las sugerencias en caché de un usuario."""
+        with self._bloqueo:
+            self._usuarios.pop(usuario_id, None)
+
+    def limpiar(self):
+        """Descarta toda la caché."""
+        with self._bloqueo:
+            self._usuarios.clear()
+
+
+cache_sugerencias = CacheSugerencias()
+
+
+def obtener_sugerencias(sesion, usuario_id, texto, limite):
+    """
+    Devuelve los títulos del usuario que empiezan por el texto indicado.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        usuario_id (int): ID del usuario autenticado
+        texto (str): Texto escrito por el usuario
+        limite (int): Número máximo de sugerencias
+
+    Returns:
+        tuple: (titulos, origen) donde origen es 'cache', 'db' o 'vacio' (texto sin prefijo útil)
+    """
+    prefijo = normalizar_titulo(texto)
+    if not prefijo:
+        return [], 'vacio'
+
+    titulos = cache_sugerencias.obtener(usuario_id, prefijo, limite)
+    if titulos is not None:
+        return titulos, 'cache'
+
+    dialecto = sesion.get_bind(mapper=inspect(Tarea)).dialect.name
+    filas = [tuple(fila) for fila in sesion.execute(consulta_sugerencias(usuario_id, prefijo, limite, dialecto))]
+    cache_sugerencias.guardar(usuario_id, prefijo, limite, filas)
+    return [titulo for _, titulo in filas], 'db'
+
+
+# Invalidación local al escribir tareas; los demás procesos dependen del TTL
+@event.listens_for(Tarea, 'after_insert')
+@event.listens_for(Tarea, 'after_delete')
+def _invalidar_por_escritura(mapper, conexion, tarea):
+    cache_sugerencias.invalidar(tarea.usuario_id)
+
+
+@event.listens_for(Tarea, 'after_update')
+def _invalidar_por_actualizacion(mapper, conexion, tarea):
+    estado = inspect(tarea)
+    if estado.attrs.titulo.history.has_changes() or estado.attrs.usuario_id.history.has_changes():
+        cache_sugerencias.invalidar(tarea.usuario_id)
+        for anterior in estado.attrs.usuario_id.history.deleted:
+            cache_sugerencias.invalidar(anterior)
+
+
+@click.command('normalizar-titulos')
+@click.option('--lote', default=1000, show_default=True, help='Tareas por lote.')
+def normalizar_titulos_comando(lote):
+    """Rellena titulo_normalizado en las tareas creadas antes de las sugerencias."""
+    from app import db
+    total = 0
+    ultimo_id = 0
+    while True:
+        filas = db.session.execute(
+            select(Tarea.id, Tarea.titulo)
+            .where(Tarea.id > ultimo_id, Tarea.titulo_normalizado == '')
+            .order_by(Tarea.id)
+            .limit(lote)
+        ).all()
+        if not filas:
+            break
+        # La normalización no cambia los contadores de tareas de los usuarios
+        db.session.execute(
+            update(Tarea).execution_options(sin_contadores=True),
+            [{'id': id_tarea, 'titulo_normalizado': normalizar_titulo(titulo)} for id_tarea, titulo in filas]
+        )
+        db.session.commit()
+        total += len(filas)
+        ultimo_id = filas[-1].id
+    cache_sugerencias.limpiar()
+    click.echo(f'Títulos normalizados: {total}.')
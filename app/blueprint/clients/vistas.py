@@ -3,9 +3,12 @@ Módulo de vistas de la aplicación.
 Contiene las rutas para servir las páginas HTML del frontend.
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory, current_app, make_response
 from flask_jwt_extended import decode_token, verify_jwt_in_request, get_jwt_identity
+from app import db
 from app.modelos import Usuario
+from app.assets import CARPETA_DIST, enviar_precomprimido
+from app.blueprint.clients.tareas.consultas import construir_consulta_tareas
 import json
 import os
 
@@ -58,6 +61,8 @@ def dashboard():
     """
     Ruta que sirve el dashboard del usuario.
     Verifica la validez del token JWT antes de mostrar el contenido.
+    Incluye en la página las tareas iniciales (el mismo resultado que `GET /tareas/`
+    sin filtros) para que el cliente las muestre sin una segunda solicitud.
     """
     # Obtener el token JWT de las cookies
     token = request.cookies.get('token')
@@ -73,14 +78,26 @@ def dashboard():
         decoded_token = decode_token(token)
         user_id = decoded_token['sub']
         
-        # Obtener el usuario de la base de datos
-        usuario = Usuario.query.get(user_id)
+        # Obtener el usuario de la base de datos (solo con tokens de acceso de usuario:
+        # los de refresco y los de administrador no dan acceso)
+        es_acceso_usuario = decoded_token.get('type') == 'access' and decoded_token.get('rol') == 'usuario'
+        usuario = Usuario.query.get(user_id) if es_acceso_usuario else None
         if not usuario:
             flash('Acceso denegado. Debes iniciar sesión para acceder a esta página.', 'error')
             return redirect(url_for('vistas.inicio'))
             
-        # Pasar la información del usuario a la plantilla
-        return render_template('clients/components/dashboard.html', usuario=usuario)
+        # Primera carga de tareas con el filtro y el orden por defecto
+        tareas = db.session.execute(construir_consulta_tareas(usuario.id, {})).scalars().all()
+
+        # Pasar la información del usuario y sus tareas a la plantilla
+        respuesta = make_response(render_template(
+            'clients/components/dashboard.html',
+            usuario=usuario,
+            tareas_iniciales=[t.to_dict() for t in tareas]
+        ))
+        # La página contiene datos del usuario: no debe guardarse en cachés compartidas
+        respuesta.headers['Cache-Control'] = 'private, no-store'
+        return respuesta
     except Exception as e:
         # El token es inválido o ha expirado
         flash('Acceso denegado. Debes iniciar sesión para acceder a esta página.', 'error')
@@ -90,7 +107,11 @@ def dashboard():
 def documentacion():
     """
     Ruta que sirve la documentación técnica del proyecto.
+    Usa la versión precomprimida generada por `flask construir-assets` si existe.
     """
+    directorio = os.path.join(current_app.static_folder, CARPETA_DIST, 'documentacion')
+    if os.path.isfile(os.path.join(directorio, 'documentation.html')):
+        return enviar_precomprimido(directorio, 'documentation.html', current_app.config['DOCUMENTACION_MAX_AGE'])
     return send_from_directory('../documentacion', 'documentation.html')
 
 @vistas_bp.route('/database/<path:filename>')
@@ -0,0 +1,221 @@
+"""
+Módulo de esquemas de validación.
+Define de forma declarativa los campos que aceptan las rutas y valida los datos
+de la solicitud en una sola pasada: cada campo compila al inicio sus reglas
+(patrones incluidos) y la carga produce un objeto tipado con los valores
+válidos o un diccionario de errores con los mensajes de siempre.
+"""
+
+import re
+
+# Patrones precompilados compartidos por los esquemas
+PATRON_IDENTIFICACION = re.compile(r'^\d{8,}$')
+PATRON_CONTRASENA = re.compile(r'^(?=.*[A-Z])(?=.*[a-z])(?=.*\d)', re.DOTALL)
+
+MENSAJE_TIPO_TEXTO = 'El valor debe ser un texto'
+MENSAJE_OBJETO = 'Se esperaba un objeto con los datos'
+
+
+class Texto:
+    """
+    Campo de texto declarativo.
+
+    Reglas, en orden: obligatorio/vacío, tipo, longitud mínima, longitud máxima y patrón.
+    Solo se informa el primer error de cada campo.
+    """
+
+    def __init__(self, obligatorio=None, vacio=None, min_longitud=None, max_longitud=None, patron=None,
+                 mensajes=None):
+        """
+        Args:
+            obligatorio (str, optional): Mensaje si falta el valor; si se indica, el campo es obligatorio
+            vacio (str, optional): Mensaje si un campo opcional se envía vacío; sin él, un valor
+                vacío se acepta tal cual
+            min_longitud (int, optional): Longitud mínima
+            max_longitud (int, optional): Longitud máxima
+            patron (Pattern, optional): Expresión regular precompilada que debe cumplir el valor
+            mensajes (dict, optional): Mensajes de las reglas 'min', 'max', 'patron' y 'tipo'
+        """
+        mensajes = mensajes or {}
+        self.obligatorio = obligatorio
+        self.vacio = vacio
+        self.mensaje_tipo = mensajes.get('tipo', MENSAJE_TIPO_TEXTO)
+
+        # Reglas compiladas una sola vez: (comprobación, mensaje)
+        reglas = []
+        if min_longitud is not None:
+            reglas.append((lambda valor, n=min_longitud: len(valor) >= n, mensajes['min']))
+        if max_longitud is not None:
+            reglas.append((lambda valor, n=max_longitud: len(valor) <= n, mensajes['max']))
+        if patron is not None:
+            reglas.append((patron.match, mensajes['patron']))
+        self.reglas = tuple(reglas)
+
+    def validar(self, valor, presente):
+        """
+        Valida un valor del campo.
+
+        Args:
+            valor: Valor recibido (None si no se envió)
+            presente (bool): Si la clave venía en los datos
+
+        Returns:
+            str | None: Mensaje de error o None si el valor es válido
+        """
+        if not valor:
+            if self.obligatorio:
+                return self.obligatorio
+            return self.vacio if presente else None
+        if not isinstance(valor, str):
+            return self.mensaje_tipo
+        for comprobar, mensaje in self.reglas:
+            if not comprobar(valor):
+                return mensaje
+        return None
+
+
+class Esquema:
+    """
+    Base de los esquemas declarativos. Las subclases declaran sus campos como
+    atributos de clase; la carga devuelve una instancia de la subclase con un
+    atributo por campo (None si no se envió) y `presentes`, las claves recibidas,
+    para distinguir en las actualizaciones parciales un campo omitido de uno vaciado.
+    """
+
+    _campos = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        campos = {}
+        for base in reversed(cls.__mro__):
+            campos.update((nombre, valor) for nombre, valor in vars(base).items() if isinstance(valor, Texto))
+        cls._campos = tuple(campos.items())
+        cls._nombres = frozenset(campos)
+
+    def __init__(self, valores, presentes):
+        self.__dict__.update(valores)
+        self.presentes = presentes
+
+    def __repr__(self):
+        valores = ', '.join(f'{nombre}={getattr(self, nombre)!r}' for nombre, _ in self._campos)
+        return f'{type(self).__name__}({valores})'
+
+    @classmethod
+    def cargar(cls, datos):
+        """
+        Valida un objeto de datos con el esquema.
+
+        Args:
+            datos (dict): Datos recibidos en la solicitud
+
+        Returns:
+            tuple: (objeto, errores) donde objeto es la instancia cargada (None si hay errores)
+                   y errores es un diccionario campo -> mensaje (vacío si no hay errores)
+        """
+        if not isinstance(datos, dict):
+            return None, {'datos': MENSAJE_OBJETO}
+
+        valores = {}
+        errores = {}
+        obtener = datos.get
+        for nombre, campo in cls._campos:
+            valor = obtener(nombre)
+            error = campo.validar(valor, nombre in datos)
+            if error:
+                errores[nombre] = error
+            else:
+                valores[nombre] = valor
+
+        if errores:
+            return None, errores
+        return cls(valores, cls._nombres.intersection(datos)), errores
+
+
+# --- Campos reutilizables ---
+
+MENSAJE_IDENTIFICACION = 'La identificación debe tener al menos 8 dígitos y contener solo números'
+MENSAJE_IDENTIFICACION_ADMIN = 'La identificación debe tener al menos 8 dígitos numéricos'
+MENSAJE_CONTRASENA = 'La contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'
+
+def _identificacion(mensaje=MENSAJE_IDENTIFICACION, **kwargs):
+    return Texto(patron=PATRON_IDENTIFICACION, mensajes={'patron': mensaje}, **kwargs)
+
+def _nombre(etiqueta, **kwargs):
+    return Texto(min_longitud=2, mensajes={'min': f'El {etiqueta} debe tener al menos 2 caracteres'}, **kwargs)
+
+def _contrasena(mensaje=MENSAJE_CONTRASENA, **kwargs):
+    return Texto(min_longitud=8, patron=PATRON_CONTRASENA, mensajes={'min': mensaje, 'patron': mensaje}, **kwargs)
+
+def _titulo(**kwargs):
+    return Texto(min_longitud=5, max_longitud=100, mensajes={
+        'min': 'El título debe tener al menos 5 caracteres',
+        'max': 'El título no puede exceder 100 caracteres'
+    }, **kwargs)
+
+def _descripcion():
+    return Texto(min_longitud=10, mensajes={'min': 'La descripción debe tener al menos 10 caracteres'})
+
+
+# --- Usuarios (clientes) ---
+
+class EsquemaRegistro(Esquema):
+    """Registro de un nuevo usuario (`POST /auth/registro`)."""
+    identificacion = _identificacion(obligatorio='La identificación es obligatoria')
+    nombre = _nombre('nombre', obligatorio='El nombre es obligatorio')
+    apellido = _nombre('apellido', obligatorio='El apellido es obligatorio')
+    contrasena = _contrasena(obligatorio='La contraseña es obligatoria')
+
+
+class EsquemaPerfil(Esquema):
+    """Actualización parcial del perfil del usuario (`PUT /auth/perfil`)."""
+    nombre = _nombre('nombre', vacio='El nombre debe tener al menos 2 caracteres')
+    apellido = _nombre('apellido', vacio='El apellido debe tener al menos 2 caracteres')
+    identificacion = _identificacion(vacio=MENSAJE_IDENTIFICACION)
+    contrasena_actual = Texto()
+    nueva_contrasena = _contrasena(
+        'La nueva contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números',
+        vacio='La nueva contraseña debe tener al menos 8 caracteres, incluyendo mayúsculas, minúsculas y números'
+    )
+
+
+# --- Usuarios (administración) ---
+
+class EsquemaCrearUsuario(Esquema):
+    """Creación de un usuario desde el panel (`POST /admin/api/usuarios`)."""
+    identificacion = _identificacion(MENSAJE_IDENTIFICACION_ADMIN, obligatorio='La identificación es obligatoria')
+    nombre = _nombre('nombre', obligatorio='El nombre es obligatorio')
+    apellido = _nombre('apellido', obligatorio='El apellido es obligatorio')
+    contrasena = _contrasena(obligatorio='La contraseña es obligatoria')
+
+
+class EsquemaActualizarUsuario(Esquema):
+    """Actualización parcial de un usuario desde el panel (`PUT /admin/api/usuarios/<id>`)."""
+    identificacion = _identificacion(MENSAJE_IDENTIFICACION_ADMIN, vacio='La identificación no puede estar vacía')
+    nombre = _nombre('nombre', vacio='El nombre no puede estar vacío')
+    apellido = _nombre('apellido', vacio='El apellido no puede estar vacío')
+    contrasena = _contrasena(vacio='La contraseña no puede estar vacía')
+
+
+class EsquemaPerfilAdministrador(Esquema):
+    """Actualización del perfil del administrador (`PUT /admin/auth/api/perfil`)."""
+    identificacion = _identificacion(MENSAJE_IDENTIFICACION_ADMIN, obligatorio='La identificación es obligatoria')
+    nombre = _nombre('nombre', obligatorio='El nombre es obligatorio')
+    apellido = _nombre('apellido', obligatorio='El apellido es obligatorio')
+    # Opcional: vacía o ausente significa "no cambiar la contraseña"
+    contrasena = _contrasena()
+
+
+# --- Tareas ---
+
+class EsquemaCrearTarea(Esquema):
+    """Creación de una tarea (`POST /tareas/`)."""
+    titulo = _titulo(obligatorio='El título es obligatorio')
+    descripcion = _descripcion()
+    fecha_limite = Texto()
+
+
+class EsquemaActualizarTarea(Esquema):
+    """Actualización parcial de una tarea (`PUT /tareas/<id>`)."""
+    titulo = _titulo(vacio='El título no puede estar vacío')
+    descripcion = _descripcion()
+    fecha_limite = Texto()
@@ -3,86 +3,84 @@ Módulo de utilidades comunes para la aplicación.
 Contiene funciones de validación y manejo de errores reutilizables.
 """
 
-import re
-from datetime import datetime
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
 from app import db
 
 from app.modelos import Usuario, Tarea, Administrador
-from flask import jsonify, request
-from flask_jwt_extended import decode_token
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, get_jwt, jwt_required
+import logging
 
-def validar_identificacion(identificacion):
+logger = logging.getLogger(__name__)
+
+def validar_fecha_futura(fecha_str):
     """
-    Valida que la identificación tenga al menos 8 dígitos y contenga solo números.
+    Valida que la fecha sea futura.
     
     Args:
-        identificacion (str): La identificación a validar
+        fecha_str (str): Fecha en formato 'YYYY-MM-DD'
         
     Returns:
-        bool: True si es válida, False si no lo es
+        tuple: (es_valida, fecha_objeto) donde es_valida es boolean y fecha_objeto es date o None
     """
-    return identificacion and re.match(r'^\d{8,}$', identificacion)
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+        hoy = datetime.now().date()
+        if fecha < hoy:
+            return False, None
+        return True, fecha
+    except ValueError:
+        return False, None
 
-def validar_nombre(nombre):
+def validar_campos_solicitados(parametro, modelo):
     """
-    Valida que el nombre tenga al menos 2 caracteres.
-    
+    Valida el parámetro `fields` (lista separada por comas) contra los campos públicos del modelo.
+    El campo 'id' se incluye siempre para que el cliente pueda referenciar cada registro.
+
     Args:
-        nombre (str): El nombre a validar
-        
+        parametro (str): Valor del parámetro `fields` (vacío o None para todos los campos)
+        modelo: Modelo con el atributo CAMPOS_PUBLICOS
+
     Returns:
-        bool: True si es válido, False si no lo es
+        tuple: (es_valido, campos) donde campos es la lista de columnas a seleccionar
+               (None si no se pidió proyección) o, si no es válido, los campos desconocidos
     """
-    return nombre and len(nombre) >= 2
+    if not parametro or not parametro.strip():
+        return True, None
+
+    solicitados = [campo.strip() for campo in parametro.split(',') if campo.strip()]
+    desconocidos = [campo for campo in solicitados if campo not in modelo.CAMPOS_PUBLICOS]
+    if desconocidos:
+        return False, desconocidos
+
+    # Mantener el orden de CAMPOS_PUBLICOS y eliminar duplicados
+    return True, [campo for campo in modelo.CAMPOS_PUBLICOS if campo == 'id' or campo in solicitados]
 
-def validar_contrasena(contrasena):
+def respuesta_campos_invalidos(desconocidos, modelo):
     """
-    Valida que la contraseña tenga al menos 8 caracteres,
-    incluyendo al menos una mayúscula, una minúscula y un número.
-    
-    Args:
-        contrasena (str): La contraseña a validar
-        
+    Genera la respuesta de error para campos de `fields` que no existen.
+
     Returns:
-        bool: True si es válida, False si no lo es
+        tuple: Respuesta JSON y código de estado 400
     """
-    # Verificar que la contraseña no sea None o vacía
-    if not contrasena:
-        return False
-    
-    # Verificar longitud mínima
-    if len(contrasena) < 8:
-        return False
-    
-    # Verificar que contenga al menos una mayúscula, una minúscula y un número
-    # La importación de re ya se hizo al inicio del archivo
-    if not re.search(r'[A-Z]', contrasena):
-        return False
-    if not re.search(r'[a-z]', contrasena):
-        return False
-    if not re.search(r'\d', contrasena):
-        return False
-        
-    return True
+    return jsonify({
+        'mensaje': f"Campos no válidos en 'fields': {', '.join(desconocidos)}",
+        'campos_permitidos': list(modelo.CAMPOS_PUBLICOS)
+    }), 400
 
-def validar_fecha_futura(fecha_str):
+def fila_a_dict(fila):
     """
-    Valida que la fecha sea futura.
-    
+    Convierte una fila de columnas seleccionadas al mismo formato que to_dict().
+
     Args:
-        fecha_str (str): Fecha en formato 'YYYY-MM-DD'
-        
+        fila (Row): Fila resultado de una consulta por columnas
+
     Returns:
-        tuple: (es_valida, fecha_objeto) donde es_valida es boolean y fecha_objeto es date o None
+        dict: Diccionario con las columnas de la fila
     """
-    try:
-        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-        hoy = datetime.now().date()
-        if fecha < hoy:
-            return False, None
-        return True, fecha
-    except ValueError:
-        return False, None
+    return dict(fila._mapping)
 
 def verificar_tarea_duplicada(usuario_id, titulo, tarea_id=None):
     """
@@ -122,38 +120,123 @@ def verificar_token_admin():
     Returns:
         tuple: (administrador, token) si es válido, (None, None) si no lo es
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     # Verificar si el administrador tiene un token válido
     token = request.cookies.get('admin_token')
-    logger.info(f"Token from cookie: {token}")
     
     if not token:
         auth_header = request.headers.get('Authorization')
         if auth_header and auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            logger.info(f"Token from Authorization header: {token}")
     
     if token:
         try:
             # Intentar decodificar el token
-            logger.info(f"Attempting to decode token: {token[:20]}...")  # Log first 20 chars for security
             decoded_token = decode_token(token)
-            admin_id = int(decoded_token['sub'])  # Convert to int for database query
-            logger.info(f"Decoded token for admin ID: {admin_id}")
+            # Solo sirven tokens de acceso emitidos a un administrador: los de refresco y los
+            # de usuarios (cuyo `sub` es un id de otra tabla) se rechazan
+            if decoded_token.get('type') != 'access' or decoded_token.get('rol') != 'admin':
+                return None, None
+            admin_id = int(decoded_token['sub'])  # Convertir a entero para la consulta
             
             # Verificar si el administrador existe
             administrador = Administrador.query.get(admin_id)
             if administrador:
-                logger.info(f"Administrator found: {administrador.nombre}")
+                # El registro de auditoría atribuye a este administrador las operaciones de la solicitud
+                g.administrador_id = administrador.id
                 return administrador, token
-            else:
-                logger.warning(f"No administrator found for ID: {admin_id}")
+            logger.warning('Token de administrador sin administrador asociado', extra={'admin_id': admin_id})
         except Exception as e:
-            # Token inválido
-            logger.error(f"Error verifying admin token: {str(e)}", exc_info=True)
-            pass
+            # Token inválido o expirado: ruta caliente, se registra en DEBUG
+            logger.debug('Token de administrador no válido: %s', e)
     
-    logger.info("No valid admin token found")
     return None, None
+
+
+def rol_requerido(rol):
+    """
+    Decorador equivalente a @jwt_required() que además exige que el token de acceso
+    se haya emitido para el rol indicado. Sin él, un token de usuario con `sub` = 1
+    valdría como el administrador 1 (y al revés), porque los ids de ambas tablas coinciden.
+
+    Args:
+        rol (str): 'usuario' o 'admin'
+    """
+    def decorador(vista):
+        @wraps(vista)
+        @jwt_required()
+        def envoltorio(*args, **kwargs):
+            if get_jwt().get('rol') != rol:
+                return jsonify({'mensaje': 'Token inválido', 'error': 'invalid_token'}), 422
+            return vista(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def huella_contrasena(contrasena_hash):
+    """
+    Calcula una huella corta del hash de contraseña almacenado.
+    Se incluye en los tokens de refresco: al cambiar la contraseña cambia la huella
+    y los tokens de refresco emitidos antes dejan de valer.
+
+    Args:
+        contrasena_hash (str): Hash de la contraseña guardado en la base de datos
+
+    Returns:
+        str: Huella hexadecimal de 16 caracteres
+    """
+    return hashlib.sha256(contrasena_hash.encode('utf-8')).hexdigest()[:16]
+
+
+def emitir_tokens(titular, rol, inicio_sesion=None):
+    """
+    Crea el token de acceso y el token de refresco de un usuario o administrador.
+
+    El token de refresco se renueva en cada uso (ventana deslizante de
+    JWT_REFRESH_TOKEN_EXPIRES) pero conserva la hora del inicio de sesión, de modo
+    que la sesión no se prolonga más allá de JWT_SESION_MAXIMA.
+
+    Args:
+        titular: Usuario o Administrador autenticado
+        rol (str): 'usuario' o 'admin'
+        inicio_sesion (int, optional): Marca de tiempo del inicio de sesión original
+
+    Returns:
+        dict: {'token': token de acceso, 'refresh_token': token de refresco}
+    """
+    identidad = str(titular.id)
+    if inicio_sesion is None:
+        inicio_sesion = int(datetime.now(timezone.utc).timestamp())
+    return {
+        'token': create_access_token(identity=identidad, additional_claims={'rol': rol}),
+        'refresh_token': create_refresh_token(identity=identidad, additional_claims={
+            'rol': rol,
+            'huella': huella_contrasena(titular.contrasena),
+            'inicio_sesion': inicio_sesion,
+        }),
+    }
+
+
+def refrescar_tokens(modelo, rol):
+    """
+    Valida el token de refresco de la solicitud (ya verificado por
+    @jwt_required(refresh=True)) y emite un par de tokens nuevo sin volver a
+    comprobar la contraseña.
+
+    Args:
+        modelo: Usuario o Administrador
+        rol (str): Rol que debe figurar en el token de refresco
+
+    Returns:
+        tuple: (titular, tokens) o (None, None) si el titular ya no existe, cambió su
+               contraseña, el token pertenece a otro rol o la sesión superó su duración máxima
+    """
+    datos = get_jwt()
+    inicio_sesion = datos.get('inicio_sesion', 0)
+    maximo = current_app.config['JWT_SESION_MAXIMA'].total_seconds()
+    if datos.get('rol') != rol or datetime.now(timezone.utc).timestamp() - inicio_sesion > maximo:
+        return None, None
+
+    titular = db.session.get(modelo, int(datos['sub']))
+    if not titular or datos.get('huella') != huella_contrasena(titular.contrasena):
+        return None, None
+    return titular, emitir_tokens(titular, rol, inicio_sesion)
@@ -0,0 +1,158 @@
+"""
+Módulo de compresión de respuestas.
+Comprime con gzip o brotli, según lo que acepte el cliente, las respuestas
+dinámicas (JSON, HTML) que superan un tamaño mínimo, incluidas las respuestas
+generadas en streaming.
+"""
+
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+# Tipos de contenido que merece la pena comprimir
+TIPOS_COMPRIMIBLES = {
+    'application/json',
+    'application/msgpack',
+    'text/html',
+    'text/csv',
+    'text/plain',
+}
+
+
+class _CompresorGzip:
+    """
+    Compresor gzip incremental que vacía el buffer tras cada fragmento.
+    """
+
+    codificacion = 'gzip'
+
+    def __init__(self, nivel):
+        self._compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos):
+        return self._compresor.compress(datos) + self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self._compresor.flush(zlib.Z_FINISH)
+
+
+class _CompresorBrotli:
+    """
+    Compresor brotli incremental que vacía el buffer tras cada fragmento.
+    """
+
+    codificacion = 'br'
+
+    def __init__(self, nivel):
+        self._compresor = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, datos):
+        return self._compresor.process(datos) + self._compresor.flush()
+
+    def terminar(self):
+        return self._compresor.finish()
+
+
+def _elegir_compresor(config):
+    """
+    Elige el algoritmo de compresión según la cabecera Accept-Encoding.
+
+    Args:
+        config: Configuración de la aplicación
+
+    Returns:
+        _CompresorGzip | _CompresorBrotli | None: Compresor a usar o None
+    """
+    aceptadas = request.accept_encodings
+    if brotli is not None and aceptadas['br']:
+        # Limitar la calidad para acotar el coste de CPU por respuesta
+        return _CompresorBrotli(max(0, min(config['COMPRESION_NIVEL_BROTLI'], 11)))
+    if aceptadas['gzip']:
+        return _CompresorGzip(max(1, min(config['COMPRESION_NIVEL_GZIP'], 9)))
+    return None
+
+
+def _comprimir_flujo(iterable, compresor):
+    """
+    Comprime una respuesta en streaming fragmento a fragmento.
+
+    Args:
+        iterable: Iterable original de la respuesta
+        compresor: Compresor incremental
+
+    Yields:
+        bytes: Fragmentos comprimidos
+    """
+    try:
+        for fragmento in iterable:
+            if isinstance(fragmento, str):
+                fragmento = fragmento.encode('utf-8')
+            datos = compresor.comprimir(fragmento)
+            if datos:
+                yield datos
+        yield compresor.terminar()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def comprimir_respuesta(respuesta):
+    """
+    Comprime la respuesta si el cliente lo acepta y merece la pena.
+
+    Se omiten las respuestas ya codificadas (assets precomprimidos), los
+    archivos enviados directamente desde disco, los tipos no comprimibles y
+    las respuestas menores que el umbral configurado.
+
+    Args:
+        respuesta: Respuesta de Flask
+
+    Returns:
+        Response: La misma respuesta, comprimida si corresponde
+    """
+    config = current_app.config
+
+    if not config['COMPRESION_HABILITADA']:
+        return respuesta
+    if respuesta.status_code < 200 or respuesta.status_code in (204, 206, 304):
+        return respuesta
+    if 'Content-Encoding' in respuesta.headers or respuesta.direct_passthrough:
+        return respuesta
+    if respuesta.mimetype not in TIPOS_COMPRIMIBLES:
+        return respuesta
+
+    if not respuesta.is_streamed and respuesta.calculate_content_length() < config['COMPRESION_TAMANO_MINIMO']:
+        return respuesta
+
+    compresor = _elegir_compresor(config)
+    respuesta.vary.add('Accept-Encoding')
+    if compresor is None:
+        return respuesta
+
+    if respuesta.is_streamed:
+        respuesta.response = _comprimir_flujo(respuesta.response, compresor)
+        respuesta.headers.pop('Content-Length', None)
+    else:
+        datos = compresor.comprimir(respuesta.get_data()) + compresor.terminar()
+        respuesta.set_data(datos)
+
+    respuesta.headers['Content-Encoding'] = compresor.codificacion
+    if respuesta.get_etag()[0]:
+        # La representación comprimida es distinta a la original
+        respuesta.set_etag(respuesta.get_etag()[0], weak=True)
+    return respuesta
+
+
+def init_app(app):
+    """
+    Registra la compresión de respuestas en la aplicación.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.after_request(comprimir_respuesta)
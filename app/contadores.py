@@ -0,0 +1,198 @@
+"""
+Módulo de contadores desnormalizados de tareas.
+Mantiene `usuarios.total_tareas` y `usuarios.tareas_vencidas` en la misma
+transacción que inserta, modifica o elimina tareas, para que el listado del
+panel pueda mostrar y ordenar por ellos sin N+1 ni GROUP BY por página.
+
+- Operaciones por objeto (session.add / session.delete): eventos del mapper
+  con incrementos atómicos en SQL (`total_tareas = total_tareas + 1`).
+- Operaciones masivas (insert/update/delete sobre Tarea ejecutados con la
+  sesión): se recalculan los contadores de los usuarios afectados. La opción
+  de ejecución `sin_contadores=True` omite el recálculo cuando quien ejecuta
+  la sentencia ya ajusta los contadores por su cuenta.
+- `flask reparar-contadores`: recalcula todos los contadores. Una tarea pasa a
+  estar vencida con el paso del tiempo sin que nada se escriba, así que
+  `tareas_vencidas` es exacto a fecha de la última escritura o reparación;
+  conviene ejecutar la reparación a diario (cron o tarea programada).
+"""
+
+from datetime import date
+
+import click
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.modelos import Tarea, Usuario
+
+_usuarios = Usuario.__table__
+_tareas = Tarea.__table__
+
+
+def _es_vencida(fecha_limite, hoy=None):
+    return fecha_limite is not None and fecha_limite < (hoy or date.today())
+
+
+def _ajustar(conexion, usuario_id, total, vencidas):
+    """
+    Aplica un incremento atómico a los contadores de un usuario.
+    """
+    if not total and not vencidas:
+        return
+    conexion.execute(
+        update(_usuarios)
+        .where(_usuarios.c.id == usuario_id)
+        .values(
+            total_tareas=_usuarios.c.total_tareas + total,
+            tareas_vencidas=_usuarios.c.tareas_vencidas + vencidas,
+            # Mantener el valor evita que se dispare el onupdate: los contadores no son
+            # una modificación del usuario
+            actualizado_en=_usuarios.c.actualizado_en,
+        )
+    )
+
+
+def sentencia_recalcular(usuario_ids=None, hoy=None):
+    """
+    Construye el UPDATE que recalcula los contadores desde la tabla de tareas.
+
+    Args:
+        usuario_ids (iterable, optional): Usuarios a recalcular (por defecto todos)
+        hoy (date, optional): Fecha de referencia para las vencidas (por defecto hoy)
+
+    Returns:
+        Update: Sentencia con subconsultas correlacionadas
+    """
+    hoy = hoy or date.today()
+    total = (
+        select(func.count(_tareas.c.id))
+        .where(_tareas.c.usuario_id == _usuarios.c.id)
+        .scalar_subquery()
+    )
+    vencidas = (
+        select(func.count(_tareas.c.id))
+        .where(_tareas.c.usuario_id == _usuarios.c.id, _tareas.c.fecha_limite < hoy)
+        .scalar_subquery()
+    )
+    sentencia = update(_usuarios).values(
+        total_tareas=total, tareas_vencidas=vencidas,
+        # Sin tocar la fecha de modificación del usuario (ver _ajustar)
+        actualizado_en=_usuarios.c.actualizado_en,
+    )
+    if usuario_ids is not None:
+        sentencia = sentencia.where(_usuarios.c.id.in_(list(usuario_ids)))
+    return sentencia
+
+
+def recalcular_contadores(conexion, usuario_ids=None, hoy=None):
+    """
+    Recalcula los contadores de los usuarios indicados (o de todos).
+
+    Args:
+        conexion: Conexión o sesión con la que ejecutar el UPDATE
+        usuario_ids (iterable, optional): Usuarios a recalcular
+        hoy (date, optional): Fecha de referencia para las vencidas
+
+    Returns:
+        int: Número de usuarios actualizados
+    """
+    if usuario_ids is not None:
+        usuario_ids = set(usuario_ids)
+        if not usuario_ids:
+            return 0
+    return conexion.execute(sentencia_recalcular(usuario_ids, hoy)).rowcount
+
+
+# --- Operaciones por objeto ---
+
+@event.listens_for(Tarea, 'after_insert')
+def _tarea_insertada(mapper, conexion, tarea):
+    _ajustar(conexion, tarea.usuario_id, 1, int(_es_vencida(tarea.fecha_limite)))
+
+
+@event.listens_for(Tarea, 'after_delete')
+def _tarea_eliminada(mapper, conexion, tarea):
+    _ajustar(conexion, tarea.usuario_id, -1, -int(_es_vencida(tarea.fecha_limite)))
+
+
+@event.listens_for(Tarea, 'after_update')
+def _tarea_actualizada(mapper, conexion, tarea):
+    estado = inspect(tarea)
+    historial_fecha = estado.attrs.fecha_limite.history
+    historial_usuario = estado.attrs.usuario_id.history
+    if not historial_fecha.has_changes() and not historial_usuario.has_changes():
+        return
+
+    fecha_anterior = historial_fecha.deleted[0] if historial_fecha.deleted else tarea.fecha_limite
+    usuario_anterior = historial_usuario.deleted[0] if historial_usuario.deleted else tarea.usuario_id
+    vencida_antes = int(_es_vencida(fecha_anterior))
+    vencida_ahora = int(_es_vencida(tarea.fecha_limite))
+
+    if usuario_anterior == tarea.usuario_id:
+        _ajustar(conexion, tarea.usuario_id, 0, vencida_ahora - vencida_antes)
+    else:
+        _ajustar(conexion, usuario_anterior, -1, -vencida_antes)
+        _ajustar(conexion, tarea.usuario_id, 1, vencida_ahora)
+
+
+# --- Operaciones masivas ---
+
+def _usuarios_afectados(estado):
+    """
+    Obtiene los usuarios cuyas tareas toca una sentencia masiva, antes de ejecutarla.
+    Devuelve None si no se pueden determinar (por ejemplo, INSERT ... SELECT).
+    """
+    sentencia = estado.statement
+    if estado.is_insert:
+        parametros = estado.parameters
+        filas = parametros if isinstance(parametros, list) else [parametros or {}]
+        filas = filas + [getattr(sentencia, '_values', None) or {}]
+        ids = set()
+        for fila in filas:
+            for clave, valor in fila.items():
+                if getattr(clave, 'key', clave) == 'usuario_id':
+                    ids.add(getattr(valor, 'value', valor))
+        return ids or None
+
+    consulta = select(_tareas.c.usuario_id).distinct()
+    if sentencia.whereclause is not None:
+        consulta = consulta.where(sentencia.whereclause)
+    return set(estado.session.execute(consulta).scalars())
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _operacion_masiva(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return None
+    if estado.bind_mapper is not inspect(Tarea):
+        return None
+    if estado.execution_options.get('sin_contadores'):
+        return None
+
+    afectados = _usuarios_afectados(estado)
+    resultado = estado.invoke_statement()
+    if estado.is_update and afectados is not None:
+        # Una actualización masiva puede mover tareas a otro usuario
+        afectados |= _usuarios_afectados(estado)
+    # Si no se conocen los usuarios afectados se recalculan todos
+    recalcular_contadores(estado.session, afectados)
+    return resultado
+
+
+@click.command('reparar-contadores')
+def reparar_contadores_comando():
+    """Recalcula total_tareas y tareas_vencidas de todos los usuarios."""
+    from app import db
+    actualizados = recalcular_contadores(db.session)
+    db.session.commit()
+    click.echo(f'Contadores recalculados para {actualizados} usuarios.')
+
+
+def init_app(app):
+    """
+    Registra el comando de reparación de contadores.
+    Los eventos que mantienen los contadores se registran al importar el módulo.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.cli.add_command(reparar_contadores_comando)
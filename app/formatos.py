@@ -0,0 +1,164 @@
+"""
+Módulo de formatos de respuesta.
+Serializa las respuestas de la API como JSON o, si el cliente lo pide con
+`Accept: application/msgpack`, como MessagePack, más compacto y rápido de
+codificar y decodificar. En MessagePack las fechas viajan como Timestamp
+nativo en lugar de cadenas ISO. También acepta cuerpos MessagePack en las
+solicitudes de creación y actualización.
+"""
+
+from datetime import date, datetime, time, timezone
+
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack es opcional
+    msgpack = None
+
+MIME_MSGPACK = 'application/msgpack'
+
+# Tipos MIME de MessagePack aceptados en las solicitudes
+TIPOS_MSGPACK = {MIME_MSGPACK, 'application/x-msgpack'}
+
+# Blueprints cuyas respuestas JSON se pueden negociar como MessagePack
+BLUEPRINTS_MSGPACK = {'tareas', 'usuarios'}
+
+
+def _a_msgpack(valor):
+    """
+    Convierte los tipos que MessagePack no soporta de forma nativa.
+    Las fechas (sin hora) se envían como Timestamp a medianoche UTC.
+    """
+    if isinstance(valor, datetime):
+        if valor.tzinfo is None:
+            valor = valor.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(valor)
+    if isinstance(valor, date):
+        return msgpack.Timestamp.from_datetime(datetime.combine(valor, time(), timezone.utc))
+    raise TypeError(f'Objeto de tipo {type(valor).__name__} no serializable en MessagePack')
+
+
+def empaquetar(datos):
+    """
+    Serializa datos a MessagePack.
+
+    Args:
+        datos: Estructura de Python (dict, list, escalares, fechas)
+
+    Returns:
+        bytes: Datos codificados en MessagePack
+    """
+    return msgpack.packb(datos, default=_a_msgpack, use_bin_type=True)
+
+
+def _desde_msgpack(valor):
+    """
+    Convierte los Timestamp recibidos a las cadenas que esperan los validadores:
+    YYYY-MM-DD si es medianoche UTC, ISO 8601 completo en otro caso.
+    """
+    if isinstance(valor, dict):
+        return {clave: _desde_msgpack(v) for clave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_desde_msgpack(v) for v in valor]
+    if isinstance(valor, datetime):
+        if valor.time() == time():
+            return valor.date().isoformat()
+        return valor.replace(tzinfo=None).isoformat()
+    return valor
+
+
+def desempaquetar(datos):
+    """
+    Deserializa un cuerpo MessagePack.
+
+    Args:
+        datos (bytes): Cuerpo de la solicitud
+
+    Returns:
+        Estructura de Python con las fechas convertidas a cadenas ISO
+
+    Raises:
+        ValueError: Si el cuerpo no es MessagePack válido
+    """
+    try:
+        return _desde_msgpack(msgpack.unpackb(datos, raw=False, timestamp=3))
+    except (msgpack.ExtraData, msgpack.FormatError, msgpack.StackError, ValueError, TypeError) as error:
+        raise ValueError('El cuerpo MessagePack no es válido') from error
+
+
+def prefiere_msgpack(aceptados):
+    """
+    Indica si, según la cabecera Accept, el cliente prefiere MessagePack a JSON.
+
+    Args:
+        aceptados (MIMEAccept): Tipos aceptados por el cliente
+
+    Returns:
+        bool: True si MessagePack está disponible y es la mejor opción
+    """
+    return msgpack is not None and aceptados.best_match(['application/json', MIME_MSGPACK]) == MIME_MSGPACK
+
+
+def obtener_datos_solicitud():
+    """
+    Obtiene el cuerpo de la solicitud como JSON o MessagePack según su Content-Type.
+
+    Returns:
+        Datos deserializados (o None si el cuerpo JSON está vacío)
+
+    Raises:
+        BadRequest: Si el cuerpo MessagePack no es válido
+        UnsupportedMediaType: Si se envía MessagePack y no está instalado
+    """
+    if request.mimetype in TIPOS_MSGPACK:
+        if msgpack is None:
+            raise UnsupportedMediaType('MessagePack no está disponible en el servidor')
+        datos = request.get_data(cache=True)
+        if not datos:
+            return None
+        try:
+            return desempaquetar(datos)
+        except ValueError as error:
+            raise BadRequest(str(error))
+    return request.get_json()
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON de la aplicación.
+
+    - Las fechas se serializan en ISO 8601 (el proveedor por defecto usa el formato HTTP).
+    - `jsonify` responde en MessagePack en los blueprints de la API si el cliente lo prefiere.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, datetime)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def response(self, *args, **kwargs):
+        if has_request_context() and request.blueprint in BLUEPRINTS_MSGPACK:
+            if prefiere_msgpack(request.accept_mimetypes):
+                datos = self._prepare_response_obj(args, kwargs)
+                respuesta = current_app.response_class(empaquetar(datos), mimetype=MIME_MSGPACK)
+            else:
+                respuesta = super().response(*args, **kwargs)
+            # La representación depende de la cabecera Accept
+            respuesta.vary.add('Accept')
+            return respuesta
+        return super().response(*args, **kwargs)
+
+
+def init_app(app):
+    """
+    Instala el proveedor JSON con soporte de MessagePack.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.json_provider_class = ProveedorJSON
+    app.json = ProveedorJSON(app)
@@ -3,9 +3,30 @@ Módulo de modelos de la aplicación.
 Define los modelos de datos utilizando SQLAlchemy ORM.
 """
 
+import unicodedata
 from datetime import datetime
+from sqlalchemy.orm import validates
 from app import db
 
+
+def normalizar_titulo(titulo):
+    """
+    Normaliza un título para búsquedas por prefijo: minúsculas y sin tildes.
+
+    Args:
+        titulo (str): Título original
+
+    Returns:
+        str: Título normalizado ('' si es None)
+    """
+    descompuesto = unicodedata.normalize('NFKD', (titulo or '').strip().lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _titulo_normalizado_por_defecto(contexto):
+    # Cubre las inserciones masivas (insert(Tarea)) que no pasan por @validates
+    return normalizar_titulo(contexto.get_current_parameters().get('titulo'))
+
 class Usuario(db.Model):
     """
     Modelo que representa a un usuario en el sistema.
@@ -18,35 +39,51 @@ class Usuario(db.Model):
         contrasena (str): Contraseña hasheada del usuario
         creado_en (datetime): Fecha y hora de creación del usuario
         actualizado_en (datetime): Fecha y hora de última actualización
+        ultima_actividad (datetime): Último inicio de sesión o escritura de tareas del usuario
+        total_tareas (int): Número de tareas del usuario (contador desnormalizado)
+        tareas_vencidas (int): Tareas con fecha límite pasada a fecha de la última actualización
     """
     
     __tablename__ = 'usuarios'
 
     id = db.Column(db.Integer, primary_key=True)
     identificacion = db.Column(db.String(20), unique=True, nullable=False)
-    nombre = db.Column(db.String(100), nullable=False)
-    apellido = db.Column(db.String(100), nullable=False)
+    # Indexados para ordenar y filtrar el listado del panel (scripts/verificar_planes.py)
+    nombre = db.Column(db.String(100), nullable=False, index=True)
+    apellido = db.Column(db.String(100), nullable=False, index=True)
     contrasena = db.Column(db.String(255), nullable=False)
-    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Actividad para la purga de cuentas inactivas (app/retencion.py)
+    ultima_actividad = db.Column(db.DateTime, default=datetime.utcnow)
+    # Contadores desnormalizados mantenidos por app/contadores.py (indexados para ordenar el listado)
+    total_tareas = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    tareas_vencidas = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
 
     # Relación con las tareas del usuario
     tareas = db.relationship('Tarea', backref='usuario', lazy=True, cascade="all, delete-orphan")
 
+    # Campos que expone to_dict() y que pueden pedirse con `fields=`
+    CAMPOS_PUBLICOS = ('id', 'identificacion', 'nombre', 'apellido', 'creado_en', 'actualizado_en',
+                       'total_tareas', 'tareas_vencidas')
+
     def to_dict(self):
         """
         Convierte el objeto Usuario a un diccionario.
         
         Returns:
-            dict: Diccionario con los atributos del usuario
+            dict: Diccionario con los atributos del usuario (fechas como date/datetime;
+                  el proveedor JSON de la aplicación las serializa en ISO 8601)
         """
         return {
             'id': self.id,
             'identificacion': self.identificacion,
             'nombre': self.nombre,
             'apellido': self.apellido,
-            'creado_en': self.creado_en.isoformat(),
-            'actualizado_en': self.actualizado_en.isoformat()
+            'creado_en': self.creado_en,
+            'actualizado_en': self.actualizado_en,
+            'total_tareas': self.total_tareas,
+            'tareas_vencidas': self.tareas_vencidas
         }
 
 class Administrador(db.Model):
@@ -78,15 +115,16 @@ class Administrador(db.Model):
         Convierte el objeto Administrador a un diccionario.
         
         Returns:
-            dict: Diccionario con los atributos del administrador
+            dict: Diccionario con los atributos del administrador (fechas como date/datetime;
+                  el proveedor JSON de la aplicación las serializa en ISO 8601)
         """
         return {
             'id': self.id,
             'identificacion': self.identificacion,
             'nombre': self.nombre,
             'apellido': self.apellido,
-            'creado_en': self.creado_en.isoformat(),
-            'actualizado_en': self.actualizado_en.isoformat()
+            'creado_en': self.creado_en,
+            'actualizado_en': self.actualizado_en
         }
 
 class Tarea(db.Model):
@@ -97,6 +135,7 @@ class Tarea(db.Model):
         id (int): Identificador único de la tarea
         usuario_id (int): ID del usuario al que pertenece la tarea
         titulo (str): Título de la tarea
+        titulo_normalizado (str): Título en minúsculas y sin tildes (índice de sugerencias)
         descripcion (str): Descripción detallada de la tarea
         fecha_limite (date): Fecha límite para completar la tarea
         creado_en (datetime): Fecha y hora de creación de la tarea
@@ -106,16 +145,33 @@ class Tarea(db.Model):
     __tablename__ = 'tareas'
 
     id = db.Column(db.Integer, primary_key=True)
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    # active_history: el valor anterior se carga al modificarlos, para que app/contadores.py
+    # ajuste los contadores del usuario aunque el objeto estuviera expirado
+    usuario_id = db.column_property(db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False), active_history=True)
     titulo = db.Column(db.String(100), nullable=False)
+    # Título en minúsculas y sin tildes para las sugerencias por prefijo (GET /tareas/sugerencias)
+    titulo_normalizado = db.Column(db.String(100), nullable=False, default=_titulo_normalizado_por_defecto,
+                                   server_default='')
     descripcion = db.Column(db.Text)
-    fecha_limite = db.Column(db.Date)
+    fecha_limite = db.column_property(db.Column(db.Date), active_history=True)
     creado_en = db.Column(db.DateTime, default=datetime.utcnow)
     actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Restricción única: un usuario no puede tener dos tareas con el mismo título
+    # Índice (usuario_id, fecha_limite): agenda y filtros por rango de fechas
     __table_args__ = (
         db.UniqueConstraint('usuario_id', 'titulo', name='unique_titulo_usuario'),
+        db.Index('ix_tareas_usuario_fecha_limite', 'usuario_id', 'fecha_limite'),
+        # Índice (usuario_id, titulo_normalizado): sugerencias por prefijo. En PostgreSQL,
+        # text_pattern_ops permite usar el índice con LIKE 'prefijo%' sea cual sea la intercalación
+        db.Index('ix_tareas_usuario_titulo_normalizado', 'usuario_id', 'titulo_normalizado',
+                 postgresql_ops={'titulo_normalizado': 'text_pattern_ops'}),
+        # Índice (fecha_limite, id): recorrido por lotes de la ventana de vencimientos
+        # de todos los usuarios que hace el programador de recordatorios
+        db.Index('ix_tareas_fecha_limite', 'fecha_limite', 'id'),
+        # Sin AUTOINCREMENT, SQLite reutiliza el id más alto tras borrarlo y chocaría con
+        # el de una tarea ya archivada (tareas_archivadas conserva el id original)
+        {'sqlite_autoincrement': True},
     )
 
     # Configuración para evitar advertencias de eliminación
@@ -123,19 +179,283 @@ class Tarea(db.Model):
         "confirm_deleted_rows": False
     }
 
+    @validates('titulo')
+    def _normalizar_titulo(self, clave, titulo):
+        self.titulo_normalizado = normalizar_titulo(titulo)
+        return titulo
+
+    # Campos que expone to_dict() y que pueden pedirse con `fields=`
+    CAMPOS_PUBLICOS = ('id', 'usuario_id', 'titulo', 'descripcion', 'fecha_limite', 'creado_en', 'actualizado_en')
+
     def to_dict(self):
         """
         Convierte el objeto Tarea a un diccionario.
         
         Returns:
-            dict: Diccionario con los atributos de la tarea
+            dict: Diccionario con los atributos de la tarea (fechas como date/datetime;
+                  el proveedor JSON de la aplicación las serializa en ISO 8601)
+        """
+        return {
+            'id': self.id,
+            'usuario_id': self.usuario_id,
+            'titulo': self.titulo,
+            'descripcion': self.descripcion,
+            'fecha_limite': self.fecha_limite,
+            'creado_en': self.creado_en,
+            'actualizado_en': self.actualizado_en
+        }
+
+class TareaArchivada(db.Model):
+    """
+    Modelo del archivo frío de tareas: tareas cuya fecha límite venció hace más
+    de ARCHIVO_ANTIGUEDAD_DIAS, movidas fuera de `tareas` por app/archivo.py para
+    que no pesen en los listados ni en el índice único de títulos. Conserva el
+    id original de la tarea.
+
+    Attributes:
+        id (int): Identificador de la tarea original
+        usuario_id (int): ID del usuario al que pertenece la tarea
+        titulo (str): Título de la tarea
+        descripcion (str): Descripción detallada de la tarea
+        fecha_limite (date): Fecha límite de la tarea
+        creado_en (datetime): Fecha y hora de creación de la tarea
+        actualizado_en (datetime): Fecha y hora de última actualización
+        archivado_en (datetime): Fecha y hora en que se archivó
+    """
+
+    __tablename__ = 'tareas_archivadas'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False)
+    titulo = db.Column(db.String(100), nullable=False)
+    descripcion = db.Column(db.Text)
+    fecha_limite = db.Column(db.Date)
+    creado_en = db.Column(db.DateTime)
+    actualizado_en = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tareas_archivadas_usuario_fecha_limite', 'usuario_id', 'fecha_limite'),
+    )
+
+    # Mismos campos públicos que Tarea, para combinar ambos niveles en los listados
+    CAMPOS_PUBLICOS = Tarea.CAMPOS_PUBLICOS
+
+    def to_dict(self):
+        """
+        Convierte el objeto TareaArchivada a un diccionario con el formato de Tarea.
+
+        Returns:
+            dict: Diccionario con los atributos de la tarea y `archivada`
         """
         return {
             'id': self.id,
             'usuario_id': self.usuario_id,
             'titulo': self.titulo,
             'descripcion': self.descripcion,
-            'fecha_limite': self.fecha_limite.isoformat() if self.fecha_limite else None,
-            'creado_en': self.creado_en.isoformat(),
-            'actualizado_en': self.actualizado_en.isoformat()
-        }
\ No newline at end of file
+            'fecha_limite': self.fecha_limite,
+            'creado_en': self.creado_en,
+            'actualizado_en': self.actualizado_en,
+            'archivada': True
+        }
+
+class Trabajo(db.Model):
+    """
+    Modelo de un trabajo en segundo plano (app/trabajos.py): operaciones largas
+    del panel, como el archivado o la reparación de contadores, que no caben en
+    una solicitud HTTP. Guarda el estado, el avance y un punto de control desde
+    el que otro proceso puede reanudar el trabajo si el que lo ejecutaba muere.
+
+    Attributes:
+        id (int): Identificador único del trabajo
+        tipo (str): Tipo de trabajo registrado en app/trabajos.py
+        estado (str): pendiente, en_curso, completado, fallido o cancelado
+        parametros (dict): Parámetros con los que se solicitó el trabajo
+        punto_control (dict): Último punto de control guardado por el trabajo
+        progreso (int): Elementos procesados
+        total (int): Elementos a procesar (None si no se conoce)
+        resultado (dict): Resultado del trabajo completado
+        error (str): Mensaje de error del trabajo fallido
+        cancelacion_solicitada (bool): Si un administrador pidió cancelarlo
+        propietario (str): Proceso que lo ejecuta (host:pid)
+        intentos (int): Veces que un proceso lo ha reclamado
+        latido (datetime): Último avance registrado por su propietario
+        administrador_id (int): Administrador que lo solicitó
+        creado_en (datetime): Fecha y hora de creación
+        iniciado_en (datetime): Fecha y hora del primer inicio
+        finalizado_en (datetime): Fecha y hora de finalización
+    """
+
+    __tablename__ = 'trabajos'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', server_default='pendiente')
+    parametros = db.Column(db.JSON, nullable=False, default=dict)
+    punto_control = db.Column(db.JSON)
+    progreso = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total = db.Column(db.Integer)
+    resultado = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    cancelacion_solicitada = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    propietario = db.Column(db.String(100))
+    intentos = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    latido = db.Column(db.DateTime)
+    administrador_id = db.Column(db.Integer, db.ForeignKey('administradores.id', ondelete='SET NULL'))
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_en = db.Column(db.DateTime)
+    finalizado_en = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Búsqueda de trabajos pendientes o huérfanos por el vigilante
+        db.Index('ix_trabajos_estado_latido', 'estado', 'latido'),
+    )
+
+    def to_dict(self):
+        """
+        Convierte el objeto Trabajo a un diccionario.
+
+        Returns:
+            dict: Diccionario con los atributos públicos del trabajo
+        """
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'parametros': self.parametros,
+            'progreso': self.progreso,
+            'total': self.total,
+            'resultado': self.resultado,
+            'error': self.error,
+            'cancelacion_solicitada': self.cancelacion_solicitada,
+            'intentos': self.intentos,
+            'administrador_id': self.administrador_id,
+            'creado_en': self.creado_en,
+            'iniciado_en': self.iniciado_en,
+            'finalizado_en': self.finalizado_en,
+            'latido': self.latido
+        }
+
+
+class Recordatorio(db.Model):
+    """
+    Modelo de la bandeja de salida de recordatorios (app/recordatorios.py).
+    El programador encola un recordatorio por tarea y fecha límite cuando ésta
+    entra en la ventana de antelación, y los entregadores lo envían después.
+    No tiene clave foránea a la tarea: si la tarea se borra, se archiva o cambia
+    de fecha antes de la entrega, el recordatorio se descarta al entregarlo.
+
+    Attributes:
+        id (int): Identificador único del recordatorio
+        tarea_id (int): Tarea recordada
+        usuario_id (int): Usuario dueño de la tarea
+        titulo (str): Título de la tarea al encolar el recordatorio
+        fecha_limite (date): Fecha límite recordada
+        estado (str): pendiente, entregando, enviado, descartado o fallido
+        intentos (int): Entregas fallidas
+        programado_para (datetime): Momento a partir del cual puede entregarse
+        propietario (str): Proceso que lo está entregando (host:pid)
+        reclamado_en (datetime): Momento en que el propietario lo reclamó
+        enviado_en (datetime): Momento de la entrega
+        error (str): Último error de entrega
+        creado_en (datetime): Fecha y hora en que se encoló
+    """
+
+    __tablename__ = 'recordatorios'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tarea_id = db.Column(db.Integer, nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False)
+    titulo = db.Column(db.String(100), nullable=False)
+    fecha_limite = db.Column(db.Date, nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', server_default='pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    programado_para = db.Column(db.DateTime, nullable=False)
+    propietario = db.Column(db.String(100))
+    reclamado_en = db.Column(db.DateTime)
+    enviado_en = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Un recordatorio por tarea y fecha límite: encolar dos veces no duplica
+        db.UniqueConstraint('tarea_id', 'fecha_limite', name='uq_recordatorios_tarea_fecha'),
+        # Recordatorios listos para entregar, en orden
+        db.Index('ix_recordatorios_estado_programado', 'estado', 'programado_para'),
+    )
+
+
+class MarcaAgua(db.Model):
+    """
+    Modelo de las marcas de agua de los procesos incrementales: hasta dónde se
+    ha procesado ya una secuencia para continuar desde ese punto en la siguiente
+    ejecución (por ejemplo, la última fecha límite escaneada por el programador
+    de recordatorios).
+
+    Attributes:
+        nombre (str): Proceso al que pertenece la marca
+        valor (date): Último valor procesado
+        actualizado_en (datetime): Fecha y hora de la última actualización
+    """
+
+    __tablename__ = 'marcas_agua'
+
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Date, nullable=False)
+    actualizado_en = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EventoAuditoria(db.Model):
+    """
+    Modelo del registro de auditoría de las operaciones administrativas
+    (app/auditoria.py). Los eventos se escriben en segundo plano, por lotes,
+    después de confirmarse la operación que los produjo.
+
+    Attributes:
+        id (int): Identificador único del evento
+        accion (str): Operación realizada (crear_usuario, actualizar_usuario...)
+        entidad (str): Tipo de registro afectado ('usuario', 'administrador')
+        entidad_id (int): Identificador del registro afectado
+        administrador_id (int): Administrador que realizó la operación (sin clave
+            foránea: el registro se conserva aunque el administrador se elimine)
+        datos (dict): Detalle de la operación (nunca contraseñas)
+        ip (str): Dirección IP de la solicitud
+        creado_en (datetime): Momento de la operación (no el de la escritura)
+    """
+
+    __tablename__ = 'eventos_auditoria'
+
+    id = db.Column(db.Integer, primary_key=True)
+    accion = db.Column(db.String(50), nullable=False)
+    entidad = db.Column(db.String(50), nullable=False)
+    entidad_id = db.Column(db.Integer)
+    administrador_id = db.Column(db.Integer)
+    datos = db.Column(db.JSON)
+    ip = db.Column(db.String(45))
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Consulta paginada del panel (más recientes primero) con sus filtros
+        db.Index('ix_eventos_auditoria_creado_en', 'creado_en'),
+        db.Index('ix_eventos_auditoria_administrador', 'administrador_id', 'id'),
+        db.Index('ix_eventos_auditoria_entidad', 'entidad', 'entidad_id', 'id'),
+        db.Index('ix_eventos_auditoria_accion', 'accion', 'id'),
+    )
+
+    def to_dict(self):
+        """
+        Convierte el objeto EventoAuditoria a un diccionario.
+
+        Returns:
+            dict: Diccionario con los atributos del evento
+        """
+        return {
+            'id': self.id,
+            'accion': self.accion,
+            'entidad': self.entidad,
+            'entidad_id': self.entidad_id,
+            'administrador_id': self.administrador_id,
+            'datos': self.datos,
+            'ip': self.ip,
+            'creado_en': self.creado_en
+        }
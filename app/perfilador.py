@@ -0,0 +1,336 @@
+"""
+Módulo del perfilador bajo demanda de solicitudes individuales.
+Permite ver en producción dónde se va el tiempo de una solicitud concreta
+(SQL, serialización, JWT...) sin perfilar el resto del tráfico:
+
+- Un administrador pide una firma (`POST /admin/api/sistema/perfiles/firma`),
+  válida PERFILADOR_VALIDEZ_SEGUNDOS, y la envía en la cabecera `X-Perfilar`
+  (o en el parámetro `_perfilar`) de la solicitud que quiere perfilar. Las
+  solicitudes sin firma válida no pagan nada más que la comprobación de la
+  cabecera.
+- Para esa solicitud se registran el árbol de llamadas con cProfile, las
+  sentencias SQL con su inicio y duración, y las asignaciones de memoria con
+  tracemalloc (las de otros hilos que coincidan en el tiempo también cuentan).
+- Los últimos PERFILADOR_MAXIMO perfiles quedan en memoria del proceso que
+  atendió la solicitud; la respuesta lleva su id en `X-Perfil-Id`. Se
+  consultan en `/admin/api/sistema/perfiles` y se descargan en formato pstats
+  (`python -m pstats`, snakeviz).
+"""
+
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+CABECERA = 'X-Perfilar'
+PARAMETRO = '_perfilar'
+
+# Perfil en curso de la solicitud (lo leen los eventos de los motores)
+perfil_actual = ContextVar('perfil_actual', default=None)
+
+# tracemalloc es global al proceso: se mantiene activo mientras haya algún perfil en curso
+_bloqueo_memoria = threading.Lock()
+_perfiles_con_memoria = 0
+
+
+def _serializador(app):
+    return URLSafeTimedSerializer(app.config['JWT_SECRET_KEY'], salt='perfilador')
+
+
+def firmar(app, administrador_id):
+    """
+    Genera la firma con la que un administrador pide perfilar solicitudes.
+
+    Args:
+        app: Aplicación Flask
+        administrador_id (int): Administrador que la solicita
+
+    Returns:
+        str: Firma para la cabecera X-Perfilar
+    """
+    return _serializador(app).dumps({'administrador_id': administrador_id})
+
+
+def verificar_firma(app, firma):
+    """
+    Returns:
+        int: Administrador que firmó, o None si la firma no es válida o caducó
+    """
+    try:
+        datos = _serializador(app).loads(firma, max_age=app.config['PERFILADOR_VALIDEZ_SEGUNDOS'])
+    except BadSignature:
+        return None
+    return datos.get('administrador_id')
+
+
+def _iniciar_memoria():
+    global _perfiles_con_memoria
+    with _bloqueo_memoria:
+        if _perfiles_con_memoria == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif _perfiles_con_memoria == 0:
+            tracemalloc.reset_peak()
+        _perfiles_con_memoria += 1
+
+
+def _terminar_memoria(lineas):
+    """
+    Toma la instantánea de memoria y detiene tracemalloc si era el último perfil.
+
+    Returns:
+        dict: Pico, memoria en uso y líneas que más memoria retienen
+    """
+    global _perfiles_con_memoria
+    with _bloqueo_memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        instantanea = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        _perfiles_con_memoria -= 1
+        if _perfiles_con_memoria == 0:
+            tracemalloc.stop()
+    return {
+        'pico_kb': round(pico / 1024, 1),
+        'en_uso_kb': round(actual / 1024, 1),
+        'lineas': [
+            {
+                'linea': f'{estadistica.traceback[0].filename}:{estadistica.traceback[0].lineno}',
+                'kb': round(estadistica.size / 1024, 1),
+                'bloques': estadistica.count,
+            }
+            for estadistica in instantanea.statistics('lineno')[:lineas]
+        ],
+    }
+
+
+def _ruta_sin_firma():
+    parametros = [f'{clave}={valor}' for clave, valor in request.args.items(multi=True) if clave != PARAMETRO]
+    return request.path + ('?' + '&'.join(parametros) if parametros else '')
+
+
+def _funciones(estadisticas, limite):
+    """
+    Resume las estadísticas de cProfile: funciones con más tiempo acumulado y a quién llaman.
+
+    Returns:
+        list: Funciones con llamadas, tiempo propio, tiempo acumulado y llamadas salientes
+    """
+    def nombre(funcion):
+        archivo, linea, funcion_nombre = funcion
+        return f'{archivo}:{linea}({funcion_nombre})' if linea else funcion_nombre
+
+    # Llamadas salientes de cada función a partir de sus llamantes
+    llamadas = {}
+    for funcion, (_, _, _, _, llamantes) in estadisticas.stats.items():
+        for llamante, (_, num, _, acumulado) in llamantes.items():
+            llamadas.setdefault(llamante, []).append((acumulado, num, funcion))
+
+    ordenadas = sorted(estadisticas.stats.items(), key=lambda elemento: elemento[1][3], reverse=True)
+    return [
+        {
+            'funcion': nombre(funcion),
+            'llamadas': num,
+            'propio_ms': round(propio * 1000, 3),
+            'acumulado_ms': round(acumulado * 1000, 3),
+            'llama_a': [
+                {'funcion': nombre(llamada), 'llamadas': num_llamada, 'acumulado_ms': round(tiempo * 1000, 3)}
+                for tiempo, num_llamada, llamada in sorted(llamadas.get(funcion, []), key=lambda l: l[0], reverse=True)[:5]
+            ],
+        }
+        for funcion, (_, num, propio, acumulado, _) in ordenadas[:limite]
+    ]
+
+
+class PerfilSolicitud:
+    """
+    Mediciones de una solicitud perfilada.
+    """
+
+    def __init__(self, administrador_id, maximo_sql):
+        self.id = uuid.uuid4().hex[:12]
+        self.administrador_id = administrador_id
+        self.maximo_sql = maximo_sql
+        self.sql = []
+        self.sql_omitidas = 0
+        self.creado_en = datetime.utcnow()
+        self._perfilador = cProfile.Profile()
+        self._memoria = False
+        self._inicio = None
+
+    def iniciar(self):
+        """
+        Returns:
+            bool: False si no se pudo activar cProfile (desde Python 3.12 solo admite
+                un perfilador activo por proceso, así que otra solicitud perfilada a la vez espera su turno)
+        """
+        try:
+            self._perfilador.enable()
+        except ValueError:
+            return False
+        _iniciar_memoria()
+        self._memoria = True
+        self._inicio = time.perf_counter()
+        return True
+
+    def registrar_sql(self, sentencia, inicio, fin):
+        if len(self.sql) >= self.maximo_sql:
+            self.sql_omitidas += 1
+            return
+        self.sql.append({
+            'sentencia': sentencia[:2000],
+            'inicio_ms': round((inicio - self._inicio) * 1000, 3),
+            'duracion_ms': round((fin - inicio) * 1000, 3),
+        })
+
+    def terminar(self, respuesta, configuracion):
+        """
+        Detiene las mediciones y construye el perfil.
+
+        Returns:
+            dict: Perfil con su resumen y el volcado pstats en `pstats`
+        """
+        self._perfilador.disable()
+        duracion = time.perf_counter() - self._inicio
+        memoria = _terminar_memoria(configuracion['PERFILADOR_LINEAS_MEMORIA'])
+        self._memoria = False
+
+        estadisticas = pstats.Stats(self._perfilador, stream=io.StringIO())
+        return {
+            'id': self.id,
+            'metodo': request.method,
+            'ruta': _ruta_sin_firma(),
+            'estado': respuesta.status_code,
+            'duracion_ms': round(duracion * 1000, 3),
+            'sql_total_ms': round(sum(sentencia['duracion_ms'] for sentencia in self.sql), 3),
+            'sql_consultas': len(self.sql) + self.sql_omitidas,
+            'creado_en': self.creado_en,
+            'administrador_id': self.administrador_id,
+            'pid': os.getpid(),
+            'sql': self.sql,
+            'sql_omitidas': self.sql_omitidas,
+            'memoria': memoria,
+            'funciones': _funciones(estadisticas, configuracion['PERFILADOR_FUNCIONES']),
+            # Mismo formato que cProfile.Profile.dump_stats
+            'pstats': marshal.dumps(estadisticas.stats),
+        }
+
+    def abandonar(self):
+        """Detiene las mediciones sin guardar el perfil (la solicitud terminó con una excepción)."""
+        self._perfilador.disable()
+        if self._memoria:
+            _terminar_memoria(0)
+            self._memoria = False
+
+
+class AlmacenPerfiles:
+    """
+    Últimos perfiles del proceso, de forma segura entre hilos.
+    """
+
+    def __init__(self, maximo):
+        self._bloqueo = threading.Lock()
+        self._perfiles = deque(maxlen=maximo)
+
+    def guardar(self, perfil):
+        with self._bloqueo:
+            self._perfiles.append(perfil)
+
+    def obtener(self, perfil_id):
+        with self._bloqueo:
+            return next((perfil for perfil in self._perfiles if perfil['id'] == perfil_id), None)
+
+    def resumen(self):
+        """
+        Returns:
+            list: Datos generales de cada perfil, del más reciente al más antiguo
+        """
+        campos = ('id', 'metodo', 'ruta', 'estado', 'duracion_ms', 'sql_total_ms', 'sql_consultas',
+                  'creado_en', 'administrador_id', 'pid')
+        with self._bloqueo:
+            return [{campo: perfil[campo] for campo in campos} for perfil in reversed(self._perfiles)]
+
+
+def _instrumentar_motor(motor):
+    @event.listens_for(motor, 'before_cursor_execute')
+    def antes(conexion, cursor, sentencia, parametros, contexto, varias):
+        if perfil_actual.get() is not None:
+            conexion.info.setdefault('perfil_inicios', []).append(time.perf_counter())
+
+    @event.listens_for(motor, 'after_cursor_execute')
+    def despues(conexion, cursor, sentencia, parametros, contexto, varias):
+        perfil = perfil_actual.get()
+        inicios = conexion.info.get('perfil_inicios')
+        if perfil is not None and inicios:
+            perfil.registrar_sql(sentencia, inicios.pop(), time.perf_counter())
+
+
+def init_app(app, db):
+    """
+    Registra el perfilador bajo demanda si PERFILADOR_HABILITADO está activo.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy ya inicializada con la aplicación
+    """
+    if not app.config.get('PERFILADOR_HABILITADO'):
+        return
+
+    app.extensions['perfiles'] = AlmacenPerfiles(app.config['PERFILADOR_MAXIMO'])
+    with app.app_context():
+        for motor in db.engines.values():
+            _instrumentar_motor(motor)
+
+    # Registrado antes que el resto de manejadores: su before_request es el primero
+    # y su after_request el último, así que el perfil cubre también la compresión
+    @app.before_request
+    def _iniciar_perfil():
+        firma = request.headers.get(CABECERA) or request.args.get(PARAMETRO)
+        if not firma:
+            return
+        administrador_id = verificar_firma(current_app, firma)
+        if administrador_id is None:
+            logger.debug('Firma de perfilado no válida o caducada')
+            return
+        perfil = PerfilSolicitud(administrador_id, current_app.config['PERFILADOR_MAXIMO_SQL'])
+        if not perfil.iniciar():
+            logger.warning('No se pudo perfilar la solicitud: hay otro perfil en curso')
+            return
+        g.perfil = perfil
+        g.perfil_token = perfil_actual.set(perfil)
+
+    @app.after_request
+    def _terminar_perfil(respuesta):
+        perfil = g.pop('perfil', None)
+        if perfil is None:
+            return respuesta
+        perfil_actual.reset(g.pop('perfil_token'))
+        datos = perfil.terminar(respuesta, current_app.config)
+        current_app.extensions['perfiles'].guardar(datos)
+        respuesta.headers['X-Perfil-Id'] = datos['id']
+        logger.info('Solicitud perfilada', extra={
+            'perfil_id': datos['id'], 'ruta': datos['ruta'], 'duracion_ms': datos['duracion_ms']
+        })
+        return respuesta
+
+    @app.teardown_request
+    def _abandonar_perfil(error):
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            perfil_actual.reset(g.pop('perfil_token'))
+            perfil.abandonar()
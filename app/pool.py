@@ -0,0 +1,179 @@
+"""
+Módulo de estadísticas del pool de conexiones.
+Instrumenta los motores de SQLAlchemy para medir el tiempo de obtención de
+conexiones, el uso de conexiones de desbordamiento (overflow) y los fallos de
+pre-ping, de modo que el tamaño del pool se ajuste con datos reales.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+
+from sqlalchemy import event, exc
+
+# Límites superiores (en milisegundos) del histograma de tiempos de obtención
+LIMITES_ESPERA_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class EstadisticasPool:
+    """
+    Acumula las métricas de un motor de base de datos de forma segura entre hilos.
+    """
+
+    def __init__(self, nombre, motor):
+        """
+        Args:
+            nombre (str): Nombre del motor (bind) en la aplicación
+            motor: Motor de SQLAlchemy instrumentado
+        """
+        self.nombre = nombre
+        self.motor = motor
+        self._bloqueo = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Pone a cero todos los contadores."""
+        with self._bloqueo:
+            self.checkouts = 0
+            self.espera_total_ms = 0.0
+            self.espera_maxima_ms = 0.0
+            self.histograma = [0] * (len(LIMITES_ESPERA_MS) + 1)
+            self.timeouts = 0
+            self.conexiones_nuevas = 0
+            self.invalidaciones = 0
+            self.fallos_pre_ping = 0
+            self.checkouts_con_overflow = 0
+            self.overflow_maximo = 0
+
+    def registrar_espera(self, milisegundos):
+        with self._bloqueo:
+            self.checkouts += 1
+            self.espera_total_ms += milisegundos
+            self.espera_maxima_ms = max(self.espera_maxima_ms, milisegundos)
+            self.histograma[bisect_right(LIMITES_ESPERA_MS, milisegundos)] += 1
+
+    def registrar_overflow(self, overflow):
+        with self._bloqueo:
+            if overflow > 0:
+                self.checkouts_con_overflow += 1
+            self.overflow_maximo = max(self.overflow_maximo, overflow)
+
+    def incrementar(self, contador):
+        with self._bloqueo:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def to_dict(self):
+        """
+        Convierte las estadísticas a un diccionario, incluido el estado actual del pool.
+
+        Returns:
+            dict: Estadísticas acumuladas y estado del pool
+        """
+        pool = self.motor.pool
+        estado = {'clase': type(pool).__name__}
+        # Solo los pools con cola (QueuePool) tienen tamaño y overflow
+        if hasattr(pool, 'size') and hasattr(pool, 'overflow'):
+            estado.update({
+                'tamano': pool.size(),
+                'en_uso': pool.checkedout(),
+                'disponibles': pool.checkedin(),
+                'overflow_actual': max(pool.overflow(), 0),
+                'max_overflow': getattr(pool, '_max_overflow', None),
+                'timeout': pool.timeout(),
+            })
+
+        with self._bloqueo:
+            etiquetas = [f'<{limite}ms' for limite in LIMITES_ESPERA_MS] + [f'>={LIMITES_ESPERA_MS[-1]}ms']
+            return {
+                'motor': self.nombre,
+                'pool': estado,
+                'checkouts': self.checkouts,
+                'espera_media_ms': round(self.espera_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'espera_maxima_ms': round(self.espera_maxima_ms, 3),
+                'histograma_espera': dict(zip(etiquetas, self.histograma)),
+                'timeouts': self.timeouts,
+                'conexiones_nuevas': self.conexiones_nuevas,
+                'invalidaciones': self.invalidaciones,
+                'fallos_pre_ping': self.fallos_pre_ping,
+                'checkouts_con_overflow': self.checkouts_con_overflow,
+                'overflow_maximo': self.overflow_maximo,
+            }
+
+
+def instrumentar_motor(nombre, motor):
+    """
+    Registra los eventos y envoltorios que alimentan las estadísticas de un motor.
+
+    El tiempo de obtención se mide alrededor de `raw_connection`, por lo que incluye
+    la espera en la cola del pool y, si está activo, el pre-ping.
+
+    Args:
+        nombre (str): Nombre del motor (bind)
+        motor: Motor de SQLAlchemy
+
+    Returns:
+        EstadisticasPool: Estadísticas asociadas al motor
+    """
+    estadisticas = EstadisticasPool(nombre, motor)
+    raw_connection = motor.raw_connection
+
+    def raw_connection_medida():
+        inicio = time.perf_counter()
+        try:
+            return raw_connection()
+        except exc.TimeoutError:
+            estadisticas.incrementar('timeouts')
+            raise
+        finally:
+            estadisticas.registrar_espera((time.perf_counter() - inicio) * 1000)
+
+    motor.raw_connection = raw_connection_medida
+
+    @event.listens_for(motor, 'connect')
+    def al_conectar(dbapi_connection, connection_record):
+        estadisticas.incrementar('conexiones_nuevas')
+
+    @event.listens_for(motor, 'checkout')
+    def al_obtener(dbapi_connection, connection_record, connection_proxy):
+        pool = motor.pool
+        if hasattr(pool, 'overflow'):
+            estadisticas.registrar_overflow(pool.overflow())
+
+    @event.listens_for(motor, 'invalidate')
+    def al_invalidar(dbapi_connection, connection_record, exception):
+        estadisticas.incrementar('invalidaciones')
+
+    @event.listens_for(motor, 'handle_error')
+    def al_fallar(contexto):
+        if contexto.is_pre_ping:
+            estadisticas.incrementar('fallos_pre_ping')
+
+    return estadisticas
+
+
+def obtener_estadisticas(app):
+    """
+    Devuelve las estadísticas de todos los motores de la aplicación.
+
+    Args:
+        app: Aplicación Flask
+
+    Returns:
+        list: Estadísticas de cada motor en formato diccionario
+    """
+    return [estadisticas.to_dict() for estadisticas in app.extensions['estadisticas_pool'].values()]
+
+
+def init_app(app, db):
+    """
+    Instrumenta los motores de la aplicación.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy ya inicializada con la aplicación
+    """
+    app.extensions['estadisticas_pool'] = {}
+    with app.app_context():
+        for bind, motor in db.engines.items():
+            nombre = bind or 'principal'
+            app.extensions['estadisticas_pool'][nombre] = instrumentar_motor(nombre, motor)
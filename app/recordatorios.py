@@ -0,0 +1,493 @@
+"""
+Módulo del programador de recordatorios de fecha límite.
+
+Avisa a los usuarios RECORDATORIOS_ANTELACION_DIAS antes de la fecha límite de
+sus tareas sin recorrer cada vez la tabla `tareas` completa:
+
+- Escaneo incremental: una marca de agua (`marcas_agua`) guarda la última fecha
+  límite ya escaneada. Cada ciclo recorre solo la ventana que acaba de entrar en
+  la antelación, (marca, hoy + antelación], por lotes ordenados por
+  (fecha_limite, id) sobre el índice `ix_tareas_fecha_limite`, y encola un
+  recordatorio por tarea en la bandeja de salida (`recordatorios`) con una
+  transacción corta por lote. Después avanza la marca.
+- Tareas tardías: las que se crean o cambian de fecha dentro de una ventana ya
+  escaneada se encolan en la misma transacción que las guarda (eventos del
+  mapper). Encolar es idempotente (una fila por tarea y fecha límite).
+- Entrega: los recordatorios pendientes se reclaman con un UPDATE condicional
+  (varios procesos pueden drenar la bandeja a la vez) y se pasan al entregador
+  RECORDATORIOS_ENTREGADOR, registrado con @entregador. Si la tarea ya no existe
+  o cambió de fecha, el recordatorio se descarta; si la entrega falla, se
+  reintenta con espera exponencial hasta RECORDATORIOS_MAXIMO_INTENTOS.
+
+Se ejecuta fuera de las solicitudes: `flask recordatorios ejecutar` hace un
+ciclo (cron) y `flask recordatorios trabajador` repite ciclos cada
+RECORDATORIOS_INTERVALO segundos. Ambos aceptan `--ahora` para fijar el reloj
+del programador (fijar_reloj), que usan tanto los ciclos como el encolado de
+las tareas tardías.
+Cada ciclo devuelve y registra sus métricas (tareas escaneadas, recordatorios
+encolados y entregados por segundo).
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, inspect, select, tuple_, update
+
+from app.modelos import MarcaAgua, Recordatorio, Tarea
+
+logger = logging.getLogger(__name__)
+
+MARCA_RECORDATORIOS = 'recordatorios'
+
+_recordatorios = Recordatorio.__table__
+
+# Entregadores registrados: nombre -> función que recibe un Recordatorio
+ENTREGADORES = {}
+
+# Reloj del programador (función sin argumentos que devuelve un datetime)
+_reloj = datetime.now
+
+
+def fijar_reloj(reloj=None):
+    """
+    Fija el reloj del programador para los ciclos y las tareas tardías.
+
+    Args:
+        reloj (callable, optional): Función que devuelve la hora actual
+            (None vuelve a la hora real)
+    """
+    global _reloj
+    _reloj = reloj or datetime.now
+
+
+def hora_actual():
+    """
+    Returns:
+        datetime: Hora actual según el reloj del programador
+    """
+    return _reloj()
+
+
+def entregador(nombre):
+    """
+    Decorador que registra una función de entrega de recordatorios.
+    La función recibe el Recordatorio y lanza una excepción si no pudo entregarlo.
+
+    Args:
+        nombre (str): Nombre con el que se elige en RECORDATORIOS_ENTREGADOR
+    """
+    def registrar(funcion):
+        ENTREGADORES[nombre] = funcion
+        return funcion
+    return registrar
+
+
+@entregador('bitacora')
+def entregar_en_bitacora(recordatorio):
+    """Entregador por defecto: registra el recordatorio en la bitácora."""
+    logger.info('Recordatorio de fecha límite', extra={
+        'usuario_id': recordatorio.usuario_id,
+        'tarea_id': recordatorio.tarea_id,
+        'fecha_limite': recordatorio.fecha_limite.isoformat(),
+    })
+
+
+def insertar_recordatorios(conexion, filas):
+    """
+    Encola recordatorios omitiendo los que ya existen para la misma tarea y fecha.
+
+    Args:
+        conexion: Conexión o sesión de SQLAlchemy
+        filas (list): Diccionarios con las columnas del recordatorio
+
+    Returns:
+        int: Recordatorios encolados
+    """
+    if not filas:
+        return 0
+    dialecto = (conexion.get_bind() if hasattr(conexion, 'get_bind') else conexion).dialect.name
+    if dialecto in ('postgresql', 'sqlite'):
+        if dialecto == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as insertar
+        else:
+            from sqlalchemy.dialects.sqlite import insert as insertar
+        sentencia = insertar(_recordatorios).values(filas).on_conflict_do_nothing(
+            index_elements=['tarea_id', 'fecha_limite']
+        )
+        return conexion.execute(sentencia).rowcount
+
+    # Otros motores: se filtran antes los que ya están encolados
+    existentes = set(conexion.execute(
+        select(_recordatorios.c.tarea_id, _recordatorios.c.fecha_limite)
+        .where(_recordatorios.c.tarea_id.in_([fila['tarea_id'] for fila in filas]))
+    ).all())
+    nuevas = [fila for fila in filas if (fila['tarea_id'], fila['fecha_limite']) not in existentes]
+    if nuevas:
+        conexion.execute(insert(_recordatorios), nuevas)
+    return len(nuevas)
+
+
+def _fila_recordatorio(tarea_id, usuario_id, titulo, fecha_limite, ahora):
+    return {
+        'tarea_id': tarea_id,
+        'usuario_id': usuario_id,
+        'titulo': titulo,
+        'fecha_limite': fecha_limite,
+        'estado': 'pendiente',
+        'intentos': 0,
+        'programado_para': ahora,
+        'creado_en': ahora,
+    }
+
+
+def escanear_vencimientos(sesion, ahora, antelacion_dias, tamano_lote):
+    """
+    Encola los recordatorios de las tareas cuya fecha límite entró en la ventana
+    de antelación desde el último escaneo y avanza la marca de agua.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        ahora (datetime): Momento de referencia (reloj del programador)
+        antelacion_dias (int): Días de antelación del recordatorio
+        tamano_lote (int): Tareas por lote (una transacción por lote)
+
+    Returns:
+        dict: Ventana escaneada, tareas escaneadas, recordatorios encolados y lotes
+    """
+    hoy = ahora.date()
+    hasta = hoy + timedelta(days=antelacion_dias)
+    marca = sesion.get(MarcaAgua, MARCA_RECORDATORIOS)
+    # Sin marca, o con el programador detenido varios días, no se avisa de tareas ya vencidas
+    desde = max(marca.valor, hoy - timedelta(days=1)) if marca else hoy - timedelta(days=1)
+    resultado = {'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'escaneadas': 0, 'encolados': 0, 'lotes': 0}
+    if desde >= hasta:
+        return resultado
+
+    # Recorrido por lotes con paginación por clave (fecha_limite, id) sobre ix_tareas_fecha_limite
+    ultimo = None
+    while True:
+        consulta = (
+            select(Tarea.id, Tarea.usuario_id, Tarea.titulo, Tarea.fecha_limite)
+            .where(Tarea.fecha_limite > desde, Tarea.fecha_limite <= hasta)
+            .order_by(Tarea.fecha_limite, Tarea.id)
+            .limit(tamano_lote)
+        )
+        if ultimo:
+            consulta = consulta.where(tuple_(Tarea.fecha_limite, Tarea.id) > ultimo)
+        filas = sesion.execute(consulta).all()
+        if not filas:
+            break
+
+        try:
+            resultado['encolados'] += insertar_recordatorios(sesion, [
+                _fila_recordatorio(fila.id, fila.usuario_id, fila.titulo, fila.fecha_limite, ahora) for fila in filas
+            ])
+            sesion.commit()
+        except Exception:
+            sesion.rollback()
+            raise
+        resultado['escaneadas'] += len(filas)
+        resultado['lotes'] += 1
+        ultimo = (filas[-1].fecha_limite, filas[-1].id)
+        if len(filas) < tamano_lote:
+            break
+
+    if marca is None:
+        sesion.add(MarcaAgua(nombre=MARCA_RECORDATORIOS, valor=hasta))
+    else:
+        marca.valor = hasta
+    sesion.commit()
+    return resultado
+
+
+def drenar_bandeja(sesion, entregar, ahora, tamano_lote, maximo_intentos, reintento_segundos,
+                   expiracion_reclamo, propietario):
+    """
+    Entrega los recordatorios pendientes cuyo momento programado ya llegó.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        entregar (callable): Entregador que recibe cada Recordatorio
+        ahora (datetime): Momento de referencia (reloj del programador)
+        tamano_lote (int): Recordatorios reclamados por lote
+        maximo_intentos (int): Entregas fallidas tras las que se marca como fallido
+        reintento_segundos (int): Espera antes del primer reintento (se duplica en cada uno)
+        expiracion_reclamo (int): Segundos tras los que un reclamo sin terminar se libera
+        propietario (str): Identificador de este proceso (host:pid)
+
+    Returns:
+        dict: Recordatorios enviados, descartados, reintentados y fallidos
+    """
+    resultado = {'enviados': 0, 'descartados': 0, 'reintentos': 0, 'fallidos': 0}
+
+    # Reclamos de procesos que murieron a mitad de una entrega
+    sesion.execute(
+        update(Recordatorio)
+        .where(Recordatorio.estado == 'entregando',
+               Recordatorio.reclamado_en < ahora - timedelta(seconds=expiracion_reclamo))
+        .values(estado='pendiente', propietario=None)
+    )
+    sesion.commit()
+
+    while True:
+        ids = sesion.execute(
+            select(Recordatorio.id)
+            .where(Recordatorio.estado == 'pendiente', Recordatorio.programado_para <= ahora)
+            .order_by(Recordatorio.programado_para, Recordatorio.id)
+            .limit(tamano_lote)
+        ).scalars().all()
+        if not ids:
+            break
+
+        # Reclamo condicional: solo se queda con los que siguen pendientes
+        sesion.execute(
+            update(Recordatorio)
+            .where(Recordatorio.id.in_(ids), Recordatorio.estado == 'pendiente')
+            .values(estado='entregando', propietario=propietario, reclamado_en=ahora)
+        )
+        sesion.commit()
+        lote = sesion.execute(
+            select(Recordatorio)
+            .where(Recordatorio.id.in_(ids), Recordatorio.estado == 'entregando',
+                   Recordatorio.propietario == propietario)
+            .order_by(Recordatorio.id)
+        ).scalars().all()
+
+        # Fecha límite actual de las tareas: se descartan las borradas, archivadas o cambiadas
+        vigentes = dict(sesion.execute(
+            select(Tarea.id, Tarea.fecha_limite).where(Tarea.id.in_([r.tarea_id for r in lote]))
+        ).all())
+
+        for recordatorio in lote:
+            recordatorio.propietario = None
+            if vigentes.get(recordatorio.tarea_id) != recordatorio.fecha_limite:
+                recordatorio.estado = 'descartado'
+                resultado['descartados'] += 1
+                continue
+            try:
+                entregar(recordatorio)
+            except Exception as e:
+                recordatorio.intentos += 1
+                recordatorio.error = str(e)[:1000]
+                if recordatorio.intentos >= maximo_intentos:
+                    recordatorio.estado = 'fallido'
+                    resultado['fallidos'] += 1
+                    logger.warning('Recordatorio no entregado', extra={'recordatorio_id': recordatorio.id, 'error': str(e)})
+                else:
+                    recordatorio.estado = 'pendiente'
+                    recordatorio.programado_para = ahora + timedelta(
+                        seconds=reintento_segundos * 2 ** (recordatorio.intentos - 1))
+                    resultado['reintentos'] += 1
+            else:
+                recordatorio.estado = 'enviado'
+                recordatorio.enviado_en = ahora
+                resultado['enviados'] += 1
+        sesion.commit()
+
+        if len(ids) < tamano_lote:
+            break
+    return resultado
+
+
+def purgar_entregados(sesion, ahora, retencion_dias, tamano_lote):
+    """
+    Borra por lotes los recordatorios terminados hace más de `retencion_dias`,
+    para que la bandeja conserve solo los recientes.
+
+    Returns:
+        int: Recordatorios borrados
+    """
+    fecha_corte = ahora.date() - timedelta(days=retencion_dias)
+    total = 0
+    while True:
+        ids = sesion.execute(
+            select(Recordatorio.id)
+            .where(Recordatorio.estado.in_(('enviado', 'descartado', 'fallido')),
+                   Recordatorio.fecha_limite < fecha_corte)
+            .limit(tamano_lote)
+        ).scalars().all()
+        if not ids:
+            return total
+        sesion.execute(delete(Recordatorio).where(Recordatorio.id.in_(ids)))
+        sesion.commit()
+        total += len(ids)
+
+
+def ejecutar_ciclo(sesion, ahora=None, propietario=None):
+    """
+    Ejecuta un ciclo completo con la configuración de la aplicación:
+    escaneo de la ventana nueva, entrega de la bandeja y purga de los antiguos.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        ahora (datetime, optional): Reloj del ciclo (por defecto el del programador)
+        propietario (str, optional): Identificador del proceso (por defecto host:pid)
+
+    Returns:
+        dict: Métricas del ciclo, con duraciones y rendimiento por segundo
+    """
+    configuracion = current_app.config
+    ahora = ahora or hora_actual()
+    propietario = propietario or f'{socket.gethostname()}:{os.getpid()}'
+    entregar = ENTREGADORES[configuracion['RECORDATORIOS_ENTREGADOR']]
+
+    inicio = time.perf_counter()
+    escaneo = escanear_vencimientos(
+        sesion, ahora, configuracion['RECORDATORIOS_ANTELACION_DIAS'], configuracion['RECORDATORIOS_TAMANO_LOTE']
+    )
+    tras_escaneo = time.perf_counter()
+    entrega = drenar_bandeja(
+        sesion, entregar, ahora,
+        configuracion['RECORDATORIOS_TAMANO_LOTE'],
+        configuracion['RECORDATORIOS_MAXIMO_INTENTOS'],
+        configuracion['RECORDATORIOS_REINTENTO_SEGUNDOS'],
+        configuracion['RECORDATORIOS_EXPIRACION_RECLAMO'],
+        propietario,
+    )
+    tras_entrega = time.perf_counter()
+    purgados = purgar_entregados(
+        sesion, ahora, configuracion['RECORDATORIOS_RETENCION_DIAS'], configuracion['RECORDATORIOS_TAMANO_LOTE']
+    )
+
+    segundos_escaneo = tras_escaneo - inicio
+    segundos_entrega = tras_entrega - tras_escaneo
+    metricas = {
+        'ahora': ahora.isoformat(),
+        **escaneo,
+        **entrega,
+        'purgados': purgados,
+        'segundos_escaneo': round(segundos_escaneo, 4),
+        'segundos_entrega': round(segundos_entrega, 4),
+        'escaneadas_por_segundo': round(escaneo['escaneadas'] / segundos_escaneo, 1) if segundos_escaneo else None,
+        'entregados_por_segundo': round(entrega['enviados'] / segundos_entrega, 1) if segundos_entrega else None,
+    }
+    logger.info('Ciclo de recordatorios', extra=metricas)
+    return metricas
+
+
+def estadisticas(sesion):
+    """
+    Estado de la bandeja de salida y de la marca de agua.
+
+    Returns:
+        dict: Recordatorios por estado, pendiente más antiguo y última fecha escaneada
+    """
+    por_estado = dict(sesion.execute(
+        select(Recordatorio.estado, func.count(Recordatorio.id)).group_by(Recordatorio.estado)
+    ).all())
+    mas_antiguo = sesion.scalar(
+        select(func.min(Recordatorio.programado_para)).where(Recordatorio.estado == 'pendiente')
+    )
+    marca = sesion.get(MarcaAgua, MARCA_RECORDATORIOS)
+    return {
+        'por_estado': por_estado,
+        'pendiente_mas_antiguo': mas_antiguo,
+        'marca': marca.valor if marca else None,
+    }
+
+
+def _proximo_a_vencer(fecha_limite):
+    """
+    Indica si una tarea guardada ahora ya cae en la ventana de antelación,
+    según el reloj del programador.
+    """
+    if fecha_limite is None or not has_app_context():
+        return False
+    configuracion = current_app.config
+    if not configuracion.get('RECORDATORIOS_HABILITADOS'):
+        return False
+    hoy = hora_actual().date()
+    return hoy <= fecha_limite <= hoy + timedelta(days=configuracion['RECORDATORIOS_ANTELACION_DIAS'])
+
+
+def _encolar_tardio(conexion, tarea):
+    insertar_recordatorios(conexion, [
+        _fila_recordatorio(tarea.id, tarea.usuario_id, tarea.titulo, tarea.fecha_limite, hora_actual())
+    ])
+
+
+@event.listens_for(Tarea, 'after_insert')
+def _tarea_insertada(mapper, conexion, tarea):
+    if _proximo_a_vencer(tarea.fecha_limite):
+        _encolar_tardio(conexion, tarea)
+
+
+@event.listens_for(Tarea, 'after_update')
+def _tarea_actualizada(mapper, conexion, tarea):
+    if inspect(tarea).attrs.fecha_limite.history.has_changes() and _proximo_a_vencer(tarea.fecha_limite):
+        _encolar_tardio(conexion, tarea)
+
+
+def _fijar_reloj_comando(ahora):
+    """
+    Fija el reloj del programador del comando: `--ahora` si se indicó, real si no.
+    """
+    fijar_reloj((lambda: ahora) if ahora is not None else None)
+
+
+recordatorios_cli = AppGroup('recordatorios', help='Recordatorios de fecha límite.')
+
+
+@recordatorios_cli.command('ejecutar')
+@click.option('--ahora', type=click.DateTime(), default=None, help='Fija el reloj del ciclo (pruebas).')
+def ejecutar_comando(ahora):
+    """Ejecuta un ciclo de escaneo y entrega (para cron)."""
+    from app import db
+    _fijar_reloj_comando(ahora)
+    metricas = ejecutar_ciclo(db.session)
+    click.echo(_resumen(metricas))
+
+
+@recordatorios_cli.command('trabajador')
+@click.option('--intervalo', type=float, default=None, help='Segundos entre ciclos (por defecto RECORDATORIOS_INTERVALO).')
+@click.option('--ahora', type=click.DateTime(), default=None, help='Fija el reloj de todos los ciclos (pruebas).')
+@click.option('--ciclos', type=int, default=None, help='Número máximo de ciclos.')
+def trabajador_comando(intervalo, ahora, ciclos):
+    """Repite ciclos de escaneo y entrega hasta recibir SIGTERM o SIGINT."""
+    from app import db
+    intervalo = intervalo if intervalo is not None else current_app.config['RECORDATORIOS_INTERVALO']
+    _fijar_reloj_comando(ahora)
+    detener = threading.Event()
+    for senal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(senal, lambda *_: detener.set())
+
+    ejecutados = 0
+    while not detener.is_set() and (ciclos is None or ejecutados < ciclos):
+        try:
+            click.echo(_resumen(ejecutar_ciclo(db.session)))
+        except Exception as e:
+            db.session.rollback()
+            logger.error('Error en el ciclo de recordatorios: %s', e, exc_info=True)
+        finally:
+            db.session.remove()
+        ejecutados += 1
+        if ciclos is None or ejecutados < ciclos:
+            detener.wait(intervalo)
+
+
+def _resumen(metricas):
+    return (f"[{metricas['ahora']}] ventana {metricas['desde']}..{metricas['hasta']}: "
+            f"{metricas['escaneadas']} escaneadas, {metricas['encolados']} encolados, "
+            f"{metricas['enviados']} enviados, {metricas['descartados']} descartados, "
+            f"{metricas['reintentos']} reintentos, {metricas['fallidos']} fallidos, "
+            f"{metricas['purgados']} purgados "
+            f"({metricas['escaneadas_por_segundo']} escaneadas/s, {metricas['entregados_por_segundo']} enviados/s)")
+
+
+def init_app(app):
+    """
+    Registra el comando `flask recordatorios`.
+    Los eventos que encolan las tareas tardías se registran al importar el módulo.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.cli.add_command(recordatorios_cli)
@@ -0,0 +1,178 @@
+"""
+Módulo de enrutamiento a réplicas de lectura.
+Envía las consultas de los endpoints de solo lectura a la base de datos réplica
+(bind 'replica') y el resto al primario. Tras una escritura del propio usuario
+sus lecturas van al primario durante una ventana corta (lectura de las propias
+escrituras) y, si la réplica no responde, se usa el primario temporalmente.
+"""
+
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Nombre del bind de la réplica en SQLALCHEMY_BINDS
+BIND_REPLICA = 'replica'
+
+# Cookie que indica hasta cuándo (timestamp) leer del primario
+COOKIE_LECTURA_PRIMARIA = 'lectura_primaria_hasta'
+
+METODOS_ESCRITURA = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class SesionEnrutada(Session):
+    """
+    Sesión que usa el motor de la réplica cuando la solicitud actual lo permite.
+    Las escrituras (flush) siempre van al primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and g.get('usar_replica')
+        ):
+            motor = self._db.engines.get(BIND_REPLICA)
+            if motor is not None:
+                return motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class _EstadoReplica:
+    """
+    Estado compartido del proceso: escrituras recientes por usuario y disponibilidad
+    de la réplica (cortocircuito tras un fallo de conexión).
+    """
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self.escrituras_recientes = {}
+        self.caida_hasta = 0.0
+
+    def marcar_escritura(self, clave, hasta):
+        with self._bloqueo:
+            if len(self.escrituras_recientes) > 10000:
+                ahora = time.time()
+                self.escrituras_recientes = {
+                    k: v for k, v in self.escrituras_recientes.items() if v > ahora
+                }
+            self.escrituras_recientes[clave] = hasta
+
+    def escritura_reciente(self, clave):
+        return self.escrituras_recientes.get(clave, 0.0) > time.time()
+
+    def marcar_caida(self, segundos):
+        self.caida_hasta = time.time() + segundos
+
+    def disponible(self):
+        return time.time() >= self.caida_hasta
+
+
+def _clave_usuario():
+    """
+    Identifica al autor de la solicitud a partir de su token (cabecera o cookie).
+
+    Returns:
+        str | None: Huella del token o None si la solicitud es anónima
+    """
+    token = None
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        token = auth_header.split(' ')[1]
+    token = token or request.cookies.get('admin_token') or request.cookies.get('token')
+    if not token:
+        return None
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _debe_leer_primario(estado):
+    """
+    Indica si la solicitud actual debe leer del primario.
+
+    Returns:
+        bool: True si hay una escritura reciente del usuario o la réplica no está disponible
+    """
+    if not estado.disponible():
+        return True
+    try:
+        if float(request.cookies.get(COOKIE_LECTURA_PRIMARIA, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    clave = _clave_usuario()
+    return clave is not None and estado.escritura_reciente(clave)
+
+
+def lectura_replica(vista):
+    """
+    Decorador para endpoints de solo lectura: sus consultas GET se envían a la réplica.
+
+    Si la réplica falla durante la solicitud, se descarta la transacción y la vista
+    se ejecuta de nuevo contra el primario.
+    """
+    @wraps(vista)
+    def envoltorio(*args, **kwargs):
+        estado = current_app.extensions.get('replicas')
+        if estado is None or request.method != 'GET' or _debe_leer_primario(estado):
+            return vista(*args, **kwargs)
+
+        g.usar_replica = True
+        try:
+            respuesta = vista(*args, **kwargs)
+        except Exception:
+            if not g.get('fallo_replica'):
+                raise
+            respuesta = None
+        finally:
+            g.usar_replica = False
+
+        if g.pop('fallo_replica', False):
+            current_app.extensions['sqlalchemy'].session.rollback()
+            respuesta = vista(*args, **kwargs)
+        return respuesta
+
+    return envoltorio
+
+
+def init_app(app, db):
+    """
+    Activa el enrutamiento si hay una réplica configurada en SQLALCHEMY_BINDS.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy ya inicializada con la aplicación
+    """
+    if BIND_REPLICA not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    estado = _EstadoReplica()
+    app.extensions['replicas'] = estado
+
+    with app.app_context():
+        motor = db.engines[BIND_REPLICA]
+
+    @event.listens_for(motor, 'handle_error')
+    def al_fallar_replica(contexto):
+        # Solo los errores de conexión indican que la réplica no está disponible
+        if contexto.is_disconnect or contexto.connection is None:
+            estado.marcar_caida(app.config['REPLICA_REINTENTO_SEGUNDOS'])
+            if has_request_context():
+                g.fallo_replica = True
+
+    @app.after_request
+    def registrar_escritura(respuesta):
+        if request.method in METODOS_ESCRITURA and respuesta.status_code < 400:
+            ventana = app.config['REPLICA_VENTANA_LECTURA_PROPIA']
+            hasta = time.time() + ventana
+            clave = _clave_usuario()
+            if clave is not None:
+                estado.marcar_escritura(clave, hasta)
+            respuesta.set_cookie(
+                COOKIE_LECTURA_PRIMARIA, f'{hasta:.3f}', max_age=ventana, httponly=True, samesite='Lax'
+            )
+        return respuesta
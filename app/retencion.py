@@ -0,0 +1,368 @@
+"""
+Módulo de retención de cuentas inactivas.
+Elimina los usuarios sin actividad desde hace más de RETENCION_INACTIVIDAD_DIAS
+junto con sus tareas, tareas archivadas y recordatorios, sin pasar por la
+cascada del ORM (que cargaría todas las tareas en memoria y mantendría los
+bloqueos durante toda la operación):
+
+- Los usuarios se recorren por id (paginación por clave) en grupos de
+  RETENCION_LOTE_USUARIOS.
+- Las tareas de cada grupo se borran en lotes de RETENCION_LOTE_FILAS por id,
+  con una transacción corta por lote.
+- Después, los usuarios que siguen inactivos y ya no tienen tareas se borran
+  junto con sus tareas archivadas y recordatorios en una sola transacción (en
+  subgrupos de unas RETENCION_LOTE_FILAS filas), con las filas de los usuarios
+  bloqueadas: el archivo y los recordatorios solo se borran cuando es seguro
+  que el usuario también se borra.
+- Entre lotes se cede la base de datos: al menos RETENCION_PAUSA_SEGUNDOS, y
+  más si el lote tardó (RETENCION_CARGA_MAXIMA es la fracción del tiempo que
+  la purga puede estar trabajando), de modo que con la base cargada la purga
+  se frena sola.
+
+La actividad de un usuario es `usuarios.ultima_actividad`, que las rutas
+actualizan con `sentencia_actividad()` al iniciar sesión, al renovarla y al
+crear, modificar o eliminar tareas (en la misma transacción que la tarea). Cada
+borrado vuelve a comprobar la inactividad, así que un usuario que vuelve a
+escribir mientras la purga está en curso conserva la cuenta, el archivo, los
+recordatorios y las tareas que aún no se habían borrado.
+
+Se ejecuta con `flask purgar-inactivos` o como trabajo `purgar-inactivos` del panel.
+Ninguno de los dos admite menos de RETENCION_MINIMO_DIAS días de inactividad.
+"""
+
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, exists, func, select, update
+
+from app.modelos import Recordatorio, Tarea, TareaArchivada, Usuario
+
+# Filas dependientes que se borran por lotes antes que el usuario: (clave del resumen, modelo)
+DEPENDIENTES = (
+    ('tareas', Tarea),
+)
+
+# Filas dependientes que se borran en la misma transacción que el usuario
+FINALES = (
+    ('recordatorios', Recordatorio),
+    ('archivadas', TareaArchivada),
+)
+
+_usuarios = Usuario.__table__
+
+
+def sentencia_actividad(usuario_id, ahora=None):
+    """
+    Construye el UPDATE que registra la actividad de un usuario.
+
+    Args:
+        usuario_id (int): Usuario que inicia sesión o escribe tareas
+        ahora (datetime, optional): Momento de la actividad (por defecto la hora actual)
+
+    Returns:
+        Update: Sentencia que fija `ultima_actividad`
+    """
+    return (
+        update(_usuarios)
+        .where(_usuarios.c.id == usuario_id)
+        .values(
+            ultima_actividad=ahora or datetime.utcnow(),
+            # La actividad no es una modificación del usuario (ver app/contadores.py)
+            actualizado_en=_usuarios.c.actualizado_en,
+        )
+    )
+
+
+def _actividad():
+    # actualizado_en solo cubre las filas anteriores a la columna que aún no se rellenaron
+    return func.coalesce(Usuario.ultima_actividad, Usuario.actualizado_en, Usuario.creado_en)
+
+
+def condicion_inactivo(fecha_corte):
+    """
+    Condición SQL de usuario inactivo: sin actividad desde la fecha de corte.
+
+    Args:
+        fecha_corte (datetime): Última actividad admitida para considerar inactivo al usuario
+    """
+    return _actividad() < fecha_corte
+
+
+def contar_inactivos(sesion, fecha_corte):
+    """
+    Returns:
+        int: Número de usuarios inactivos a la fecha de corte
+    """
+    return sesion.scalar(select(func.count(Usuario.id)).where(condicion_inactivo(fecha_corte)))
+
+
+def seleccionar_inactivos(sesion, fecha_corte, despues_de, limite):
+    """
+    Siguiente grupo de usuarios inactivos en orden de id.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        fecha_corte (datetime): Última actividad admitida
+        despues_de (int): Se devuelven usuarios con id mayor que este
+        limite (int): Número máximo de usuarios
+
+    Returns:
+        list: Ids de los usuarios
+    """
+    ids = sesion.execute(
+        select(Usuario.id)
+        .where(Usuario.id > despues_de, condicion_inactivo(fecha_corte))
+        .order_by(Usuario.id)
+        .limit(limite)
+    ).scalars().all()
+    # La lectura no debe mantener abierta una transacción durante las pausas
+    sesion.commit()
+    return ids
+
+
+def _borrar_lote(sesion, modelo, usuario_ids, fecha_corte, tamano_lote):
+    """
+    Borra en una transacción un lote de filas de `modelo` de los usuarios que siguen inactivos.
+
+    Returns:
+        int: Filas borradas
+    """
+    vigentes = select(Usuario.id).where(Usuario.id.in_(usuario_ids), condicion_inactivo(fecha_corte))
+    ids = sesion.execute(
+        select(modelo.id)
+        .where(modelo.usuario_id.in_(vigentes))
+        .order_by(modelo.id)
+        .limit(tamano_lote)
+    ).scalars().all()
+    if not ids:
+        sesion.commit()
+        return 0
+
+    try:
+        # Los contadores se recalculan: quedan bien si el usuario vuelve y se conserva
+        sesion.execute(delete(modelo).where(modelo.id.in_(ids)).execution_options(synchronize_session=False))
+        sesion.commit()
+    except Exception:
+        sesion.rollback()
+        raise
+    return len(ids)
+
+
+def _subgrupos(sesion, usuario_ids, tamano_lote):
+    """
+    Divide los usuarios en subgrupos de unas `tamano_lote` filas finales (tareas
+    archivadas y recordatorios) para que la transacción que los borra sea corta.
+    Un usuario con más filas forma un subgrupo por sí solo.
+
+    Returns:
+        list: Listas de ids de usuario
+    """
+    filas = Counter()
+    for _, modelo in FINALES:
+        filas.update(dict(sesion.execute(
+            select(modelo.usuario_id, func.count(modelo.id))
+            .where(modelo.usuario_id.in_(usuario_ids))
+            .group_by(modelo.usuario_id)
+        ).all()))
+    sesion.commit()
+
+    subgrupos, actual, acumuladas = [], [], 0
+    for usuario_id in usuario_ids:
+        if actual and acumuladas + filas[usuario_id] > tamano_lote:
+            subgrupos.append(actual)
+            actual, acumuladas = [], 0
+        actual.append(usuario_id)
+        acumuladas += filas[usuario_id]
+    if actual:
+        subgrupos.append(actual)
+    return subgrupos
+
+
+def _borrar_usuarios(sesion, usuario_ids, fecha_corte):
+    """
+    Borra en una transacción los usuarios que siguen inactivos y ya no tienen
+    tareas, junto con sus tareas archivadas y recordatorios.
+
+    Las filas de los usuarios se bloquean antes de comprobarlos: una escritura
+    concurrente del usuario espera a que la transacción termine, y a un usuario
+    que ha vuelto no se le borra nada.
+
+    Returns:
+        dict: Usuarios, tareas archivadas y recordatorios borrados
+    """
+    from app import auditoria
+
+    borradas = {'usuarios': 0, **{clave: 0 for clave, _ in FINALES}}
+    try:
+        ids = sesion.execute(
+            select(Usuario.id)
+            .where(
+                Usuario.id.in_(usuario_ids),
+                condicion_inactivo(fecha_corte),
+                ~exists().where(Tarea.usuario_id == Usuario.id),
+            )
+            .with_for_update()
+        ).scalars().all()
+        if ids:
+            for clave, modelo in FINALES:
+                borradas[clave] = sesion.execute(
+                    delete(modelo).where(modelo.usuario_id.in_(ids)).execution_options(synchronize_session=False)
+                ).rowcount
+            borradas['usuarios'] = sesion.execute(delete(_usuarios).where(_usuarios.c.id.in_(ids))).rowcount
+            auditoria.anotar('purgar_usuarios', None, {
+                'usuarios': borradas['usuarios'],
+                'candidatos': list(usuario_ids),
+                'fecha_corte': fecha_corte.isoformat(),
+            })
+        sesion.commit()
+    except Exception:
+        sesion.rollback()
+        raise
+    return borradas
+
+
+def purgar_inactivos(sesion, fecha_corte, lote_usuarios, lote_filas, pausa=0.0, carga_maxima=1.0,
+                     maximo=None, resumen=None, al_avanzar=None):
+    """
+    Elimina por lotes los usuarios inactivos y sus filas dependientes.
+
+    Args:
+        sesion: Sesión de SQLAlchemy
+        fecha_corte (datetime): Última actividad admitida para considerar inactivo a un usuario
+        lote_usuarios (int): Usuarios por grupo
+        lote_filas (int): Filas dependientes por lote (una transacción por lote)
+        pausa (float, optional): Segundos mínimos de espera entre lotes
+        carga_maxima (float, optional): Fracción máxima del tiempo trabajando (1 = sin espera adicional)
+        maximo (int, optional): Número máximo de usuarios a revisar en esta ejecución
+        resumen (dict, optional): Resumen de una ejecución anterior que se continúa
+        al_avanzar (callable, optional): Recibe el resumen tras cada lote
+
+    Returns:
+        dict: Usuarios, tareas, tareas archivadas y recordatorios borrados, y último id revisado
+    """
+    resumen = dict(resumen or {})
+    resumen.setdefault('ultimo_id', 0)
+    resumen.setdefault('usuarios', 0)
+    for clave, _ in DEPENDIENTES + FINALES:
+        resumen.setdefault(clave, 0)
+    revisados = 0
+
+    def ceder(inicio):
+        duracion = time.perf_counter() - inicio
+        espera = max(pausa, duracion * (1 / carga_maxima - 1) if carga_maxima < 1 else 0)
+        if espera:
+            time.sleep(espera)
+
+    while maximo is None or revisados < maximo:
+        limite = lote_usuarios if maximo is None else min(lote_usuarios, maximo - revisados)
+        usuario_ids = seleccionar_inactivos(sesion, fecha_corte, resumen['ultimo_id'], limite)
+        if not usuario_ids:
+            break
+
+        for clave, modelo in DEPENDIENTES:
+            while True:
+                inicio = time.perf_counter()
+                borradas = _borrar_lote(sesion, modelo, usuario_ids, fecha_corte, lote_filas)
+                resumen[clave] += borradas
+                if al_avanzar and borradas:
+                    al_avanzar(resumen)
+                if borradas < lote_filas:
+                    break
+                ceder(inicio)
+
+        subgrupos = _subgrupos(sesion, usuario_ids, lote_filas)
+        for indice, subgrupo in enumerate(subgrupos):
+            inicio = time.perf_counter()
+            for clave, borradas in _borrar_usuarios(sesion, subgrupo, fecha_corte).items():
+                resumen[clave] += borradas
+            # El último id revisado solo avanza con subgrupos terminados
+            resumen['ultimo_id'] = subgrupo[-1]
+            if al_avanzar:
+                al_avanzar(resumen)
+            if indice < len(subgrupos) - 1:
+                ceder(inicio)
+
+        revisados += len(usuario_ids)
+        if len(usuario_ids) < limite:
+            break
+        ceder(inicio)
+    return resumen
+
+
+def validar_dias(dias):
+    """
+    Comprueba que la inactividad pedida no baje de RETENCION_MINIMO_DIAS.
+
+    Returns:
+        str: Mensaje de error, o None si `dias` es válido
+    """
+    minimo = current_app.config['RETENCION_MINIMO_DIAS']
+    if dias < minimo:
+        return f'La inactividad debe ser de al menos {minimo} días'
+    return None
+
+
+def fecha_corte_por_dias(dias, ahora=None):
+    """
+    Returns:
+        datetime: Fecha de corte para una inactividad de `dias` días
+
+    Raises:
+        ValueError: Si `dias` es menor que RETENCION_MINIMO_DIAS
+    """
+    error = validar_dias(dias)
+    if error:
+        raise ValueError(error)
+    return (ahora or datetime.utcnow()) - timedelta(days=dias)
+
+
+@click.command('purgar-inactivos')
+@click.option('--dias', type=int, default=None, help='Días sin actividad (por defecto RETENCION_INACTIVIDAD_DIAS).')
+@click.option('--lote-usuarios', type=int, default=None, help='Usuarios por grupo (por defecto RETENCION_LOTE_USUARIOS).')
+@click.option('--lote-filas', type=int, default=None, help='Filas dependientes por lote (por defecto RETENCION_LOTE_FILAS).')
+@click.option('--pausa', type=float, default=None, help='Segundos mínimos entre lotes (por defecto RETENCION_PAUSA_SEGUNDOS).')
+@click.option('--maximo', type=int, default=None, help='Máximo de usuarios a revisar en esta ejecución.')
+@click.option('--simular', is_flag=True, help='Solo cuenta los usuarios inactivos, sin borrar nada.')
+def purgar_inactivos_comando(dias, lote_usuarios, lote_filas, pausa, maximo, simular):
+    """Elimina los usuarios inactivos y sus tareas por lotes."""
+    from app import db
+    configuracion = current_app.config
+    try:
+        fecha_corte = fecha_corte_por_dias(dias if dias is not None else configuracion['RETENCION_INACTIVIDAD_DIAS'])
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--dias'" if dias is not None else 'RETENCION_INACTIVIDAD_DIAS')
+    total = contar_inactivos(db.session, fecha_corte)
+    click.echo(f'Usuarios inactivos desde antes de {fecha_corte:%Y-%m-%d %H:%M}: {total}.')
+    if simular or not total:
+        return
+
+    def informar(resumen):
+        click.echo(f"  hasta el id {resumen['ultimo_id']}: {resumen['usuarios']} usuarios, "
+                   f"{resumen['tareas']} tareas, {resumen['archivadas']} archivadas, "
+                   f"{resumen['recordatorios']} recordatorios")
+
+    resumen = purgar_inactivos(
+        db.session,
+        fecha_corte,
+        lote_usuarios or configuracion['RETENCION_LOTE_USUARIOS'],
+        lote_filas or configuracion['RETENCION_LOTE_FILAS'],
+        pausa if pausa is not None else configuracion['RETENCION_PAUSA_SEGUNDOS'],
+        configuracion['RETENCION_CARGA_MAXIMA'],
+        maximo,
+        al_avanzar=informar
+    )
+    click.echo(f"Usuarios eliminados: {resumen['usuarios']} (tareas: {resumen['tareas']}, "
+               f"archivadas: {resumen['archivadas']}, recordatorios: {resumen['recordatorios']}).")
+
+
+def init_app(app):
+    """
+    Registra el comando de purga de usuarios inactivos.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.cli.add_command(purgar_inactivos_comando)
@@ -0,0 +1,76 @@
+"""
+Módulo de arranque serverless.
+Expone un despachador WSGI que construye la aplicación de cada grupo de
+blueprints (clientes o administración) solo cuando llega su primera solicitud,
+de modo que una instancia que solo atiende la API de tareas nunca importa ni
+registra el panel de administración.
+"""
+
+import threading
+
+# Prefijos de URL atendidos por cada grupo; el resto corresponde a 'clientes'
+PREFIJOS_GRUPOS = [
+    ('/admin', 'admin'),
+]
+GRUPO_POR_DEFECTO = 'clientes'
+
+# Rutas que cualquier grupo ya construido puede atender (archivos estáticos)
+RUTAS_COMUNES = ('/static/', '/assets/')
+
+
+class DespachadorPerezoso:
+    """
+    Aplicación WSGI que delega en una aplicación Flask por grupo de blueprints,
+    creada bajo demanda y reutilizada en las siguientes solicitudes.
+    """
+
+    def __init__(self, config_class):
+        """
+        Args:
+            config_class: Clase de configuración para las aplicaciones creadas
+        """
+        self.config_class = config_class
+        self.aplicaciones = {}
+        self._bloqueo = threading.Lock()
+
+    def obtener_aplicacion(self, grupo):
+        """
+        Devuelve la aplicación del grupo, creándola si aún no existe.
+
+        Args:
+            grupo (str): Nombre del grupo de blueprints
+
+        Returns:
+            Flask: Aplicación del grupo
+        """
+        aplicacion = self.aplicaciones.get(grupo)
+        if aplicacion is None:
+            with self._bloqueo:
+                aplicacion = self.aplicaciones.get(grupo)
+                if aplicacion is None:
+                    from app import crear_app
+                    aplicacion = crear_app(self.config_class, grupos=(grupo,))
+                    self.aplicaciones[grupo] = aplicacion
+        return aplicacion
+
+    def grupo_para_ruta(self, ruta):
+        """
+        Determina el grupo de blueprints que atiende una ruta.
+
+        Args:
+            ruta (str): PATH_INFO de la solicitud
+
+        Returns:
+            str: Nombre del grupo
+        """
+        if ruta.startswith(RUTAS_COMUNES) and self.aplicaciones:
+            # Los archivos estáticos no justifican construir otro grupo
+            return next(iter(self.aplicaciones))
+        for prefijo, grupo in PREFIJOS_GRUPOS:
+            if ruta == prefijo or ruta.startswith(prefijo + '/'):
+                return grupo
+        return GRUPO_POR_DEFECTO
+
+    def __call__(self, environ, start_response):
+        grupo = self.grupo_para_ruta(environ.get('PATH_INFO', ''))
+        return self.obtener_aplicacion(grupo)(environ, start_response)
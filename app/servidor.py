@@ -0,0 +1,111 @@
+"""
+Módulo de ajustes del servidor WSGI multiproceso (gunicorn.conf.py).
+Calcula el número de workers e hilos a partir de los núcleos y del pool de
+conexiones, y deja cada worker en un estado seguro tras el fork cuando la
+aplicación se precarga en el proceso maestro.
+"""
+
+import os
+
+# Hilos por worker cuando el perfil no tiene pool local (NullPool con pooler externo)
+HILOS_SIN_POOL = 8
+
+
+def conexiones_por_worker(opciones_motor):
+    """
+    Conexiones que un worker puede llegar a abrir según las opciones del motor.
+
+    Args:
+        opciones_motor (dict): SQLALCHEMY_ENGINE_OPTIONS del perfil de pool
+
+    Returns:
+        int: pool_size + max_overflow (o None si no hay pool local)
+    """
+    if 'poolclass' in opciones_motor:
+        return None
+    return opciones_motor.get('pool_size', 5) + opciones_motor.get('max_overflow', 10)
+
+
+def calcular_hilos(opciones_motor):
+    """
+    Hilos por worker: uno por conexión fija del pool, para que las solicitudes
+    concurrentes de un worker no esperen por conexión ni vivan del overflow.
+
+    Args:
+        opciones_motor (dict): SQLALCHEMY_ENGINE_OPTIONS del perfil de pool
+
+    Returns:
+        int: Número de hilos
+    """
+    if 'poolclass' in opciones_motor:
+        return HILOS_SIN_POOL
+    return max(1, opciones_motor.get('pool_size', 5))
+
+
+def calcular_workers(nucleos, opciones_motor, maximo_conexiones=None):
+    """
+    Workers: uno por núcleo (los hilos cubren la espera de E/S), limitado para que
+    la suma de los pools de todos los workers no supere las conexiones de la base de datos.
+
+    Args:
+        nucleos (int): Núcleos disponibles para el proceso
+        opciones_motor (dict): SQLALCHEMY_ENGINE_OPTIONS del perfil de pool
+        maximo_conexiones (int, optional): Conexiones que la base de datos reserva a la aplicación
+
+    Returns:
+        int: Número de workers (al menos 1)
+    """
+    workers = max(1, nucleos)
+    por_worker = conexiones_por_worker(opciones_motor)
+    if maximo_conexiones and por_worker:
+        workers = min(workers, maximo_conexiones // por_worker)
+    return max(1, workers)
+
+
+def nucleos_disponibles():
+    """
+    Núcleos que el proceso puede usar (respeta la afinidad de CPU, p. ej. en contenedores).
+
+    Returns:
+        int: Número de núcleos
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def liberar_conexiones(app, db):
+    """
+    Descarta las conexiones del pool en el proceso maestro antes de crear los workers.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy
+    """
+    with app.app_context():
+        for motor in db.engines.values():
+            motor.dispose()
+
+
+def tras_fork(app, db):
+    """
+    Prepara un worker recién creado a partir de una aplicación precargada.
+
+    - Los motores sustituyen su pool por uno vacío sin cerrar las conexiones
+      heredadas (`dispose(close=False)`): siguen perteneciendo al maestro y
+      cerrarlas desde el hijo rompería su socket compartido.
+    - Las estadísticas del pool se ponen a cero para medir solo este worker.
+    - La bitácora arranca su propio hilo escritor (los hilos no sobreviven al fork).
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy
+    """
+    from app import bitacora
+
+    with app.app_context():
+        for motor in db.engines.values():
+            motor.dispose(close=False)
+    for estadisticas in app.extensions.get('estadisticas_pool', {}).values():
+        estadisticas.reiniciar()
+    bitacora.reiniciar_tras_fork()
@@ -0,0 +1,86 @@
+"""
+Módulo del modo embebido con SQLite (un solo nodo, sin PostgreSQL).
+Configura cada conexión SQLite de la aplicación con los PRAGMA de
+SQLITE_PRAGMAS (WAL, synchronous=NORMAL, mmap, caché, busy_timeout, claves
+foráneas) y controla el inicio de las transacciones:
+
+- Con el diario por defecto un escritor bloquea a los lectores mientras
+  confirma; con WAL los lectores leen una instantánea mientras otro escribe.
+- Con SQLITE_ESCRITURA = 'inmediata' el driver deja de abrir transacciones por
+  su cuenta (su modo implícito solo las abre antes del primer INSERT/UPDATE,
+  por lo que las lecturas previas quedan fuera y SAVEPOINT no funciona) y la
+  aplicación las abre en el evento 'begin': BEGIN IMMEDIATE en las
+  solicitudes de escritura y BEGIN diferido en las de lectura. Los escritores
+  se serializan esperando el bloqueo al empezar (hasta busy_timeout) en lugar
+  de fallar con "database is locked" al pasar de lectura a escritura dentro de
+  una transacción (crear_tarea comprueba el título antes de insertar).
+"""
+
+from contextvars import ContextVar
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+# Método HTTP de la solicitud en curso fuera de Flask (API asíncrona)
+metodo_solicitud = ContextVar('metodo_solicitud', default=None)
+
+
+def es_escritura():
+    """
+    Indica si la transacción que empieza pertenece a una operación de escritura.
+    Fuera de una solicitud (comandos, trabajos en segundo plano) se asume que sí.
+
+    Returns:
+        bool: True si la transacción debe tomar el bloqueo de escritura al empezar
+    """
+    if has_request_context():
+        return request.method not in METODOS_LECTURA
+    metodo = metodo_solicitud.get()
+    return metodo is None or metodo not in METODOS_LECTURA
+
+
+def configurar_motor(motor, pragmas, escritura=None):
+    """
+    Registra los eventos que configuran las conexiones de un motor SQLite.
+
+    Args:
+        motor: Motor síncrono de SQLAlchemy (o `sync_engine` de uno asíncrono)
+        pragmas (dict): PRAGMA a aplicar en cada conexión nueva
+        escritura (str, optional): 'inmediata' para abrir con BEGIN IMMEDIATE las escrituras
+    """
+    if motor.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(motor, 'connect')
+    def al_conectar(conexion_dbapi, registro):
+        if escritura:
+            # El driver deja de abrir transacciones por su cuenta: las abre el evento 'begin'
+            conexion_dbapi.isolation_level = None
+        cursor = conexion_dbapi.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nombre}={valor}')
+        cursor.close()
+
+    if escritura:
+        @event.listens_for(motor, 'begin')
+        def al_empezar(conexion):
+            conexion.exec_driver_sql('BEGIN IMMEDIATE' if es_escritura() else 'BEGIN')
+
+
+def init_app(app, db):
+    """
+    Configura los motores SQLite de la aplicación si SQLITE_PRAGMAS está definido.
+
+    Args:
+        app: Aplicación Flask
+        db: Extensión SQLAlchemy ya inicializada con la aplicación
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for motor in db.engines.values():
+            configurar_motor(motor, pragmas, app.config.get('SQLITE_ESCRITURA'))
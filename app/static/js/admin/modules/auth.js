@@ -162,8 +162,9 @@ class AdminAuthModule {
                 // Clear any existing admin token cookie first
                 this.borrarCookie('admin_token');
                 
-                // Guardar token y administrador en localStorage
+                // Guardar tokens y administrador en localStorage
                 localStorage.setItem('admin_token', resultado.token);
+                localStorage.setItem('admin_refresh_token', resultado.refresh_token);
                 localStorage.setItem('administrador', JSON.stringify(resultado.administrador));
                 
                 // Guardar token en una cookie para SSR
@@ -13,7 +13,8 @@ import {
     mostrarError, 
     limpiarError, 
     validarIdentificacion, 
-    validarContrasena
+    validarContrasena,
+    fetchAutenticado
 } from './utils.js';
 
 /**
@@ -84,7 +85,7 @@ class AdminProfileModule {
 
         try {
             // Cargar datos del perfil actual
-            const respuesta = await fetch(`/admin/auth/api/perfil`, {
+            const respuesta = await fetchAutenticado(`/admin/auth/api/perfil`, {
                 headers: {
                     'Authorization': `Bearer ${this.obtenerToken()}`
                 }
@@ -147,7 +148,7 @@ class AdminProfileModule {
         establecerBotonCargando(botonGuardar, 'Guardando...');
 
         try {
-            const res = await fetch(`/admin/auth/api/perfil`, {
+            const res = await fetchAutenticado(`/admin/auth/api/perfil`, {
                 method: 'PUT',
                 headers: { 
                     'Content-Type': 'application/json',
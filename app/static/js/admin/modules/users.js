@@ -18,7 +18,8 @@ import {
     cerrarSesion,
     formatearFecha,
     mostrarCargando,
-    ocultarCargando
+    ocultarCargando,
+    fetchAutenticado
 } from './utils.js';
 
 /**
@@ -432,6 +433,8 @@ class AdminUsersModule {
             page: this.paginaActual,
             per_page: this.elementosPorPagina,
             search: this.consultaBusqueda,
+            // Solo las columnas que muestra la tabla
+            fields: 'id,identificacion,nombre,apellido,creado_en,total_tareas,tareas_vencidas',
         };
 
         if (this.ordenarPor) {
@@ -449,7 +452,7 @@ class AdminUsersModule {
         }
 
         try {
-            const respuesta = await fetch(`/admin/api/usuarios?${new URLSearchParams(parametros)}`, {
+            const respuesta = await fetchAutenticado(`/admin/api/usuarios?${new URLSearchParams(parametros)}`, {
                 headers: {
                     'Authorization': `Bearer ${this.obtenerToken()}`
                 }
@@ -511,6 +514,8 @@ class AdminUsersModule {
                 <td class="user-name-cell">${usuario.nombre}</td>
                 <td>${usuario.apellido}</td>
                 <td class="user-date hide-mobile">${formatearFecha(usuario.creado_en)}</td>
+                <td class="user-count-cell">${usuario.total_tareas}</td>
+                <td class="user-count-cell hide-mobile">${usuario.tareas_vencidas}</td>
                 <td>
                     <div class="action-buttons">
                         <button class="action-btn edit-btn" data-id="${usuario.id}" title="Editar">
@@ -675,7 +680,7 @@ class AdminUsersModule {
             mostrarCargando();
 
             try {
-                const respuesta = await fetch(`/admin/api/usuarios/${idUsuario}`, {
+                const respuesta = await fetchAutenticado(`/admin/api/usuarios/${idUsuario}`, {
                     headers: {
                         'Authorization': `Bearer ${this.obtenerToken()}`
                     }
@@ -818,7 +823,7 @@ class AdminUsersModule {
         mostrarCargando();
 
         try {
-            const respuesta = await fetch(url, {
+            const respuesta = await fetchAutenticado(url, {
                 method: metodo,
                 headers: {
                     'Content-Type': 'application/json',
@@ -871,7 +876,7 @@ class AdminUsersModule {
         mostrarCargando();
 
         try {
-            const respuesta = await fetch(`/admin/api/usuarios/${idUsuario}`, {
+            const respuesta = await fetchAutenticado(`/admin/api/usuarios/${idUsuario}`, {
                 method: "DELETE",
                 headers: {
                     'Authorization': `Bearer ${this.obtenerToken()}`
@@ -1125,7 +1130,7 @@ class AdminUsersModule {
      */
     async cargarEstadisticas() {
         try {
-            const respuesta = await fetch('/admin/api/estadisticas', {
+            const respuesta = await fetchAutenticado('/admin/api/estadisticas', {
                 headers: {
                     'Authorization': `Bearer ${this.obtenerToken()}`
                 }
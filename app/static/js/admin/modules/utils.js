@@ -197,12 +197,78 @@ export function cerrarSesion() {
     // Eliminar token de cookie y localStorage
     document.cookie = "admin_token=; expires=Thu, 01 Jan 1970 00:00:00 UTC; path=/;";
     localStorage.removeItem("admin_token");
+    localStorage.removeItem("admin_refresh_token");
     localStorage.removeItem("administrador");
 
     // Redirigir al login
     window.location.href = "/admin/login";
 }
 
+/**
+ * Guarda los tokens de una sesión de administrador iniciada o renovada
+ * @param {string} token - Token de acceso
+ * @param {string} refreshToken - Token de refresco
+ */
+export function guardarTokens(token, refreshToken) {
+    localStorage.setItem("admin_token", token);
+    if (refreshToken) {
+        localStorage.setItem("admin_refresh_token", refreshToken);
+    }
+    // Cookie para SSR (1 día de expiración)
+    const expiracion = new Date(Date.now() + 24 * 60 * 60 * 1000);
+    document.cookie = `admin_token=${token};expires=${expiracion.toUTCString()};path=/;SameSite=Lax`;
+}
+
+// Renovación en curso: las solicitudes que reciben 401 a la vez comparten una sola
+let refrescoEnCurso = null;
+
+/**
+ * Renueva la sesión del administrador con el token de refresco, sin volver a pedir la contraseña
+ * @returns {Promise<boolean>} - Promise que resuelve a true si se obtuvo un token de acceso nuevo
+ */
+export function refrescarSesion() {
+    const refreshToken = localStorage.getItem("admin_refresh_token");
+    if (!refreshToken) {
+        return Promise.resolve(false);
+    }
+
+    if (!refrescoEnCurso) {
+        refrescoEnCurso = fetch('/admin/auth/api/refresh', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${refreshToken}` }
+        })
+            .then(async (respuesta) => {
+                if (!respuesta.ok) {
+                    localStorage.removeItem("admin_refresh_token");
+                    return false;
+                }
+                const datos = await respuesta.json();
+                guardarTokens(datos.token, datos.refresh_token);
+                return true;
+            })
+            .catch(() => false)
+            .finally(() => { refrescoEnCurso = null; });
+    }
+    return refrescoEnCurso;
+}
+
+/**
+ * Realiza una solicitud autenticada; si el token de acceso ha expirado (401),
+ * renueva la sesión y repite la solicitud una vez con el token nuevo
+ * @param {string} url - URL de la solicitud
+ * @param {Object} opciones - Opciones de fetch (con la cabecera Authorization)
+ * @returns {Promise<Response>} - Respuesta de la solicitud
+ */
+export async function fetchAutenticado(url, opciones = {}) {
+    const respuesta = await fetch(url, opciones);
+    if (respuesta.status !== 401 || !(await refrescarSesion())) {
+        return respuesta;
+    }
+
+    const headers = { ...(opciones.headers || {}), 'Authorization': `Bearer ${obtenerTokenAutenticacion()}` };
+    return fetch(url, { ...opciones, headers });
+}
+
 /**
  * Verifica si un token de administrador es válido
  * @returns {Promise<boolean>} - Promise que resuelve a true si el token es válido, false si no
@@ -216,7 +282,7 @@ export async function verificarTokenValido() {
     
     try {
         // Hacer una llamada ligera a la API para verificar el token
-        const respuesta = await fetch('/admin/api/perfil', {
+        const respuesta = await fetchAutenticado('/admin/api/perfil', {
             method: 'GET',
             headers: {
                 'Authorization': `Bearer ${token}`
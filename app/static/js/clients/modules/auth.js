@@ -154,8 +154,9 @@ class AuthModule {
             const result = await res.json();
 
             if (res.ok) {
-                // Guardar token y usuario en localStorage
+                // Guardar tokens y usuario en localStorage
                 localStorage.setItem('token', result.token);
+                localStorage.setItem('refresh_token', result.refresh_token);
                 localStorage.setItem('usuario', JSON.stringify(result.usuario));
                 
                 // Guardar token en una cookie para SSR
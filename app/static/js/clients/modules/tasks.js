@@ -6,7 +6,7 @@
  * @version 1.0
  */
 
-import { mostrarToast, setButtonLoading, setButtonNormal, mostrarError, limpiarError, validarFechaFutura, logout } from './utils.js';
+import { mostrarToast, setButtonLoading, setButtonNormal, mostrarError, limpiarError, validarFechaFutura, logout, fetchAutenticado } from './utils.js';
 
 /**
  * Clase que representa el módulo de tareas
@@ -31,6 +31,9 @@ class TasksModule {
         this.order = 'desc';
         // Debounce timer para mejorar el rendimiento
         this.debounceTimer = null;
+        // Autocompletado del buscador: timer y petición en curso
+        this.sugerenciasTimer = null;
+        this.sugerenciasController = null;
         this.init();
     }
 
@@ -47,8 +50,15 @@ class TasksModule {
                 return;
             }
             
-            // Cargar tareas
-            this.cargarTareas();
+            // Mostrar las tareas incluidas en la página o, si no están, cargarlas de la API
+            const tareasIniciales = this.leerTareasIniciales();
+            if (tareasIniciales) {
+                this.renderizarTareas(tareasIniciales);
+                this.renderizarFiltrosActivos();
+            } else {
+                this.cargarTareas();
+            }
+            this.cargarAgenda();
             
             // Manejar el formulario de tareas
             const tareaForm = document.getElementById('tarea-form');
@@ -78,6 +88,25 @@ class TasksModule {
         }
     }
 
+    /**
+     * Lee las tareas iniciales que el servidor incluye en el dashboard
+     * Solo se usan una vez: las recargas posteriores consultan la API
+     * @returns {Array|null} Tareas iniciales o null si no están disponibles
+     */
+    leerTareasIniciales() {
+        const script = document.getElementById('tareas-iniciales');
+        if (!script) return null;
+
+        script.remove();
+        try {
+            const tareas = JSON.parse(script.textContent);
+            return Array.isArray(tareas) ? tareas : null;
+        } catch (error) {
+            console.error('Error al leer las tareas iniciales:', error);
+            return null;
+        }
+    }
+
     /**
      * Carga las tareas del usuario desde la API
      * Obtiene las tareas paginadas y filtradas del servidor
@@ -126,7 +155,7 @@ class TasksModule {
                 url += '?' + params.toString();
             }
             
-            const res = await fetch(url, {
+            const res = await fetchAutenticado(url, {
                 headers: { 'Authorization': `Bearer ${token}` }
             });
 
@@ -162,6 +191,64 @@ class TasksModule {
         }
     }
 
+    /**
+     * Carga el resumen de la agenda (vencidas, hoy, esta semana, más adelante)
+     * El servidor agrupa y cuenta las tareas, sin descargar la lista completa
+     */
+    async cargarAgenda() {
+        const token = localStorage.getItem('token');
+        const resumen = document.getElementById('agenda-resumen');
+        if (!resumen) return;
+
+        // Fecha local del usuario para que "hoy" coincida con su zona horaria
+        const ahora = new Date();
+        const hoy = `${ahora.getFullYear()}-${String(ahora.getMonth() + 1).padStart(2, '0')}-${String(ahora.getDate()).padStart(2, '0')}`;
+
+        try {
+            const res = await fetchAutenticado(`${this.apiURL}/tareas/agenda?hoy=${hoy}&limite=3`, {
+                headers: { 'Authorization': `Bearer ${token}` }
+            });
+            // Los errores de sesión los gestiona cargarTareas()
+            if (!res.ok) return;
+
+            const agenda = await res.json();
+            this.renderizarAgenda(agenda);
+        } catch (error) {
+            console.error('Error al cargar la agenda:', error);
+        }
+    }
+
+    /**
+     * Renderiza el resumen de la agenda en el DOM
+     * @param {Object} agenda - Respuesta de /tareas/agenda
+     */
+    renderizarAgenda(agenda) {
+        const resumen = document.getElementById('agenda-resumen');
+        if (!resumen) return;
+
+        resumen.querySelectorAll('.agenda-card').forEach(card => {
+            const grupo = card.dataset.grupo;
+            card.querySelector('.agenda-count').textContent = agenda.conteos[grupo] || 0;
+
+            const lista = card.querySelector('.agenda-list');
+            lista.innerHTML = '';
+            (agenda.tareas[grupo] || []).forEach(tarea => {
+                const fecha = new Date(tarea.fecha_limite);
+                fecha.setMinutes(fecha.getMinutes() + fecha.getTimezoneOffset());
+
+                const item = document.createElement('li');
+                const titulo = document.createElement('span');
+                titulo.textContent = tarea.titulo;
+                const dia = document.createElement('span');
+                dia.textContent = fecha.toLocaleDateString('es-ES', { month: 'short', day: 'numeric' });
+                item.append(titulo, dia);
+                lista.appendChild(item);
+            });
+        });
+
+        resumen.style.display = 'grid';
+    }
+
     /**
      * Renderiza las tareas en el DOM
      * @param {Array} tareas - Array de tareas a renderizar
@@ -369,7 +456,7 @@ class TasksModule {
         guardarBtn.disabled = true;
 
         try {
-            const res = await fetch(url, {
+            const res = await fetchAutenticado(url, {
                 method: method,
                 headers: {
                     'Content-Type': 'application/json',
@@ -381,6 +468,7 @@ class TasksModule {
             if (res.ok) {
                 this.cerrarModal();
                 this.cargarTareas();
+                this.cargarAgenda();
                 mostrarToast(id ? 'Tarea actualizada' : 'Tarea creada', 'success');
             } else {
                 const result = await res.json();
@@ -447,7 +535,7 @@ class TasksModule {
         confirmarBtn.disabled = true;
         
         try {
-            const res = await fetch(`${this.apiURL}/tareas/${this.tareaIdEliminar}`, {
+            const res = await fetchAutenticado(`${this.apiURL}/tareas/${this.tareaIdEliminar}`, {
                 method: 'DELETE',
                 headers: { 'Authorization': `Bearer ${token}` }
             });
@@ -455,6 +543,7 @@ class TasksModule {
             if (res.ok) {
                 this.cerrarModalEliminar();
                 this.cargarTareas();
+                this.cargarAgenda();
                 mostrarToast('Tarea eliminada', 'success');
             } else {
                 this.cerrarModalEliminar();
@@ -585,6 +674,49 @@ class TasksModule {
         }, 300); // 300ms de debounce
     }
     
+    /**
+     * Pide sugerencias de títulos con debounce mientras el usuario escribe
+     * @param {string} texto - Texto escrito en el buscador
+     */
+    sugerirTitulosDebounce(texto) {
+        clearTimeout(this.sugerenciasTimer);
+        this.sugerenciasTimer = setTimeout(() => this.cargarSugerencias(texto), 120);
+    }
+
+    /**
+     * Carga las sugerencias de títulos y las muestra en el datalist del buscador
+     * @param {string} texto - Texto escrito en el buscador
+     */
+    async cargarSugerencias(texto) {
+        const lista = document.getElementById('sugerencias-tareas');
+        if (!lista) return;
+
+        // Cancelar la petición anterior si aún no ha respondido
+        if (this.sugerenciasController) this.sugerenciasController.abort();
+        this.sugerenciasController = new AbortController();
+
+        try {
+            const params = new URLSearchParams({ q: texto, limite: 8 });
+            const res = await fetchAutenticado(`${this.apiURL}/tareas/sugerencias?${params.toString()}`, {
+                headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` },
+                signal: this.sugerenciasController.signal
+            });
+            if (!res.ok) return;
+
+            const { sugerencias } = await res.json();
+            lista.innerHTML = '';
+            sugerencias.forEach(titulo => {
+                const opcion = document.createElement('option');
+                opcion.value = titulo;
+                lista.appendChild(opcion);
+            });
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error al cargar sugerencias:', error);
+            }
+        }
+    }
+
     /**
      * Aplica todos los filtros disponibles
      */
@@ -6,7 +6,7 @@
  * @version 1.0
  */
 
-import { mostrarToast, setButtonLoading, setButtonNormal, mostrarError, limpiarError, validarIdentificacion, validarNombre, validarContrasena, logout } from './utils.js';
+import { mostrarToast, setButtonLoading, setButtonNormal, mostrarError, limpiarError, validarIdentificacion, validarNombre, validarContrasena, logout, fetchAutenticado } from './utils.js';
 
 /**
  * Clase que representa el módulo de utilidades de interfaz de usuario
@@ -418,7 +418,7 @@ class UIModule {
                 return;
             }
             
-            const response = await fetch('/auth/perfil', {
+            const response = await fetchAutenticado('/auth/perfil', {
                 method: 'PUT',
                 headers: {
                     'Content-Type': 'application/json',
@@ -632,7 +632,7 @@ class UIModule {
     async verificarTokenValido(token) {
         try {
             // Hacer una llamada ligera a la API para verificar el token
-            const response = await fetch('/auth/perfil', {
+            const response = await fetchAutenticado('/auth/perfil', {
                 method: 'GET',
                 headers: {
                     'Authorization': `Bearer ${token}`
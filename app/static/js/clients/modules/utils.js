@@ -212,6 +212,7 @@ export function logout() {
     // Verificar que localStorage esté disponible
     if (typeof localStorage !== 'undefined') {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('usuario');
     }
     
@@ -224,6 +225,71 @@ export function logout() {
     }
 }
 
+/**
+ * Guarda los tokens de una sesión iniciada o renovada
+ * @param {string} token - Token de acceso
+ * @param {string} refreshToken - Token de refresco
+ */
+export function guardarTokens(token, refreshToken) {
+    localStorage.setItem('token', token);
+    if (refreshToken) {
+        localStorage.setItem('refresh_token', refreshToken);
+    }
+    // Cookie para SSR (1 día de expiración)
+    const expires = new Date(Date.now() + 24 * 60 * 60 * 1000);
+    document.cookie = `token=${token};expires=${expires.toUTCString()};path=/`;
+}
+
+// Renovación en curso: las solicitudes que reciben 401 a la vez comparten una sola
+let refrescoEnCurso = null;
+
+/**
+ * Renueva la sesión con el token de refresco, sin volver a pedir la contraseña
+ * @returns {Promise<boolean>} - Promise que resuelve a true si se obtuvo un token de acceso nuevo
+ */
+export function refrescarSesion() {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+        return Promise.resolve(false);
+    }
+
+    if (!refrescoEnCurso) {
+        refrescoEnCurso = fetch('/auth/refresh', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${refreshToken}` }
+        })
+            .then(async (res) => {
+                if (!res.ok) {
+                    localStorage.removeItem('refresh_token');
+                    return false;
+                }
+                const result = await res.json();
+                guardarTokens(result.token, result.refresh_token);
+                return true;
+            })
+            .catch(() => false)
+            .finally(() => { refrescoEnCurso = null; });
+    }
+    return refrescoEnCurso;
+}
+
+/**
+ * Realiza una solicitud autenticada; si el token de acceso ha expirado (401),
+ * renueva la sesión y repite la solicitud una vez con el token nuevo
+ * @param {string} url - URL de la solicitud
+ * @param {Object} opciones - Opciones de fetch (con la cabecera Authorization)
+ * @returns {Promise<Response>} - Respuesta de la solicitud
+ */
+export async function fetchAutenticado(url, opciones = {}) {
+    const res = await fetch(url, opciones);
+    if (res.status !== 401 || !(await refrescarSesion())) {
+        return res;
+    }
+
+    const headers = { ...(opciones.headers || {}), 'Authorization': `Bearer ${localStorage.getItem('token')}` };
+    return fetch(url, { ...opciones, headers });
+}
+
 /**
  * Verifica si el token almacenado es válido y limpia el estado si no lo es
  * @returns {Promise<boolean>} - Promise que resuelve a true si el token es válido, false si no
@@ -237,7 +303,7 @@ export async function verificarYLimpiarAutenticacion() {
     
     try {
         // Hacer una llamada ligera a la API para verificar el token
-        const response = await fetch('/auth/perfil', {
+        const response = await fetchAutenticado('/auth/perfil', {
             method: 'GET',
             headers: {
                 'Authorization': `Bearer ${token}`
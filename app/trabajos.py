@@ -0,0 +1,521 @@
+"""
+Módulo de trabajos en segundo plano.
+Ejecuta operaciones largas del panel (archivado, reparación de contadores,
+purga de usuarios inactivos)
+fuera de la solicitud HTTP que las pide, para no ocupar un worker ni chocar
+con el límite de tiempo de las funciones serverless.
+
+- La tabla `trabajos` es la cola: cada trabajo guarda su estado, su avance y
+  un punto de control. El número de trabajos pendientes está acotado por
+  TRABAJOS_MAXIMO_EN_COLA.
+- Cada proceso tiene un ejecutor con TRABAJOS_HILOS hilos. Un proceso reclama
+  un trabajo con un UPDATE condicional, así que dos procesos nunca ejecutan el
+  mismo trabajo a la vez.
+- Mientras se ejecuta, el trabajo registra un latido con cada avance. Si su
+  proceso muere, el latido envejece y el vigilante de cualquier proceso lo
+  vuelve a reclamar y lo reanuda desde su último punto de control.
+- En serverless no hay hilos de fondo: `flask trabajos ejecutar` (cron)
+  procesa los trabajos pendientes en primer plano.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, or_, select, update
+
+from app.modelos import Trabajo, Usuario
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_ACTIVOS = ('pendiente', 'en_curso')
+
+# Clave del bloqueo consultivo de PostgreSQL que serializa el encolado de trabajos
+CLAVE_BLOQUEO_COLA = 7316001
+
+# tipo -> (función, {parámetro: tipo numérico})
+TIPOS_TRABAJO = {}
+
+# tipo -> función que valida los parámetros propios del tipo al encolarlo
+VALIDADORES_TRABAJO = {}
+
+
+class TrabajoInterrumpido(Exception):
+    """Se lanza al guardar el avance de un trabajo cancelado o reclamado por otro proceso."""
+
+
+def tipo_trabajo(nombre, parametros=None, validar=None):
+    """
+    Decorador que registra una función como tipo de trabajo.
+
+    La función recibe un `ContextoTrabajo` y devuelve el resultado (dict). Debe
+    llamar a `contexto.avance()` con frecuencia: registra el latido, guarda el
+    punto de control y detiene el trabajo si se canceló.
+
+    Args:
+        nombre (str): Nombre del tipo de trabajo
+        parametros (dict, optional): Parámetros admitidos y su tipo (int o float)
+        validar (callable, optional): Recibe los parámetros ya comprobados y devuelve
+            los errores propios del tipo (dict)
+    """
+    def decorador(funcion):
+        TIPOS_TRABAJO[nombre] = (funcion, parametros or {})
+        if validar is not None:
+            VALIDADORES_TRABAJO[nombre] = validar
+        return funcion
+    return decorador
+
+
+def validar_parametros(tipo, parametros):
+    """
+    Valida los parámetros de un trabajo según su tipo.
+
+    Returns:
+        dict: Errores por parámetro (vacío si son válidos)
+    """
+    admitidos = TIPOS_TRABAJO[tipo][1]
+    errores = {}
+    for nombre, valor in parametros.items():
+        clase = admitidos.get(nombre)
+        if clase is None:
+            errores[nombre] = 'Parámetro no admitido por este tipo de trabajo'
+        elif isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor < 0:
+            errores[nombre] = 'Debe ser un número no negativo'
+        elif clase is int and not float(valor).is_integer():
+            errores[nombre] = 'Debe ser un número entero'
+    if not errores and tipo in VALIDADORES_TRABAJO:
+        errores = VALIDADORES_TRABAJO[tipo](parametros)
+    return errores
+
+
+class ContextoTrabajo:
+    """
+    Vista de un trabajo en ejecución para la función que lo implementa.
+
+    Attributes:
+        trabajo_id (int): ID del trabajo
+        parametros (dict): Parámetros del trabajo
+        punto_control (dict): Último punto de control guardado ({} al empezar)
+        progreso (int): Elementos procesados según el último avance
+    """
+
+    def __init__(self, sesion, trabajo, propietario):
+        self.sesion = sesion
+        self.trabajo_id = trabajo.id
+        self.parametros = dict(trabajo.parametros or {})
+        self.punto_control = dict(trabajo.punto_control or {})
+        self.progreso = trabajo.progreso
+        self._propietario = propietario
+
+    def avance(self, progreso, punto_control, total=None):
+        """
+        Guarda el avance y el punto de control, y registra el latido.
+
+        Raises:
+            TrabajoInterrumpido: Si se pidió cancelar el trabajo o otro proceso lo reclamó
+        """
+        valores = {'progreso': progreso, 'punto_control': punto_control, 'latido': datetime.utcnow()}
+        if total is not None:
+            valores['total'] = total
+        resultado = self.sesion.execute(
+            update(Trabajo)
+            .where(
+                Trabajo.id == self.trabajo_id,
+                Trabajo.propietario == self._propietario,
+                Trabajo.estado == 'en_curso',
+                Trabajo.cancelacion_solicitada.is_(False),
+            )
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        self.sesion.commit()
+        if resultado.rowcount != 1:
+            raise TrabajoInterrumpido()
+        self.progreso = progreso
+        self.punto_control = punto_control
+
+
+# --- Tipos de trabajo ---
+
+@tipo_trabajo('archivar-tareas', {'dias': int, 'lote': int, 'pausa': float})
+def _trabajo_archivar_tareas(contexto):
+    from app import db
+    from app.archivo import archivar_lote
+    from app.modelos import Tarea
+
+    configuracion = current_app.config
+    parametros = contexto.parametros
+    lote = int(parametros.get('lote') or configuracion['ARCHIVO_TAMANO_LOTE'])
+    pausa = parametros.get('pausa', configuracion['ARCHIVO_PAUSA_SEGUNDOS'])
+
+    # La fecha de corte se fija al empezar para que una reanudación archive el mismo conjunto
+    if 'fecha_corte' not in contexto.punto_control:
+        dias = parametros.get('dias', configuracion['ARCHIVO_ANTIGUEDAD_DIAS'])
+        fecha_corte = date.today() - timedelta(days=int(dias))
+        pendientes = db.session.scalar(select(func.count(Tarea.id)).where(Tarea.fecha_limite < fecha_corte))
+        contexto.avance(0, {'fecha_corte': fecha_corte.isoformat()}, total=pendientes)
+    fecha_corte = date.fromisoformat(contexto.punto_control['fecha_corte'])
+
+    archivadas = contexto.progreso
+    while True:
+        cantidad = archivar_lote(db.session, fecha_corte, lote)
+        archivadas += cantidad
+        contexto.avance(archivadas, contexto.punto_control)
+        if cantidad < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+    return {'archivadas': archivadas}
+
+
+@tipo_trabajo('reparar-contadores', {'lote': int})
+def _trabajo_reparar_contadores(contexto):
+    from app import db
+    from app.contadores import recalcular_contadores
+
+    lote = int(contexto.parametros.get('lote') or 1000)
+    if 'ultimo_id' not in contexto.punto_control:
+        contexto.avance(0, {'ultimo_id': 0}, total=db.session.scalar(select(func.count(Usuario.id))))
+
+    ultimo_id = contexto.punto_control['ultimo_id']
+    reparados = contexto.progreso
+    while True:
+        ids = db.session.execute(
+            select(Usuario.id).where(Usuario.id > ultimo_id).order_by(Usuario.id).limit(lote)
+        ).scalars().all()
+        if not ids:
+            break
+        recalcular_contadores(db.session, ids)
+        db.session.commit()
+        reparados += len(ids)
+        ultimo_id = ids[-1]
+        contexto.avance(reparados, {'ultimo_id': ultimo_id})
+    return {'usuarios': reparados}
+
+
+def _validar_purgar_inactivos(parametros):
+    from app.retencion import validar_dias
+    error = validar_dias(parametros['dias']) if 'dias' in parametros else None
+    return {'dias': error} if error else {}
+
+
+@tipo_trabajo('purgar-inactivos', {'dias': int, 'lote': int, 'pausa': float}, validar=_validar_purgar_inactivos)
+def _trabajo_purgar_inactivos(contexto):
+    from app import db
+    from app.retencion import contar_inactivos, fecha_corte_por_dias, purgar_inactivos
+
+    configuracion = current_app.config
+    parametros = contexto.parametros
+
+    # La fecha de corte se fija al empezar para que una reanudación purgue el mismo conjunto
+    if 'fecha_corte' not in contexto.punto_control:
+        fecha_corte = fecha_corte_por_dias(int(parametros.get('dias', configuracion['RETENCION_INACTIVIDAD_DIAS'])))
+        contexto.avance(0, {'fecha_corte': fecha_corte.isoformat()}, total=contar_inactivos(db.session, fecha_corte))
+    fecha_corte = datetime.fromisoformat(contexto.punto_control['fecha_corte'])
+
+    # El avance se guarda tras cada lote: el resumen (con el último usuario terminado) es el punto de control
+    resumen = purgar_inactivos(
+        db.session,
+        fecha_corte,
+        configuracion['RETENCION_LOTE_USUARIOS'],
+        int(parametros.get('lote') or configuracion['RETENCION_LOTE_FILAS']),
+        parametros.get('pausa', configuracion['RETENCION_PAUSA_SEGUNDOS']),
+        configuracion['RETENCION_CARGA_MAXIMA'],
+        resumen=contexto.punto_control,
+        al_avanzar=lambda resumen: contexto.avance(resumen['usuarios'], dict(resumen)),
+    )
+    resumen.pop('fecha_corte', None)
+    resumen.pop('ultimo_id', None)
+    return resumen
+
+
+# --- Ejecución ---
+
+def _limite_latido():
+    return datetime.utcnow() - timedelta(seconds=current_app.config['TRABAJOS_EXPIRACION_LATIDO'])
+
+
+def condicion_ejecutable():
+    """
+    Condición de los trabajos que un proceso puede reclamar: pendientes o en curso
+    con el latido vencido (su proceso murió), siempre que no se haya pedido cancelarlos.
+    """
+    return (
+        Trabajo.cancelacion_solicitada.is_(False)
+        & or_(
+            Trabajo.estado == 'pendiente',
+            (Trabajo.estado == 'en_curso') & (Trabajo.latido < _limite_latido()),
+        )
+    )
+
+
+def cerrar_cancelados_huerfanos(sesion):
+    """
+    Marca como cancelados los trabajos con cancelación pedida cuyo proceso murió
+    antes de atenderla (nadie más los reclamará).
+
+    Returns:
+        int: Número de trabajos cerrados
+    """
+    cerrados = sesion.execute(
+        update(Trabajo)
+        .where(
+            Trabajo.cancelacion_solicitada.is_(True),
+            Trabajo.estado == 'en_curso',
+            Trabajo.latido < _limite_latido(),
+        )
+        .values(estado='cancelado', finalizado_en=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    sesion.commit()
+    return cerrados
+
+
+def _finalizar(sesion, trabajo_id, propietario, estado, **valores):
+    sesion.execute(
+        update(Trabajo)
+        .where(Trabajo.id == trabajo_id, Trabajo.propietario == propietario, Trabajo.estado == 'en_curso')
+        .values(estado=estado, finalizado_en=datetime.utcnow(), latido=datetime.utcnow(), **valores)
+        .execution_options(synchronize_session=False)
+    )
+    sesion.commit()
+
+
+def ejecutar_trabajo(trabajo_id, propietario):
+    """
+    Reclama y ejecuta un trabajo en el contexto de aplicación actual.
+
+    Args:
+        trabajo_id (int): ID del trabajo
+        propietario (str): Identificador del proceso que lo ejecuta
+
+    Returns:
+        str: Estado final o None si otro proceso lo tenía reclamado
+    """
+    from app import db
+    sesion = db.session
+
+    reclamado = sesion.execute(
+        update(Trabajo)
+        .where(Trabajo.id == trabajo_id, condicion_ejecutable())
+        .values(
+            estado='en_curso',
+            propietario=propietario,
+            latido=datetime.utcnow(),
+            intentos=Trabajo.intentos + 1,
+            iniciado_en=func.coalesce(Trabajo.iniciado_en, datetime.utcnow()),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    sesion.commit()
+    if reclamado != 1:
+        return None
+
+    trabajo = sesion.get(Trabajo, trabajo_id, populate_existing=True)
+    definicion = TIPOS_TRABAJO.get(trabajo.tipo)
+    if definicion is None:
+        _finalizar(sesion, trabajo_id, propietario, 'fallido', error=f'Tipo de trabajo desconocido: {trabajo.tipo}')
+        return 'fallido'
+
+    if trabajo.intentos > current_app.config['TRABAJOS_MAXIMO_INTENTOS']:
+        _finalizar(sesion, trabajo_id, propietario, 'fallido', error='Se superó el número máximo de intentos')
+        return 'fallido'
+
+    logger.info('Trabajo iniciado', extra={'trabajo_id': trabajo_id, 'tipo': trabajo.tipo, 'intento': trabajo.intentos})
+    inicio = time.perf_counter()
+    try:
+        resultado = definicion[0](ContextoTrabajo(sesion, trabajo, propietario))
+    except TrabajoInterrumpido:
+        sesion.rollback()
+        _finalizar(sesion, trabajo_id, propietario, 'cancelado')
+        estado = 'cancelado'
+    except Exception as e:
+        sesion.rollback()
+        logger.error('Error en el trabajo %s: %s', trabajo_id, e, exc_info=True)
+        _finalizar(sesion, trabajo_id, propietario, 'fallido', error=str(e)[:1000])
+        estado = 'fallido'
+    else:
+        _finalizar(sesion, trabajo_id, propietario, 'completado', resultado=resultado)
+        estado = 'completado'
+
+    logger.info('Trabajo finalizado', extra={
+        'trabajo_id': trabajo_id, 'estado': estado, 'duracion_ms': round((time.perf_counter() - inicio) * 1000)
+    })
+    return estado
+
+
+class Ejecutor:
+    """
+    Pool acotado de hilos de trabajo de un proceso y vigilante que reclama trabajos
+    pendientes o huérfanos. Solo se envían al pool tantos trabajos como hilos libres
+    tiene; el resto espera en la tabla.
+
+    Se inicia en la primera solicitud de cada proceso (también en los hijos tras un
+    fork, que no heredan los hilos del padre).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._bloqueo = threading.Lock()
+        self._pid = None
+        self._pool = None
+        self._en_ejecucion = set()
+        self._despertar = threading.Event()
+
+    @property
+    def propietario(self):
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def iniciar(self):
+        """Arranca los hilos en este proceso si aún no están en marcha."""
+        if self._pid == os.getpid():
+            return
+        with self._bloqueo:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._en_ejecucion = set()
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.app.config['TRABAJOS_HILOS'], thread_name_prefix='trabajo'
+            )
+            threading.Thread(target=self._vigilar, name='trabajos-vigilante', daemon=True).start()
+
+    def despertar(self):
+        """Pide al vigilante que busque trabajos sin esperar al siguiente intervalo."""
+        self.iniciar()
+        self._despertar.set()
+
+    def _capacidad(self):
+        with self._bloqueo:
+            return self.app.config['TRABAJOS_HILOS'] - len(self._en_ejecucion)
+
+    def _vigilar(self):
+        intervalo = self.app.config['TRABAJOS_INTERVALO_VIGILANCIA']
+        while True:
+            try:
+                self._repartir()
+            except Exception as e:
+                logger.warning('Error al buscar trabajos pendientes: %s', e)
+            self._despertar.wait(intervalo)
+            self._despertar.clear()
+
+    def _repartir(self):
+        capacidad = self._capacidad()
+        if capacidad <= 0:
+            return
+        from app import db
+        with self.app.app_context():
+            try:
+                cerrar_cancelados_huerfanos(db.session)
+                ids = db.session.execute(
+                    select(Trabajo.id).where(condicion_ejecutable()).order_by(Trabajo.id).limit(capacidad)
+                ).scalars().all()
+            finally:
+                db.session.remove()
+        for trabajo_id in ids:
+            with self._bloqueo:
+                if trabajo_id in self._en_ejecucion:
+                    continue
+                self._en_ejecucion.add(trabajo_id)
+            self._pool.submit(self._ejecutar, trabajo_id)
+
+    def _ejecutar(self, trabajo_id):
+        from app import db
+        try:
+            with self.app.app_context():
+                try:
+                    ejecutar_trabajo(trabajo_id, self.propietario)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error('Error al ejecutar el trabajo %s: %s', trabajo_id, e, exc_info=True)
+        finally:
+            with self._bloqueo:
+                self._en_ejecucion.discard(trabajo_id)
+            # Un hilo libre: buscar el siguiente trabajo de la cola
+            self._despertar.set()
+
+
+def encolar_trabajo(sesion, tipo, parametros, administrador_id=None):
+    """
+    Registra un trabajo pendiente y avisa al ejecutor del proceso.
+
+    El límite de la cola se comprueba en la misma transacción que inserta el
+    trabajo y después de insertarlo: en PostgreSQL un bloqueo consultivo de la
+    transacción serializa a quienes encolan a la vez, y en SQLite lo hace el
+    bloqueo de escritura que toma la inserción. Así dos solicitudes simultáneas
+    no pueden superar TRABAJOS_MAXIMO_EN_COLA.
+
+    Returns:
+        Trabajo: Trabajo creado o None si la cola está llena
+    """
+    if sesion.get_bind().dialect.name == 'postgresql':
+        sesion.execute(select(func.pg_advisory_xact_lock(CLAVE_BLOQUEO_COLA)))
+
+    trabajo = Trabajo(tipo=tipo, parametros=parametros, administrador_id=administrador_id)
+    sesion.add(trabajo)
+    sesion.flush()
+
+    en_cola = sesion.scalar(select(func.count(Trabajo.id)).where(Trabajo.estado.in_(ESTADOS_ACTIVOS)))
+    if en_cola > current_app.config['TRABAJOS_MAXIMO_EN_COLA']:
+        sesion.rollback()
+        return None
+    sesion.commit()
+
+    ejecutor = current_app.extensions.get('trabajos')
+    if ejecutor is not None:
+        ejecutor.despertar()
+    return trabajo
+
+
+trabajos_cli = AppGroup('trabajos', help='Trabajos en segundo plano.')
+
+
+@trabajos_cli.command('ejecutar')
+@click.option('--maximo', type=int, default=None, help='Número máximo de trabajos a ejecutar.')
+def ejecutar_comando(maximo):
+    """Ejecuta en primer plano los trabajos pendientes o huérfanos (para cron en serverless)."""
+    from app import db
+    propietario = f'{socket.gethostname()}:{os.getpid()}'
+    cerrar_cancelados_huerfanos(db.session)
+    ejecutados = 0
+    while maximo is None or ejecutados < maximo:
+        trabajo_id = db.session.scalar(
+            select(Trabajo.id).where(condicion_ejecutable()).order_by(Trabajo.id).limit(1)
+        )
+        if trabajo_id is None:
+            break
+        estado = ejecutar_trabajo(trabajo_id, propietario)
+        if estado:
+            ejecutados += 1
+            click.echo(f'Trabajo {trabajo_id}: {estado}.')
+    click.echo(f'Trabajos ejecutados: {ejecutados}.')
+
+
+def init_app(app):
+    """
+    Registra el ejecutor de trabajos y el comando `flask trabajos`.
+    El ejecutor arranca en la primera solicitud de cada proceso; en serverless
+    (TRABAJOS_EN_PROCESO = False) los trabajos solo se ejecutan con el comando.
+
+    Args:
+        app: Aplicación Flask
+    """
+    app.cli.add_command(trabajos_cli)
+
+    if not app.config.get('TRABAJOS_EN_PROCESO'):
+        return
+
+    ejecutor = Ejecutor(app)
+    app.extensions['trabajos'] = ejecutor
+
+    @app.before_request
+    def _iniciar_ejecutor():
+        ejecutor.iniciar()
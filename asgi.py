@@ -0,0 +1,16 @@
+"""
+Punto de entrada ASGI de la aplicación.
+
+Equivalente a `run.py` para servidores asíncronos: los endpoints de `/tareas`
+se atienden con sesiones asíncronas de base de datos y el resto de rutas se
+sirve con la aplicación Flask a través de un adaptador WSGI.
+
+Uso:
+    uvicorn asgi:app --workers 1
+"""
+import os
+from app.asincrono import crear_app_asgi
+from config import config_by_name
+
+flask_env = os.getenv('FLASK_ENV', 'production')
+app = crear_app_asgi(config_by_name[flask_env])
@@ -10,16 +10,74 @@ La configuración se organiza en clases:
 - `Config`: Clase base con la configuración común a todos los entornos.
 - `DevelopmentConfig`: Configuración específica para el entorno de desarrollo.
 - `ProductionConfig`: Configuración optimizada y segura para el entorno de producción.
+- `ServerlessConfig`: Producción en plataformas serverless (Vercel) con instancias de vida corta.
+- `PoolerExternoConfig`: Producción detrás de un pooler de conexiones externo.
+- `SqliteConfig`: Instalaciones pequeñas de un solo nodo con SQLite embebido.
 
 El diccionario `config_by_name` permite seleccionar la configuración adecuada
 basándose en la variable de entorno `FLASK_ENV`.
 """
 import os
-from dotenv import load_dotenv
 from datetime import timedelta
+from sqlalchemy.pool import NullPool
 
 # Carga las variables de entorno desde un archivo .env para el desarrollo local.
-load_dotenv()
+# En producción y en Vercel las variables las define la plataforma, así que se
+# omite la importación de python-dotenv y la lectura del archivo en el arranque.
+if os.environ.get('FLASK_ENV') != 'production' and not os.environ.get('VERCEL'):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Perfiles de pool de conexiones. Cada entorno elige uno con `POOL_PERFIL`, que puede
+# sobrescribirse con la variable de entorno del mismo nombre. Las estadísticas en vivo
+# (GET /admin/api/sistema/pool) permiten ajustar los tamaños a partir de datos reales.
+PERFILES_POOL = {
+    # Servidor de larga duración (Gunicorn): pool amplio reutilizado entre solicitudes
+    'servidor': {
+        "pool_pre_ping": True,           # Verificar conexiones antes de usarlas (evita desconexiones SSL)
+        "pool_recycle": 300,             # Reciclar conexiones cada 5 minutos
+        "pool_size": 10,                 # Tamaño del pool de conexiones
+        "max_overflow": 20,              # Conexiones adicionales máximas
+        "pool_timeout": 30,              # Segundos máximos de espera por una conexión
+    },
+    # Instancias serverless de vida corta: una sola conexión reutilizable
+    'serverless': {
+        "pool_pre_ping": True,           # La instancia puede congelarse entre invocaciones
+        "pool_recycle": 60,              # Reciclar antes de que el servidor cierre la conexión
+        "pool_size": 1,                  # Una conexión por instancia
+        "max_overflow": 0,               # Sin conexiones adicionales
+    },
+    # Pooler externo (PgBouncer, pooler de Neon): el pooler mantiene las conexiones,
+    # la aplicación abre y cierra una por checkout sin pool local ni pre-ping
+    'pooler_externo': {
+        "poolclass": NullPool,
+    },
+    # SQLite embebido: archivo local, sin conexiones que se caigan ni pre-ping. Con WAL
+    # las lecturas son concurrentes y las escrituras se serializan (SQLITE_ESCRITURA)
+    'sqlite': {
+        "pool_size": 5,                  # También fija los hilos por worker (app/servidor.py)
+        "max_overflow": 5,
+        "pool_timeout": 30,
+    },
+}
+
+def opciones_pool(perfil):
+    """
+    Devuelve las opciones del motor SQLAlchemy para un perfil de pool.
+
+    La variable de entorno `POOL_PRE_PING=0` desactiva el pre-ping del perfil cuando
+    las estadísticas muestran que no hay conexiones caídas que lo justifiquen.
+
+    Args:
+        perfil (str): Nombre del perfil en `PERFILES_POOL`
+
+    Returns:
+        dict: Opciones para `SQLALCHEMY_ENGINE_OPTIONS`
+    """
+    opciones = dict(PERFILES_POOL[perfil])
+    if 'pool_pre_ping' in opciones and os.environ.get('POOL_PRE_PING') is not None:
+        opciones['pool_pre_ping'] = os.environ['POOL_PRE_PING'] not in ('0', 'false', 'False')
+    return opciones
 
 class Config:
     """
@@ -36,23 +94,121 @@ class Config:
     # URL de conexión a la base de datos
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     
+    # Réplica de lectura opcional. Los endpoints de solo lectura consultan la réplica
+    # salvo durante la ventana posterior a una escritura del propio usuario o mientras
+    # la réplica no esté disponible. Para probar en local basta con dos bases SQLite
+    # (por ejemplo DATABASE_REPLICA_URL=sqlite:///replica.db, copia de la principal).
+    SQLALCHEMY_BINDS = (
+        {'replica': os.environ['DATABASE_REPLICA_URL']} if os.environ.get('DATABASE_REPLICA_URL') else {}
+    )
+    REPLICA_VENTANA_LECTURA_PROPIA = int(os.environ.get('REPLICA_VENTANA_LECTURA_PROPIA', 5))
+    REPLICA_REINTENTO_SEGUNDOS = int(os.environ.get('REPLICA_REINTENTO_SEGUNDOS', 30))
+    
     # Desactivar el seguimiento de modificaciones de SQLAlchemy para mejorar el rendimiento
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # Configuración de Pool de Conexiones para evitar desconexiones SSL
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,           # Verificar conexiones antes de usarlas
-        "pool_recycle": 300,             # Reciclar conexiones cada 5 minutos
-        "pool_size": 10,                 # Tamaño del pool de conexiones
-        "max_overflow": 20,              # Conexiones adicionales máximas
-    }
+    # Configuración de Pool de Conexiones según el perfil del entorno
+    POOL_PERFIL = os.environ.get('POOL_PERFIL', 'servidor')
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(POOL_PERFIL)
 
     # Configuración JWT - Tiempo de expiración del token de acceso (1 hora)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # Token de refresco: caduca tras 7 días sin uso (se renueva en cada /refresh) y la
+    # sesión termina, como mucho, 30 días después de iniciarla con la contraseña
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    JWT_SESION_MAXIMA = timedelta(days=30)
+
+    # Caché de los assets construidos con hash de contenido (1 año, inmutables)
+    ASSETS_MAX_AGE = 31536000
+
+    # Compresión de respuestas: tamaño mínimo en bytes y niveles máximos para acotar la CPU
+    COMPRESION_HABILITADA = True
+    COMPRESION_TAMANO_MINIMO = 1024
+    COMPRESION_NIVEL_GZIP = 6
+    COMPRESION_NIVEL_BROTLI = 4
+
+    # Caché de la documentación técnica servida en una URL fija (1 hora)
+    DOCUMENTACION_MAX_AGE = 3600
+
+    # Archivo frío de tareas (flask archivar-tareas): antigüedad mínima de la fecha límite,
+    # tareas por lote (una transacción corta cada uno) y pausa entre lotes
+    ARCHIVO_ANTIGUEDAD_DIAS = int(os.environ.get('ARCHIVO_ANTIGUEDAD_DIAS', 365))
+    ARCHIVO_TAMANO_LOTE = 500
+    ARCHIVO_PAUSA_SEGUNDOS = 0.1
+
+    # Purga de usuarios inactivos (app/retencion.py, flask purgar-inactivos): días sin
+    # actividad, mínimo que admiten `--dias` y el parámetro `dias` del trabajo, usuarios
+    # por grupo, filas dependientes por lote (una transacción corta cada uno), pausa
+    # mínima entre lotes y fracción máxima del tiempo trabajando
+    RETENCION_INACTIVIDAD_DIAS = int(os.environ.get('RETENCION_INACTIVIDAD_DIAS', 730))
+    RETENCION_MINIMO_DIAS = int(os.environ.get('RETENCION_MINIMO_DIAS', 30))
+    RETENCION_LOTE_USUARIOS = 100
+    RETENCION_LOTE_FILAS = 500
+    RETENCION_PAUSA_SEGUNDOS = 0.1
+    RETENCION_CARGA_MAXIMA = 0.5
+
+    # Trabajos en segundo plano (app/trabajos.py): hilos por proceso, trabajos activos
+    # admitidos en la cola, segundos sin latido tras los que un trabajo en curso se
+    # considera huérfano y se reanuda, intervalo del vigilante y reintentos máximos
+    TRABAJOS_EN_PROCESO = True
+    TRABAJOS_HILOS = 2
+    TRABAJOS_MAXIMO_EN_COLA = 20
+    TRABAJOS_EXPIRACION_LATIDO = 120
+    TRABAJOS_INTERVALO_VIGILANCIA = 30
+    TRABAJOS_MAXIMO_INTENTOS = 3
+
+    # Recordatorios de fecha límite (app/recordatorios.py): días de antelación, tareas y
+    # recordatorios por lote, entregador, reintentos (espera inicial que se duplica en
+    # cada uno), segundos tras los que se libera un reclamo, días que se conservan los
+    # recordatorios terminados e intervalo de `flask recordatorios trabajador`
+    RECORDATORIOS_HABILITADOS = True
+    RECORDATORIOS_ANTELACION_DIAS = int(os.environ.get('RECORDATORIOS_ANTELACION_DIAS', 1))
+    RECORDATORIOS_TAMANO_LOTE = 500
+    RECORDATORIOS_ENTREGADOR = os.environ.get('RECORDATORIOS_ENTREGADOR', 'bitacora')
+    RECORDATORIOS_MAXIMO_INTENTOS = 5
+    RECORDATORIOS_REINTENTO_SEGUNDOS = 60
+    RECORDATORIOS_EXPIRACION_RECLAMO = 300
+    RECORDATORIOS_RETENCION_DIAS = 30
+    RECORDATORIOS_INTERVALO = 60
+
+    # Auditoría de las operaciones del panel (app/auditoria.py): los eventos confirmados
+    # se acumulan en memoria y un hilo los escribe por lotes de AUDITORIA_TAMANO_LOTE o
+    # cada AUDITORIA_INTERVALO segundos; por encima del máximo se descartan los más antiguos
+    AUDITORIA_HABILITADA = True
+    AUDITORIA_ASINCRONA = True
+    AUDITORIA_TAMANO_LOTE = 100
+    AUDITORIA_INTERVALO = 2.0
+    AUDITORIA_MAXIMO_EN_MEMORIA = 10000
+
+    # Perfilador bajo demanda (app/perfilador.py): segundos de validez de la firma que
+    # emite el panel, perfiles guardados por proceso, sentencias SQL por perfil, y
+    # funciones y líneas de memoria incluidas en el resumen de cada perfil
+    PERFILADOR_HABILITADO = os.environ.get('PERFILADOR_HABILITADO', 'true') not in ('0', 'false', 'False')
+    PERFILADOR_VALIDEZ_SEGUNDOS = 900
+    PERFILADOR_MAXIMO = 20
+    PERFILADOR_MAXIMO_SQL = 500
+    PERFILADOR_FUNCIONES = 40
+    PERFILADOR_LINEAS_MEMORIA = 25
+
+    # Bitácora: las solicitudes solo encolan los registros y un hilo escritor los formatea
+    # como JSON (con tokens y contraseñas redactados) y los escribe en stderr
+    BITACORA_HABILITADA = True
+    BITACORA_NIVEL = os.environ.get('BITACORA_NIVEL', 'INFO')
+    BITACORA_FORMATO = os.environ.get('BITACORA_FORMATO', 'json')   # 'json' o 'texto'
+    BITACORA_ASINCRONA = True
+    BITACORA_TAMANO_COLA = 10000     # Registros en espera; si se llena, se descartan
+    # Fracción de registros informativos (por debajo de WARNING) que se conservan por logger;
+    # se aplica también a los loggers hijos
+    BITACORA_MUESTREO = {
+        'app.blueprint.admin.vistas': 0.1,
+        'alembic': 0.0,              # Mensajes de arranque de Alembic al crear la aplicación
+    }
+    BITACORA_LIMITE_POR_SEGUNDO = 50  # Máximo de registros informativos por segundo y logger
 
 class DevelopmentConfig(Config):
     """Configuración para el entorno de desarrollo."""
     DEBUG = True
+    BITACORA_FORMATO = os.environ.get('BITACORA_FORMATO', 'texto')
     # Imprime en consola todas las sentencias SQL que SQLAlchemy ejecuta. Útil para depuración.
     SQLALCHEMY_ECHO = True
 
@@ -61,9 +217,58 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_ECHO = False
 
+class ServerlessConfig(ProductionConfig):
+    """
+    Configuración para despliegues serverless (Vercel).
+    Cada instancia atiende pocas solicitudes concurrentes y vive poco tiempo, por lo
+    que se mantiene una única conexión reutilizable en lugar de un pool de 10+20.
+    """
+    SERVERLESS = True
+    # La instancia se congela entre invocaciones: un hilo escritor podría no vaciar la cola
+    BITACORA_ASINCRONA = False
+    AUDITORIA_ASINCRONA = False
+    # Sin hilos de fondo: los trabajos los ejecuta `flask trabajos ejecutar` desde un cron
+    TRABAJOS_EN_PROCESO = False
+    POOL_PERFIL = os.environ.get('POOL_PERFIL', 'serverless')
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(POOL_PERFIL)
+
+class PoolerExternoConfig(ProductionConfig):
+    """
+    Configuración de producción detrás de un pooler externo (PgBouncer, pooler de Neon).
+    El pooler ya reutiliza las conexiones, por lo que la aplicación no mantiene pool propio.
+    """
+    POOL_PERFIL = os.environ.get('POOL_PERFIL', 'pooler_externo')
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(POOL_PERFIL)
+
+class SqliteConfig(ProductionConfig):
+    """
+    Configuración de producción de un solo nodo con SQLite (sin PostgreSQL).
+    DATABASE_URL debe apuntar a un archivo, p. ej. sqlite:////var/lib/gestion/tareas.db.
+    La comparación con la configuración por defecto se mide con scripts/prueba_sqlite.py.
+    """
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///gestion_tareas.db'
+    POOL_PERFIL = os.environ.get('POOL_PERFIL', 'sqlite')
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(POOL_PERFIL)
+
+    # PRAGMA aplicados a cada conexión (app/sqlite.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',           # Lectores concurrentes con un escritor
+        'synchronous': 'NORMAL',         # En WAL no corrompe; solo puede perder la última transacción ante un corte de luz
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),  # Espera por el bloqueo de escritura
+        'foreign_keys': 'ON',            # ON DELETE CASCADE de tareas y archivo
+        'cache_size': -64000,            # 64 MB de caché de páginas por conexión (negativo = KiB)
+        'mmap_size': 268435456,          # 256 MB leídos por mmap, sin copias a la caché
+        'temp_store': 'MEMORY',
+    }
+    # 'inmediata': las solicitudes de escritura abren la transacción con BEGIN IMMEDIATE
+    SQLITE_ESCRITURA = 'inmediata'
+
 # Diccionario que mapea los nombres de los entornos a sus respectivas clases de configuración.
 # Permite cargar la configuración dinámicamente según la variable de entorno FLASK_ENV.
 config_by_name = {
     'development': DevelopmentConfig,
-    'production': ProductionConfig
+    'production': ProductionConfig,
+    'serverless': ServerlessConfig,
+    'pooler': PoolerExternoConfig,
+    'sqlite': SqliteConfig
 }
\ No newline at end of file
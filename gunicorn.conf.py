@@ -0,0 +1,76 @@
+"""
+Configuración de Gunicorn para producción (multiproceso).
+
+Gunicorn la carga automáticamente desde el directorio de trabajo:
+
+    gunicorn run:app
+
+- La aplicación se precarga en el proceso maestro (arranque más rápido y
+  memoria compartida entre workers). Tras cada fork, `post_fork` vacía el pool
+  de conexiones heredado sin cerrarlo y arranca el hilo de la bitácora del worker.
+- Workers e hilos se calculan a partir de los núcleos y del pool de conexiones
+  del perfil (POOL_PERFIL); se pueden fijar con GUNICORN_WORKERS y GUNICORN_HILOS.
+  DB_MAX_CONEXIONES limita los workers para que sus pools quepan en la base de datos.
+- Recarga sin cortar solicitudes:
+    * Workers nuevos con el mismo código: `kill -HUP <pid maestro>`.
+    * Código nuevo (con precarga, HUP no reimporta la aplicación):
+      `kill -USR2 <pid maestro>` arranca un maestro nuevo junto al anterior y,
+      cuando responde, `kill -TERM <pid maestro anterior>` lo retira tras
+      terminar sus solicitudes en curso (GUNICORN_PIDFILE facilita los pids).
+  Cada worker se recicla además tras `max_requests` solicitudes (con margen
+  aleatorio para que no se reinicien todos a la vez).
+
+El escalado con el número de workers se mide con `scripts/escalado_workers.py`.
+"""
+
+import os
+
+from app.servidor import calcular_hilos, calcular_workers, nucleos_disponibles
+from config import config_by_name
+
+_opciones_motor = config_by_name[os.getenv('FLASK_ENV', 'production')].SQLALCHEMY_ENGINE_OPTIONS
+_maximo_conexiones = int(os.environ['DB_MAX_CONEXIONES']) if os.environ.get('DB_MAX_CONEXIONES') else None
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS') or
+              calcular_workers(nucleos_disponibles(), _opciones_motor, _maximo_conexiones))
+threads = int(os.environ.get('GUNICORN_HILOS') or calcular_hilos(_opciones_motor))
+
+# Tiempos: un worker bloqueado se reinicia tras `timeout`; al recargar o detener,
+# las solicitudes en curso disponen de `graceful_timeout` para terminar
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Reciclado periódico de workers (acota fugas de memoria)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+pidfile = os.environ.get('GUNICORN_PIDFILE')
+# Registros de acceso solo si se indica GUNICORN_ACCESSLOG ('-' para la salida estándar)
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+
+def when_ready(server):
+    """El maestro ya cargó la aplicación: cierra las conexiones que abriera antes de los forks."""
+    from app import db
+    from app.servidor import liberar_conexiones
+    liberar_conexiones(server.app.wsgi(), db)
+    server.log.info('Workers: %s, hilos por worker: %s', server.cfg.workers, server.cfg.threads)
+
+
+def post_fork(server, worker):
+    """Cada worker empieza con un pool vacío y su propio hilo de bitácora."""
+    from app import db
+    from app.servidor import tras_fork
+    tras_fork(server.app.wsgi(), db)
+
+
+def worker_exit(server, worker):
+    """Vacía la cola de la bitácora y el búfer de auditoría antes de que el worker termine."""
+    from app import auditoria, bitacora
+    auditoria.detener()
+    bitacora.detener()
@@ -29,7 +29,8 @@ app = crear_app(config_by_name[flask_env])
 
 # --- NOTA DE MEJORA PROFESIONAL ---
 # El bloque `if __name__ == '__main__':` se elimina.
-# En producción, un servidor WSGI como Gunicorn importará directamente la variable `app`.
+# En producción, Gunicorn importa directamente la variable `app`: `gunicorn run:app`
+# (la configuración de workers, precarga y recarga está en gunicorn.conf.py).
 # Para desarrollo local, se puede usar el comando `flask run`, que es el método moderno
 # y recomendado, en lugar de `python run.py`. Esto separa claramente el punto de entrada
 # de la lógica de ejecución.
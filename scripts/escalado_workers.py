@@ -0,0 +1,123 @@
+"""
+Prueba de escalado: rendimiento de la API síncrona según el número de workers.
+
+Arranca `gunicorn run:app` con la configuración de producción (gunicorn.conf.py:
+aplicación precargada y pool vaciado tras el fork) con 1, 2, 4... workers en la
+misma máquina y mide `GET /tareas/` con la misma concurrencia en cada caso.
+Informa de solicitudes por segundo, latencias p50/p99, errores y la eficiencia
+respecto al escalado lineal desde un worker, que muestra a partir de cuántos
+workers deja de compensar añadir procesos en esta máquina.
+
+Uso:
+    python scripts/escalado_workers.py
+    python scripts/escalado_workers.py --workers 1 2 4 8 --concurrencia 64 --duracion 10
+    DATABASE_URL=postgresql://... python scripts/escalado_workers.py --json escalado.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from prueba_carga import RAIZ, _entorno, _puerto_libre, medir, preparar_datos
+
+
+def _serie_workers():
+    """1, 2, 4... hasta el doble de los núcleos disponibles."""
+    from app.servidor import nucleos_disponibles
+    serie, workers = [], 1
+    while workers <= 2 * nucleos_disponibles():
+        serie.append(workers)
+        workers *= 2
+    return serie
+
+
+def iniciar_gunicorn(puerto, workers, hilos, url_bd):
+    """
+    Arranca gunicorn con gunicorn.conf.py y el número de workers indicado.
+    Espera a que todos los workers estén listos antes de devolver el proceso.
+    """
+    entorno = _entorno(url_bd)
+    entorno.update({
+        'GUNICORN_BIND': f'127.0.0.1:{puerto}',
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_HILOS': str(hilos),
+        'GUNICORN_LOGLEVEL': 'warning',
+        'BITACORA_NIVEL': 'WARNING',
+    })
+    proceso = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'run:app'], cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=0.5).close()
+            # El socket acepta conexiones en cuanto arranca el primer worker
+            time.sleep(0.5 + 0.1 * workers)
+            return proceso
+        except OSError:
+            if proceso.poll() is not None:
+                break
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError(f'No se pudo iniciar gunicorn con {workers} workers')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='Números de workers a probar (por defecto 1, 2, 4... hasta 2x núcleos).')
+    parser.add_argument('--hilos', type=int, default=4, help='Hilos por worker.')
+    parser.add_argument('--concurrencia', type=int, default=64, help='Conexiones concurrentes.')
+    parser.add_argument('--duracion', type=float, default=5, help='Segundos de medición por configuración.')
+    parser.add_argument('--tareas', type=int, default=50, help='Tareas del usuario de prueba.')
+    parser.add_argument('--json', help='Ruta donde guardar el informe en JSON.')
+    args = parser.parse_args()
+
+    url_bd = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'prueba_carga.db')
+    token = preparar_datos(url_bd, args.tareas)
+    serie = args.workers or _serie_workers()
+
+    from app.servidor import nucleos_disponibles
+    informe = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'nucleos': nucleos_disponibles(),
+        'hilos_por_worker': args.hilos,
+        'concurrencia': args.concurrencia,
+        'resultados': [],
+    }
+    print(f'Núcleos: {informe["nucleos"]}, hilos por worker: {args.hilos}, conexiones: {args.concurrencia}')
+    print(f'  {"workers":>8} {"req/s":>10} {"p50 ms":>10} {"p99 ms":>10} {"errores":>8} {"eficiencia":>11}')
+
+    base = None
+    for workers in serie:
+        puerto = _puerto_libre()
+        proceso = iniciar_gunicorn(puerto, workers, args.hilos, url_bd)
+        try:
+            # Calentamiento: cada worker abre sus conexiones y compila sus consultas
+            asyncio.run(medir(puerto, token, args.concurrencia, 1))
+            r = asyncio.run(medir(puerto, token, args.concurrencia, args.duracion))
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+        base = base or r['solicitudes_por_segundo'] / workers
+        r['workers'] = workers
+        r['eficiencia'] = round(r['solicitudes_por_segundo'] / (base * workers), 2) if base else None
+        informe['resultados'].append(r)
+        print(f'  {workers:>8} {r["solicitudes_por_segundo"]:>10} {r["p50_ms"]!s:>10} '
+              f'{r["p99_ms"]!s:>10} {r["errores"]:>8} {r["eficiencia"]!s:>11}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f'Informe guardado en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Mide el tiempo de arranque en frío de los puntos de entrada de la aplicación.
+
+Ejecuta cada punto de entrada en un proceso nuevo con `python -X importtime`,
+resume el tiempo total de importación y los módulos más costosos, y mide la
+primera solicitud atendida (que en modo serverless construye el grupo de
+blueprints correspondiente). Permite guardar el informe en JSON para seguir la
+evolución del arranque en frío entre versiones.
+
+Uso:
+    python scripts/medir_importacion.py
+    python scripts/medir_importacion.py --repeticiones 5 --top 15 --json informe.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Puntos de entrada a comparar: (nombre, módulo a importar, variables de entorno)
+PUNTOS_DE_ENTRADA = [
+    ('serverless', 'vercel_python_wsgi', {'FLASK_ENV': 'production', 'VERCEL': '1'}),
+    ('servidor', 'run', {'FLASK_ENV': 'production'}),
+]
+
+# Rutas usadas para medir la primera solicitud de cada grupo de blueprints
+RUTAS_PRIMERA_SOLICITUD = ['/login', '/admin/login']
+
+_CODIGO_PRIMERA_SOLICITUD = '''
+import sys, time
+inicio = time.perf_counter()
+from {modulo} import app
+importado = time.perf_counter()
+from werkzeug.test import Client
+cliente = Client(app)
+tiempos = []
+for ruta in sys.argv[1:]:
+    t = time.perf_counter()
+    cliente.get(ruta).close()
+    tiempos.append(time.perf_counter() - t)
+print(importado - inicio, *tiempos)
+'''
+
+
+def _entorno(extra):
+    entorno = dict(os.environ)
+    # Base de datos de archivo: la importación no se conecta, pero el motor debe poder crearse
+    entorno.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'medir_importacion.db'))
+    entorno.update(extra)
+    return entorno
+
+
+def medir_importacion(modulo, entorno):
+    """
+    Importa un módulo en un proceso nuevo con -X importtime.
+
+    Returns:
+        tuple: (microsegundos totales, lista de (acumulado, propio, módulo))
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, env=_entorno(entorno), capture_output=True, text=True, check=True
+    )
+    modulos = []
+    total = 0
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        acumulado = int(acumulado)
+        modulos.append((acumulado, int(propio), nombre.rstrip()))
+        if nombre.strip() == modulo:
+            total = acumulado
+    return total, modulos
+
+
+def medir_primera_solicitud(modulo, entorno):
+    """
+    Mide la importación y la primera solicitud a cada ruta en un proceso nuevo.
+
+    Returns:
+        list: Segundos de importación seguidos de los de cada ruta
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-c', _CODIGO_PRIMERA_SOLICITUD.format(modulo=modulo), *RUTAS_PRIMERA_SOLICITUD],
+        cwd=RAIZ, env=_entorno(entorno), capture_output=True, text=True, check=True
+    )
+    return [float(valor) for valor in resultado.stdout.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeticiones', type=int, default=3, help='Procesos por punto de entrada (se usa la mediana).')
+    parser.add_argument('--top', type=int, default=10, help='Módulos más costosos a mostrar.')
+    parser.add_argument('--json', help='Ruta donde guardar el informe en JSON.')
+    args = parser.parse_args()
+
+    informe = {'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0], 'puntos_de_entrada': {}}
+
+    for nombre, modulo, entorno in PUNTOS_DE_ENTRADA:
+        totales = []
+        ultimo_detalle = []
+        solicitudes = []
+        for _ in range(args.repeticiones):
+            total, detalle = medir_importacion(modulo, entorno)
+            totales.append(total)
+            ultimo_detalle = detalle
+            solicitudes.append(medir_primera_solicitud(modulo, entorno))
+
+        importacion_ms = statistics.median(totales) / 1000
+        primeras = [statistics.median(valores) * 1000 for valores in zip(*solicitudes)]
+        mas_costosos = sorted(ultimo_detalle, reverse=True)[:args.top]
+
+        print(f'== {nombre} ({modulo}) ==')
+        print(f'  importación (-X importtime): {importacion_ms:8.1f} ms')
+        print(f'  importación (reloj):         {primeras[0]:8.1f} ms')
+        for ruta, ms in zip(RUTAS_PRIMERA_SOLICITUD, primeras[1:]):
+            print(f'  primera solicitud {ruta:<12} {ms:8.1f} ms')
+        print('  módulos más costosos (acumulado):')
+        for acumulado, propio, modulo_importado in mas_costosos:
+            print(f'    {acumulado / 1000:8.1f} ms  {modulo_importado.strip()}')
+        print()
+
+        informe['puntos_de_entrada'][nombre] = {
+            'modulo': modulo,
+            'importacion_ms': importacion_ms,
+            'importacion_reloj_ms': primeras[0],
+            'primera_solicitud_ms': dict(zip(RUTAS_PRIMERA_SOLICITUD, primeras[1:])),
+            'modulos_mas_costosos': [
+                {'modulo': m.strip(), 'acumulado_ms': a / 1000, 'propio_ms': p / 1000}
+                for a, p, m in mas_costosos
+            ],
+        }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f'Informe guardado en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
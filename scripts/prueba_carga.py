@@ -0,0 +1,216 @@
+"""
+Prueba de carga: API de tareas síncrona (WSGI) frente a la asíncrona (ASGI).
+
+Crea una base de datos de prueba con un usuario y sus tareas, arranca un único
+proceso de cada servidor (`gunicorn run:app` con hilos y `uvicorn asgi:app`) y
+lanza clientes HTTP con conexiones persistentes contra `GET /tareas/` a varios
+niveles de concurrencia. Informa de solicitudes por segundo, latencias p50/p99
+y errores, que muestran cuántas conexiones concurrentes sostiene un proceso.
+
+Uso:
+    python scripts/prueba_carga.py
+    python scripts/prueba_carga.py --concurrencias 10 50 200 --duracion 10 --hilos 8
+    DATABASE_URL=postgresql://... python scripts/prueba_carga.py --json informe.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+
+def _entorno(url_bd):
+    entorno = dict(os.environ)
+    entorno.update({'FLASK_ENV': 'production', 'DATABASE_URL': url_bd, 'PYTHONPATH': RAIZ})
+    entorno.setdefault('SECRET_KEY', 'prueba-carga-clave-secreta-de-32-bytes')
+    entorno.setdefault('JWT_SECRET_KEY', 'prueba-carga-clave-jwt-de-32-bytes-minimo')
+    return entorno
+
+
+def preparar_datos(url_bd, num_tareas):
+    """
+    Crea las tablas, un usuario de prueba con sus tareas y un token de acceso.
+
+    Returns:
+        str: Token JWT del usuario de prueba
+    """
+    os.environ.update(_entorno(url_bd))
+    from app import crear_app, db
+    from app.blueprint.utils import emitir_tokens
+    from app.modelos import Tarea, Usuario
+    from config import ProductionConfig
+
+    app = crear_app(ProductionConfig)
+    with app.app_context():
+        db.create_all()
+        usuario = Usuario.query.filter_by(identificacion='99999999').first()
+        if usuario is None:
+            usuario = Usuario(identificacion='99999999', nombre='Carga', apellido='Prueba', contrasena='x')
+            db.session.add(usuario)
+            db.session.flush()
+            db.session.add_all(
+                Tarea(usuario_id=usuario.id, titulo=f'Tarea {i}', descripcion='Tarea de la prueba de carga')
+                for i in range(num_tareas)
+            )
+            db.session.commit()
+        return emitir_tokens(usuario, 'usuario')['token']
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(tipo, puerto, hilos, url_bd):
+    """
+    Arranca un proceso servidor de un solo worker.
+
+    Args:
+        tipo (str): 'sincrono' (gunicorn con hilos) o 'asincrono' (uvicorn)
+    """
+    direccion = f'127.0.0.1:{puerto}'
+    if tipo == 'asincrono':
+        comando = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers', '1',
+                   '--host', '127.0.0.1', '--port', str(puerto), '--log-level', 'warning']
+    elif shutil.which('gunicorn'):
+        comando = ['gunicorn', '-w', '1', '--threads', str(hilos), '-b', direccion, 'run:app', '--log-level', 'warning']
+    else:
+        # Sin gunicorn (p. ej. Windows): servidor de Werkzeug con un hilo por solicitud
+        comando = [sys.executable, '-c', f'from run import app; app.run(port={puerto}, threaded=True)']
+    proceso = subprocess.Popen(comando, cwd=RAIZ, env=_entorno(url_bd),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    limite = time.time() + 30
+    while time.time() < limite:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=0.5).close()
+            return proceso
+        except OSError:
+            if proceso.poll() is not None:
+                break
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError(f'No se pudo iniciar el servidor {tipo}: {" ".join(comando)}')
+
+
+async def _cliente(puerto, solicitud, fin, latencias, errores):
+    """
+    Cliente con una conexión persistente que repite la solicitud hasta `fin`.
+    """
+    lector = escritor = None
+    while time.perf_counter() < fin:
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            inicio = time.perf_counter()
+            escritor.write(solicitud)
+            await escritor.drain()
+            estado = int((await lector.readline()).split()[1])
+            longitud = 0
+            cerrar = False
+            while True:
+                linea = await lector.readline()
+                if linea in (b'\r\n', b''):
+                    break
+                nombre, _, valor = linea.decode('latin-1').partition(':')
+                nombre = nombre.strip().lower()
+                if nombre == 'content-length':
+                    longitud = int(valor)
+                elif nombre == 'connection' and valor.strip().lower() == 'close':
+                    cerrar = True
+            await lector.readexactly(longitud)
+            if estado != 200:
+                errores.append(estado)
+            else:
+                latencias.append(time.perf_counter() - inicio)
+            if cerrar:
+                escritor.close()
+                escritor = None
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as error:
+            errores.append(type(error).__name__)
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+            await asyncio.sleep(0.01)
+    if escritor is not None:
+        escritor.close()
+
+
+async def medir(puerto, token, concurrencia, duracion):
+    """
+    Lanza `concurrencia` clientes durante `duracion` segundos.
+
+    Returns:
+        dict: Solicitudes por segundo, latencias p50/p99 (ms) y errores
+    """
+    solicitud = (
+        'GET /tareas/ HTTP/1.1\r\n'
+        f'Host: 127.0.0.1:{puerto}\r\n'
+        f'Authorization: Bearer {token}\r\n'
+        'Connection: keep-alive\r\n\r\n'
+    ).encode('latin-1')
+    latencias, errores = [], []
+    fin = time.perf_counter() + duracion
+    await asyncio.gather(*(_cliente(puerto, solicitud, fin, latencias, errores) for _ in range(concurrencia)))
+
+    latencias.sort()
+    percentil = lambda p: round(latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000, 1) if latencias else None
+    return {
+        'concurrencia': concurrencia,
+        'solicitudes_por_segundo': round(len(latencias) / duracion, 1),
+        'p50_ms': percentil(0.50),
+        'p99_ms': percentil(0.99),
+        'errores': len(errores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--concurrencias', type=int, nargs='+', default=[1, 10, 50, 100, 200],
+                        help='Conexiones concurrentes a probar.')
+    parser.add_argument('--duracion', type=float, default=5, help='Segundos por nivel de concurrencia.')
+    parser.add_argument('--hilos', type=int, default=8, help='Hilos del worker síncrono (gunicorn --threads).')
+    parser.add_argument('--tareas', type=int, default=50, help='Tareas del usuario de prueba.')
+    parser.add_argument('--json', help='Ruta donde guardar el informe en JSON.')
+    args = parser.parse_args()
+
+    url_bd = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'prueba_carga.db')
+    token = preparar_datos(url_bd, args.tareas)
+
+    informe = {'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'hilos_sincrono': args.hilos, 'resultados': {}}
+    for tipo in ('sincrono', 'asincrono'):
+        puerto = _puerto_libre()
+        proceso = iniciar_servidor(tipo, puerto, args.hilos, url_bd)
+        try:
+            print(f'== {tipo} ==')
+            print(f'  {"conexiones":>10} {"req/s":>10} {"p50 ms":>10} {"p99 ms":>10} {"errores":>8}')
+            resultados = []
+            for concurrencia in args.concurrencias:
+                r = asyncio.run(medir(puerto, token, concurrencia, args.duracion))
+                resultados.append(r)
+                print(f'  {r["concurrencia"]:>10} {r["solicitudes_por_segundo"]:>10} '
+                      f'{r["p50_ms"]!s:>10} {r["p99_ms"]!s:>10} {r["errores"]:>8}')
+            informe['resultados'][tipo] = resultados
+            print()
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f'Informe guardado en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Prueba de concurrencia con SQLite: configuración por defecto frente al perfil SQLite.
+
+Para cada configuración crea una base SQLite nueva y lanza a la vez varios
+procesos escritores (POST /tareas/, como crear_tarea en workers distintos) y
+varios lectores (GET /tareas/ de otro usuario con un número fijo de tareas).
+Informa de operaciones por segundo, latencias p50/p99 y errores de cada rol
+(respuestas distintas de 201/200, como las debidas a "database is locked").
+
+- predeterminado: ProductionConfig (diario de reversión, transacciones diferidas)
+- sqlite: SqliteConfig (WAL, PRAGMA ajustados y BEGIN IMMEDIATE en las escrituras)
+
+Uso:
+    python scripts/prueba_sqlite.py
+    python scripts/prueba_sqlite.py --escritores 8 --lectores 8 --duracion 10 --json sqlite.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+CONFIGURACIONES = {'predeterminado': 'production', 'sqlite': 'sqlite'}
+
+
+def _preparar_entorno(url_bd):
+    os.environ.update({'FLASK_ENV': 'production', 'DATABASE_URL': url_bd, 'BITACORA_NIVEL': 'CRITICAL'})
+    os.environ.setdefault('JWT_SECRET_KEY', 'prueba-sqlite-clave-jwt-de-32-bytes-minimo')
+
+
+def _crear_app(configuracion):
+    from app import crear_app
+    from config import config_by_name
+    return crear_app(config_by_name[configuracion])
+
+
+def preparar_datos(configuracion, url_bd, num_tareas):
+    """
+    Crea las tablas, un usuario lector con sus tareas y un usuario escritor.
+
+    Returns:
+        tuple: (token del lector, token del escritor)
+    """
+    _preparar_entorno(url_bd)
+    from app import db
+    from app.blueprint.utils import emitir_tokens
+    from app.modelos import Tarea, Usuario
+
+    app = _crear_app(configuracion)
+    with app.app_context():
+        db.create_all()
+        lector = Usuario(identificacion='99999990', nombre='Lector', apellido='Prueba', contrasena='x')
+        escritor = Usuario(identificacion='99999991', nombre='Escritor', apellido='Prueba', contrasena='x')
+        db.session.add_all([lector, escritor])
+        db.session.flush()
+        db.session.add_all(
+            Tarea(usuario_id=lector.id, titulo=f'Tarea {i}', descripcion='Tarea de la prueba de SQLite')
+            for i in range(num_tareas)
+        )
+        db.session.commit()
+        return emitir_tokens(lector, 'usuario')['token'], emitir_tokens(escritor, 'usuario')['token']
+
+
+def _trabajador(configuracion, url_bd, rol, indice, token, duracion, barrera, resultados):
+    """
+    Proceso que repite su operación durante `duracion` segundos y envía sus mediciones.
+    """
+    _preparar_entorno(url_bd)
+    cliente = _crear_app(configuracion).test_client()
+    cabeceras = {'Authorization': f'Bearer {token}'}
+    latencias, errores = [], []
+
+    barrera.wait()
+    fin = time.perf_counter() + duracion
+    n = 0
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        if rol == 'escritura':
+            respuesta = cliente.post('/tareas/', headers=cabeceras, json={
+                'titulo': f'Prueba {indice}-{n}', 'descripcion': 'Tarea creada durante la prueba'
+            })
+            correcto = respuesta.status_code == 201
+        else:
+            respuesta = cliente.get('/tareas/', headers=cabeceras)
+            correcto = respuesta.status_code == 200
+        n += 1
+        if correcto:
+            latencias.append(time.perf_counter() - inicio)
+        else:
+            errores.append(respuesta.status_code)
+    resultados.put((rol, latencias, errores))
+
+
+def medir(configuracion, escritores, lectores, duracion, num_tareas):
+    """
+    Ejecuta una ronda de escritores y lectores concurrentes sobre una base nueva.
+
+    Returns:
+        dict: Por rol, operaciones por segundo, p50/p99 (ms) y errores
+    """
+    directorio = tempfile.mkdtemp(prefix='prueba_sqlite_')
+    url_bd = 'sqlite:///' + os.path.join(directorio, 'tareas.db')
+    # La preparación se hace en un proceso aparte para no heredar motores ni configuración
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Pool(1) as pool:
+        token_lector, token_escritor = pool.apply(preparar_datos, (configuracion, url_bd, num_tareas))
+
+    barrera = contexto.Barrier(escritores + lectores)
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_trabajador, args=(configuracion, url_bd, rol, i, token, duracion, barrera, resultados))
+        for rol, cantidad, token in (('escritura', escritores, token_escritor), ('lectura', lectores, token_lector))
+        for i in range(cantidad)
+    ]
+    for proceso in procesos:
+        proceso.start()
+
+    por_rol = {'escritura': ([], []), 'lectura': ([], [])}
+    for _ in procesos:
+        rol, latencias, errores = resultados.get()
+        por_rol[rol][0].extend(latencias)
+        por_rol[rol][1].extend(errores)
+    for proceso in procesos:
+        proceso.join()
+
+    informe = {}
+    for rol, (latencias, errores) in por_rol.items():
+        latencias.sort()
+        percentil = lambda p: round(latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000, 1) if latencias else None
+        informe[rol] = {
+            'por_segundo': round(len(latencias) / duracion, 1),
+            'p50_ms': percentil(0.50),
+            'p99_ms': percentil(0.99),
+            'errores': len(errores),
+        }
+    return informe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--escritores', type=int, default=4, help='Procesos que crean tareas.')
+    parser.add_argument('--lectores', type=int, default=4, help='Procesos que listan tareas.')
+    parser.add_argument('--duracion', type=float, default=5, help='Segundos de medición por configuración.')
+    parser.add_argument('--tareas', type=int, default=50, help='Tareas del usuario lector.')
+    parser.add_argument('--json', help='Ruta donde guardar el informe en JSON.')
+    args = parser.parse_args()
+
+    informe = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'escritores': args.escritores,
+        'lectores': args.lectores,
+        'resultados': {},
+    }
+    print(f'Escritores: {args.escritores}, lectores: {args.lectores}, duración: {args.duracion} s')
+    print(f'  {"configuración":<15} {"rol":<10} {"op/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errores":>8}')
+    for nombre, configuracion in CONFIGURACIONES.items():
+        resultado = medir(configuracion, args.escritores, args.lectores, args.duracion, args.tareas)
+        informe['resultados'][nombre] = resultado
+        for rol, r in resultado.items():
+            print(f'  {nombre:<15} {rol:<10} {r["por_segundo"]:>8} {r["p50_ms"]!s:>8} '
+                  f'{r["p99_ms"]!s:>8} {r["errores"]:>8}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f'Informe guardado en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
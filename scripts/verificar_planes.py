@@ -0,0 +1,379 @@
+"""
+Verificación de los planes de las consultas calientes (regresiones de índices).
+
+Siembra una base con un volumen realista de usuarios, tareas y tareas
+archivadas, ejecuta ANALYZE y recorre las rutas reales de la aplicación con un
+cliente de prueba: listado de tareas (cada combinación de filtros y orden),
+sugerencias, búsqueda y orden del panel de usuarios, comprobación de títulos
+duplicados y búsqueda del usuario en el inicio de sesión. Captura cada SELECT
+que emite la ruta, obtiene su plan (SQLite: EXPLAIN QUERY PLAN; PostgreSQL:
+EXPLAIN en JSON con enable_seqscan desactivado, de modo que un Seq Scan solo
+aparece si ningún índice sirve) y clasifica el acceso a cada tabla:
+
+- busqueda: el índice acota las filas (SQLite SEARCH, Index Cond en PostgreSQL)
+- indice:   recorrido en el orden de un índice que se detiene en el LIMIT
+- completo: recorrido completo de la tabla
+
+Cada escenario declara el código de estado esperado y el acceso mínimo por
+tabla; si la ruta responde con otro código, no emite ningún SELECT o un plan
+queda por debajo, el escenario falla y el script termina con código 1 (apto
+para CI).
+
+Uso:
+    python scripts/verificar_planes.py
+    python scripts/verificar_planes.py --usuarios 2000 --tareas 50 --mostrar-planes
+    python scripts/verificar_planes.py --url postgresql://localhost/planes --json planes.json
+
+La base indicada con --url debe ser exclusiva para esta verificación: se crean
+las tablas y se siembra si no tiene usuarios.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+NIVELES = {'completo': 0, 'indice': 1, 'busqueda': 2}
+
+# Tablas de la aplicación (se ignoran subconsultas y tablas temporales del plan)
+TABLAS = ('usuarios', 'tareas', 'tareas_archivadas', 'administradores')
+
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Andrés']
+APELLIDOS = ['García', 'Rodríguez', 'López', 'Martínez', 'Hernández', 'Gómez', 'Díaz', 'Pérez']
+PALABRAS = ['Informe', 'Reunión', 'Revisar', 'Comprar', 'Llamar', 'Enviar', 'Preparar', 'Estudiar']
+
+CONTRASENA = 'Clave123'
+IDENTIFICACION_ADMIN = '90000000'
+
+
+class Escenario:
+    """
+    Solicitud a una ruta real y acceso mínimo esperado por tabla.
+
+    Attributes:
+        nombre (str): Nombre descriptivo
+        metodo (str): Método HTTP
+        ruta (str): Ruta con su cadena de consulta
+        actor (str): 'usuario', 'admin' o None (sin autenticación)
+        esperado (dict): Tabla -> nivel mínimo (por defecto 'busqueda' para todas)
+        cuerpo (dict): Cuerpo JSON de la solicitud
+        estado (int): Código de estado esperado de la respuesta
+        conteo_completo (bool): Admite un recorrido completo en el COUNT de la paginación
+            (búsqueda con comodín inicial, que ningún índice B-tree resuelve)
+    """
+
+    def __init__(self, nombre, metodo, ruta, actor, esperado=None, cuerpo=None, conteo_completo=False, estado=200):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.actor = actor
+        self.esperado = esperado or {}
+        self.cuerpo = cuerpo
+        self.conteo_completo = conteo_completo
+        self.estado = estado
+
+    def nivel_minimo(self, tabla, sentencia):
+        if self.conteo_completo and sentencia.lstrip().upper().startswith('SELECT COUNT('):
+            return 'completo'
+        return self.esperado.get(tabla, 'busqueda')
+
+
+def escenarios(identificacion_usuario, titulo_existente):
+    """
+    Construye los escenarios a verificar.
+
+    Returns:
+        list: Escenarios
+    """
+    lista = []
+
+    # Listado de tareas: cada combinación de filtro, campo y dirección de orden
+    filtros = {
+        'sin filtro': '',
+        'busqueda': '&search=informe',
+        'fechas': '&date_from=2024-01-01&date_to=2030-12-31',
+        'busqueda y fechas': '&search=informe&date_from=2024-01-01',
+    }
+    for nombre_filtro, filtro in filtros.items():
+        for campo in ('titulo', 'fecha_limite', 'creado_en'):
+            for orden in ('asc', 'desc'):
+                lista.append(Escenario(
+                    f'tareas: {nombre_filtro}, {campo} {orden}', 'GET',
+                    f'/tareas/?sort_by={campo}&order={orden}{filtro}', 'usuario'
+                ))
+    lista.append(Escenario('tareas: proyección de campos', 'GET', '/tareas/?fields=id,titulo&sort_by=fecha_limite', 'usuario'))
+    lista.append(Escenario('tareas: con archivadas', 'GET', '/tareas/?incluir_archivadas=1&search=informe', 'usuario'))
+    lista.append(Escenario('tareas: sugerencias de título', 'GET', '/tareas/sugerencias?q=rev', 'usuario'))
+
+    # Comprobación de título duplicado al crear y al renombrar
+    lista.append(Escenario('tareas: título duplicado al crear', 'POST', '/tareas/', 'usuario',
+                           cuerpo={'titulo': titulo_existente}, estado=400))
+
+    # Búsqueda del usuario o administrador al iniciar sesión
+    lista.append(Escenario('login: usuario', 'POST', '/auth/login', None,
+                           cuerpo={'identificacion': identificacion_usuario, 'contrasena': CONTRASENA}))
+    lista.append(Escenario('login: administrador', 'POST', '/admin/auth/api/login', None,
+                           cuerpo={'identificacion': IDENTIFICACION_ADMIN, 'contrasena': CONTRASENA}))
+
+    # Panel de usuarios: cada orden del panel, con y sin búsqueda. La página se sirve
+    # recorriendo un índice en orden y se detiene en el LIMIT
+    for orden in ('id', 'identificacion', 'nombre', 'apellido', 'creado_en', 'total_tareas', 'tareas_vencidas'):
+        for direccion in ('asc', 'desc'):
+            lista.append(Escenario(
+                f'usuarios: orden {orden} {direccion}', 'GET',
+                f'/admin/api/usuarios?sort={orden}&order={direccion}', 'admin', {'usuarios': 'indice'}
+            ))
+    lista.append(Escenario('usuarios: búsqueda', 'GET', '/admin/api/usuarios?search=gar', 'admin',
+                           {'usuarios': 'indice'}, conteo_completo=True))
+    lista.append(Escenario('usuarios: fechas de registro', 'GET',
+                           '/admin/api/usuarios?date_from=2025-01-01&date_to=2025-06-30&sort=creado_en', 'admin'))
+    return lista
+
+
+def sembrar(db, num_usuarios, tareas_por_usuario):
+    """
+    Crea usuarios con un número variable de tareas (activas y archivadas) y un administrador.
+
+    Returns:
+        tuple: (usuario con más tareas, título de una de sus tareas)
+    """
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from app.contadores import recalcular_contadores
+    from app.modelos import Administrador, Tarea, TareaArchivada, Usuario, normalizar_titulo
+
+    aleatorio = random.Random(42)
+    hash_contrasena = generate_password_hash(CONTRASENA)
+    ahora = datetime.utcnow()
+
+    db.session.add(Administrador(identificacion=IDENTIFICACION_ADMIN, nombre='Admin', apellido='Planes',
+                                 contrasena=hash_contrasena))
+    db.session.execute(insert(Usuario), [
+        {
+            'identificacion': str(10000000 + i),
+            'nombre': aleatorio.choice(NOMBRES),
+            'apellido': aleatorio.choice(APELLIDOS),
+            'contrasena': hash_contrasena,
+            'creado_en': ahora - timedelta(days=aleatorio.randint(0, 730)),
+        }
+        for i in range(num_usuarios)
+    ])
+    db.session.commit()
+
+    ids = db.session.execute(Usuario.__table__.select().with_only_columns(Usuario.id)).scalars().all()
+    tareas, archivadas = [], []
+    id_archivada = 10_000_000
+    for usuario_id in ids:
+        # Distribución sesgada: pocos usuarios concentran muchas tareas
+        cantidad = int(aleatorio.paretovariate(1.5) * tareas_por_usuario / 3)
+        for j in range(min(cantidad, tareas_por_usuario * 20)):
+            titulo = f'{aleatorio.choice(PALABRAS)} {j}'
+            fila = {
+                'usuario_id': usuario_id,
+                'titulo': titulo,
+                'titulo_normalizado': normalizar_titulo(titulo),
+                'descripcion': 'Descripción de la tarea sembrada para los planes',
+                'fecha_limite': (date.today() + timedelta(days=aleatorio.randint(-700, 365))
+                                 if aleatorio.random() < 0.8 else None),
+                'creado_en': ahora - timedelta(days=aleatorio.randint(0, 700)),
+            }
+            if aleatorio.random() < 0.2:
+                id_archivada += 1
+                archivadas.append({**{k: v for k, v in fila.items() if k != 'titulo_normalizado'},
+                                   'id': id_archivada})
+            else:
+                tareas.append(fila)
+
+    for inicio in range(0, len(tareas), 5000):
+        db.session.execute(insert(Tarea).execution_options(sin_contadores=True), tareas[inicio:inicio + 5000])
+    for inicio in range(0, len(archivadas), 5000):
+        db.session.execute(insert(TareaArchivada), archivadas[inicio:inicio + 5000])
+    recalcular_contadores(db.session)
+    db.session.commit()
+
+    usuario = db.session.execute(
+        Usuario.__table__.select().order_by(Usuario.total_tareas.desc()).limit(1)
+    ).first()
+    titulo = db.session.execute(
+        Tarea.__table__.select().with_only_columns(Tarea.titulo).where(Tarea.usuario_id == usuario.id).limit(1)
+    ).scalar()
+    return usuario, titulo
+
+
+def _niveles_sqlite(conexion, sentencia, parametros):
+    filas = conexion.exec_driver_sql('EXPLAIN QUERY PLAN ' + sentencia, parametros).all()
+    detalles = [fila[-1] for fila in filas]
+    ordenado = not any('TEMP B-TREE FOR ORDER BY' in detalle for detalle in detalles)
+    niveles = {}
+    for detalle in detalles:
+        coincidencia = re.match(r'(SCAN|SEARCH) (\w+)(?: AS \w+)?(.*)', detalle)
+        if not coincidencia or coincidencia.group(2) not in TABLAS:
+            continue
+        operacion, tabla, resto = coincidencia.groups()
+        if operacion == 'SEARCH':
+            nivel = 'busqueda'
+        elif 'INDEX' in resto or ('ORDER BY' in sentencia.upper() and ordenado):
+            # Recorrido en el orden de un índice (o de la clave primaria) que el LIMIT corta
+            nivel = 'indice'
+        else:
+            nivel = 'completo'
+        niveles[tabla] = min(niveles.get(tabla, nivel), nivel, key=NIVELES.get)
+    return niveles, detalles
+
+
+def _niveles_postgresql(conexion, sentencia, parametros):
+    plan = conexion.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sentencia, parametros).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    niveles, detalles = {}, []
+
+    def recorrer(nodo, profundidad=0):
+        tipo = nodo['Node Type']
+        tabla = nodo.get('Relation Name')
+        detalles.append('  ' * profundidad + tipo + (f' on {tabla}' if tabla else '')
+                        + (f" using {nodo['Index Name']}" if nodo.get('Index Name') else ''))
+        if tabla in TABLAS:
+            if tipo == 'Seq Scan':
+                nivel = 'completo'
+            elif 'Index Cond' in nodo or tipo == 'Bitmap Heap Scan':
+                nivel = 'busqueda'
+            else:
+                nivel = 'indice'
+            niveles[tabla] = min(niveles.get(tabla, nivel), nivel, key=NIVELES.get)
+        for hijo in nodo.get('Plans', []):
+            recorrer(hijo, profundidad + 1)
+
+    recorrer(plan[0]['Plan'])
+    return niveles, detalles
+
+
+def verificar(app, db, lista, token_usuario, mostrar_planes):
+    """
+    Ejecuta cada escenario, obtiene los planes de sus SELECT y compara con lo esperado.
+
+    Returns:
+        list: Resultados por escenario (con sus sentencias, planes y fallos)
+    """
+    from sqlalchemy import event
+
+    cliente = app.test_client()
+    with app.app_context():
+        motor = db.engine
+    dialecto = motor.dialect.name
+    explicar = _niveles_postgresql if dialecto == 'postgresql' else _niveles_sqlite
+
+    capturadas = []
+    capturando = [False]
+
+    @event.listens_for(motor, 'before_cursor_execute')
+    def capturar(conexion, cursor, sentencia, parametros, contexto, executemany):
+        if capturando[0] and sentencia.lstrip().upper().startswith('SELECT'):
+            capturadas.append((sentencia, parametros))
+
+    respuesta = cliente.post('/admin/auth/api/login',
+                             json={'identificacion': IDENTIFICACION_ADMIN, 'contrasena': CONTRASENA})
+    token_admin = respuesta.get_json()['token']
+    tokens = {'usuario': token_usuario, 'admin': token_admin}
+
+    resultados = []
+    for escenario in lista:
+        cabeceras = {'Authorization': f'Bearer {tokens[escenario.actor]}'} if escenario.actor else {}
+        capturadas.clear()
+        capturando[0] = True
+        try:
+            respuesta = cliente.open(escenario.ruta, method=escenario.metodo, json=escenario.cuerpo, headers=cabeceras)
+        finally:
+            capturando[0] = False
+
+        resultado = {'escenario': escenario.nombre, 'estado': respuesta.status_code, 'sentencias': [], 'fallos': []}
+        # Una respuesta de error (401, 422, 500...) no llega a las consultas que se verifican
+        if respuesta.status_code != escenario.estado:
+            resultado['fallos'].append(f'estado {respuesta.status_code} (se esperaba {escenario.estado})')
+        if not capturadas:
+            resultado['fallos'].append('la ruta no emitió ningún SELECT')
+        with motor.connect() as conexion:
+            if dialecto == 'postgresql':
+                conexion.exec_driver_sql('SET enable_seqscan = off')
+            for sentencia, parametros in capturadas:
+                niveles, detalles = explicar(conexion, sentencia, parametros)
+                resultado['sentencias'].append({'sql': sentencia, 'plan': detalles, 'niveles': niveles})
+                for tabla, nivel in niveles.items():
+                    minimo = escenario.nivel_minimo(tabla, sentencia)
+                    if NIVELES[nivel] < NIVELES[minimo]:
+                        resultado['fallos'].append(
+                            f'{tabla}: acceso "{nivel}" (se esperaba al menos "{minimo}")\n'
+                            f'      SQL: {" ".join(sentencia.split())[:160]}\n'
+                            + ''.join(f'      {detalle}\n' for detalle in detalles).rstrip()
+                        )
+            conexion.rollback()
+
+        marca = 'OK   ' if not resultado['fallos'] else 'FALLA'
+        accesos = sorted({f'{t}={n}' for s in resultado['sentencias'] for t, n in s['niveles'].items()})
+        print(f'  {marca} {escenario.nombre:<42} {respuesta.status_code}  {", ".join(accesos)}')
+        for fallo in resultado['fallos']:
+            print(f'      {fallo}')
+        if mostrar_planes:
+            for s in resultado['sentencias']:
+                print(f'      SQL: {" ".join(s["sql"].split())[:160]}')
+                for detalle in s['plan']:
+                    print(f'        {detalle}')
+        resultados.append(resultado)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='Base de datos exclusiva (por defecto un SQLite temporal).')
+    parser.add_argument('--usuarios', type=int, default=1000, help='Usuarios a sembrar.')
+    parser.add_argument('--tareas', type=int, default=40, help='Tareas por usuario (media aproximada).')
+    parser.add_argument('--mostrar-planes', action='store_true', help='Muestra el plan de cada sentencia.')
+    parser.add_argument('--json', help='Ruta donde guardar el informe en JSON.')
+    args = parser.parse_args()
+
+    url_bd = args.url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='planes_'), 'planes.db')
+    os.environ.update({'FLASK_ENV': 'production', 'DATABASE_URL': url_bd, 'BITACORA_NIVEL': 'ERROR'})
+    os.environ.setdefault('JWT_SECRET_KEY', 'verificar-planes-clave-jwt-de-32-bytes')
+
+    from sqlalchemy import text
+    from app import crear_app, db
+    from app.blueprint.utils import emitir_tokens
+    from app.modelos import Tarea, Usuario
+    from config import ProductionConfig
+
+    app = crear_app(ProductionConfig)
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Usuario.id).first() is None:
+            print(f'Sembrando {args.usuarios} usuarios...')
+            sembrar(db, args.usuarios, args.tareas)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+        usuario = db.session.query(Usuario).order_by(Usuario.total_tareas.desc()).first()
+        titulo = db.session.query(Tarea.titulo).filter_by(usuario_id=usuario.id).limit(1).scalar()
+        token_usuario = emitir_tokens(usuario, 'usuario')['token']
+        print(f'Base: {db.engine.dialect.name}, usuarios: {db.session.query(Usuario).count()}, '
+              f'tareas: {db.session.query(Tarea).count()}, usuario de prueba con {usuario.total_tareas} tareas')
+        identificacion = usuario.identificacion
+
+    resultados = verificar(app, db, escenarios(identificacion, titulo), token_usuario, args.mostrar_planes)
+    fallidos = [r for r in resultados if r['fallos']]
+    print(f'\n{len(resultados) - len(fallidos)} de {len(resultados)} escenarios correctos.')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False, default=str)
+        print(f'Informe guardado en {args.json}')
+
+    sys.exit(1 if fallidos else 0)
+
+
+if __name__ == '__main__':
+    main()
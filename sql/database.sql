@@ -20,14 +20,28 @@ CREATE TABLE IF NOT EXISTS Usuarios (
     apellido VARCHAR(100) NOT NULL,
     contrasena VARCHAR(255) NOT NULL,
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Último inicio de sesión o escritura de tareas (purga de cuentas inactivas)
+    ultima_actividad TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Contadores desnormalizados que mantiene la aplicación (flask reparar-contadores los recalcula)
+    total_tareas INTEGER NOT NULL DEFAULT 0,
+    tareas_vencidas INTEGER NOT NULL DEFAULT 0
 );
 
+CREATE INDEX IF NOT EXISTS ix_usuarios_total_tareas ON Usuarios (total_tareas);
+CREATE INDEX IF NOT EXISTS ix_usuarios_tareas_vencidas ON Usuarios (tareas_vencidas);
+-- Orden y filtro por fecha del listado de usuarios del panel
+CREATE INDEX IF NOT EXISTS ix_usuarios_nombre ON Usuarios (nombre);
+CREATE INDEX IF NOT EXISTS ix_usuarios_apellido ON Usuarios (apellido);
+CREATE INDEX IF NOT EXISTS ix_usuarios_creado_en ON Usuarios (creado_en);
+
 -- Creación de la tabla tareas con relación a usuarios
 CREATE TABLE IF NOT EXISTS Tareas (
     id SERIAL PRIMARY KEY,
     usuario_id INTEGER NOT NULL,
     titulo VARCHAR(100) NOT NULL,
+    -- Título en minúsculas y sin tildes que mantiene la aplicación (sugerencias por prefijo)
+    titulo_normalizado VARCHAR(100) NOT NULL DEFAULT '',
     descripcion TEXT,
     fecha_limite DATE,
     creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -35,3 +49,105 @@ CREATE TABLE IF NOT EXISTS Tareas (
     FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE,
     UNIQUE (usuario_id, titulo)
 );
+
+CREATE INDEX IF NOT EXISTS ix_tareas_usuario_titulo_normalizado
+    ON Tareas (usuario_id, titulo_normalizado text_pattern_ops);
+
+-- Ventana de vencimientos de todos los usuarios (programador de recordatorios)
+CREATE INDEX IF NOT EXISTS ix_tareas_fecha_limite ON Tareas (fecha_limite, id);
+
+-- Archivo frío: tareas vencidas hace más de ARCHIVO_ANTIGUEDAD_DIAS (flask archivar-tareas)
+CREATE TABLE IF NOT EXISTS Tareas_Archivadas (
+    id INTEGER PRIMARY KEY,
+    usuario_id INTEGER NOT NULL,
+    titulo VARCHAR(100) NOT NULL,
+    descripcion TEXT,
+    fecha_limite DATE,
+    creado_en TIMESTAMP,
+    actualizado_en TIMESTAMP,
+    archivado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_tareas_archivadas_usuario_fecha_limite
+    ON Tareas_Archivadas (usuario_id, fecha_limite);
+
+-- Trabajos en segundo plano del panel (app/trabajos.py)
+CREATE TABLE IF NOT EXISTS Trabajos (
+    id SERIAL PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    parametros JSON NOT NULL,
+    punto_control JSON,
+    progreso INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    resultado JSON,
+    error TEXT,
+    cancelacion_solicitada BOOLEAN NOT NULL DEFAULT FALSE,
+    propietario VARCHAR(100),
+    intentos INTEGER NOT NULL DEFAULT 0,
+    latido TIMESTAMP,
+    administrador_id INTEGER,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    iniciado_en TIMESTAMP,
+    finalizado_en TIMESTAMP,
+    FOREIGN KEY (administrador_id) REFERENCES Administrador(id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_trabajos_estado_latido ON Trabajos (estado, latido);
+
+-- Bandeja de salida de recordatorios de fecha límite (app/recordatorios.py)
+CREATE TABLE IF NOT EXISTS Recordatorios (
+    id SERIAL PRIMARY KEY,
+    tarea_id INTEGER NOT NULL,
+    usuario_id INTEGER NOT NULL,
+    titulo VARCHAR(100) NOT NULL,
+    fecha_limite DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    programado_para TIMESTAMP NOT NULL,
+    propietario VARCHAR(100),
+    reclamado_en TIMESTAMP,
+    enviado_en TIMESTAMP,
+    error TEXT,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_recordatorios_tarea_fecha UNIQUE (tarea_id, fecha_limite),
+    FOREIGN KEY (usuario_id) REFERENCES Usuarios(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_recordatorios_estado_programado ON Recordatorios (estado, programado_para);
+
+-- Registro de auditoría de las operaciones administrativas (app/auditoria.py)
+CREATE TABLE IF NOT EXISTS Eventos_Auditoria (
+    id SERIAL PRIMARY KEY,
+    accion VARCHAR(50) NOT NULL,
+    entidad VARCHAR(50) NOT NULL,
+    entidad_id INTEGER,
+    administrador_id INTEGER,
+    datos JSON,
+    ip VARCHAR(45),
+    creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_eventos_auditoria_creado_en ON Eventos_Auditoria (creado_en);
+CREATE INDEX IF NOT EXISTS ix_eventos_auditoria_administrador ON Eventos_Auditoria (administrador_id, id);
+CREATE INDEX IF NOT EXISTS ix_eventos_auditoria_entidad ON Eventos_Auditoria (entidad, entidad_id, id);
+CREATE INDEX IF NOT EXISTS ix_eventos_auditoria_accion ON Eventos_Auditoria (accion, id);
+
+-- Marcas de agua de los procesos incrementales (última fecha límite escaneada, etc.)
+CREATE TABLE IF NOT EXISTS Marcas_Agua (
+    nombre VARCHAR(50) PRIMARY KEY,
+    valor DATE NOT NULL,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bases existentes: añadir los contadores y rellenarlos con `flask reparar-contadores`
+-- ALTER TABLE Usuarios ADD COLUMN IF NOT EXISTS total_tareas INTEGER NOT NULL DEFAULT 0;
+-- ALTER TABLE Usuarios ADD COLUMN IF NOT EXISTS tareas_vencidas INTEGER NOT NULL DEFAULT 0;
+
+-- Bases existentes: añadir la última actividad (hasta que se rellena, la purga usa actualizado_en)
+-- ALTER TABLE Usuarios ADD COLUMN IF NOT EXISTS ultima_actividad TIMESTAMP;
+-- UPDATE Usuarios SET ultima_actividad = COALESCE(actualizado_en, creado_en) WHERE ultima_actividad IS NULL;
+
+-- Bases existentes: añadir el título normalizado y rellenarlo con `flask tareas normalizar-titulos`
+-- ALTER TABLE Tareas ADD COLUMN IF NOT EXISTS titulo_normalizado VARCHAR(100) NOT NULL DEFAULT '';
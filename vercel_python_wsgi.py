@@ -5,11 +5,15 @@ Adaptador WSGI para Despliegue en Vercel.
 Este script actúa como el punto de entrada (entry point) que la plataforma Vercel
 utiliza para servir la aplicación web.
 
-Su única responsabilidad es importar la instancia principal de la aplicación Flask,
-nombrada `app`, desde el script `run.py`. Vercel está configurado (a través de
-`vercel.json`) para buscar automáticamente esta variable `app` en el archivo
-especificado para iniciar el servidor WSGI.
+Expone la variable `app` que Vercel busca (a través de `vercel.json`) para iniciar
+el servidor WSGI. En lugar de importar `run.py`, que construye la aplicación
+completa al importarse, utiliza la configuración serverless y un despachador que
+crea cada grupo de blueprints en su primera solicitud, reduciendo el tiempo de
+arranque en frío. El tiempo de importación se mide con `scripts/medir_importacion.py`.
 
 Este archivo no debe contener lógica de la aplicación.
 """
-from run import app
+from app.serverless import DespachadorPerezoso
+from config import ServerlessConfig
+
+app = DespachadorPerezoso(ServerlessConfig)